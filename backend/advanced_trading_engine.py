@@ -14,13 +14,19 @@ You can lose significant amounts of money.
 Use at your own risk. Not financial advice.
 """
 
-import yfinance as yf
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import pandas as pd
+from ohlcv_store import ohlcv_store
+from analysis_cache import analysis_cache, newest_bar
+from fundamentals_cache import fundamentals_cache
+from indicators import Indicators
+from feature_store import bar_times, feature_store, stack_features
+from streaming_indicators import IndicatorStream
+from cross_section import score_universe
+from model_registry import MIN_ROWS, ml_dataset, model_registry
 
 class AdvancedTradingEngine:
     """
@@ -35,37 +41,63 @@ class AdvancedTradingEngine:
     
     def __init__(self):
         self.scaler = StandardScaler()
-        self.ml_model = None
+        self.models = model_registry
+        self.streams: Dict[str, IndicatorStream] = {}
         
     def analyze_comprehensive(self, symbol: str, period: str = "1y") -> Dict[str, Any]:
         """
         Comprehensive multi-strategy analysis
         """
         try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period=period)
-            info = stock.info
+            hist = ohlcv_store.get_history(symbol, period=period)
+            if hist.empty:
+                return {"success": False, "error": "No data"}
             
+            # Memoized until a new bar closes (shared with analyze_stock's comprehensive runs)
+            bar = newest_bar(hist)
+            key = analysis_cache.key(symbol, "comprehensive",
+                                     (period, True, fundamentals_cache.version(symbol), self.models.version(symbol)), bar)
+            cached = analysis_cache.lookup(key, bar)
+            if cached is not None:
+                return cached
+            
+            info = fundamentals_cache.get(symbol)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        result = self.analyze_history(symbol, hist, info)
+        if result.get("success"):
+            analysis_cache.put(key, bar, result)
+        return result
+    
+    def analyze_history(self, symbol: str, hist: pd.DataFrame, info: Dict) -> Dict[str, Any]:
+        """
+        analyze_comprehensive on already-fetched history and company info
+        (pure computation, safe to run in an analysis pool worker)
+        """
+        try:
             if hist.empty:
                 return {"success": False, "error": "No data"}
             
+            # Every indicator series, read from the feature store and shared by the strategies below
+            ind = feature_store.indicators(symbol, hist)
+            
             # 1. VALUE INVESTING ANALYSIS (Buffett Style)
             value_score = self._value_investing_analysis(info)
             
             # 2. MOMENTUM ANALYSIS (Quant Style)
-            momentum_score = self._momentum_analysis(hist)
+            momentum_score = self._momentum_analysis(ind)
             
             # 3. MEAN REVERSION ANALYSIS
-            mean_reversion_score = self._mean_reversion_analysis(hist)
+            mean_reversion_score = self._mean_reversion_analysis(ind)
             
             # 4. TECHNICAL INDICATORS
-            technical_signals = self._technical_indicators(hist)
+            technical_signals = self._technical_indicators(ind)
             
             # 5. MACHINE LEARNING PREDICTION
-            ml_prediction = self._ml_prediction(hist)
+            ml_prediction = self._ml_prediction(ind, symbol, bar_times(hist))
             
             # 6. RISK ASSESSMENT
-            risk_metrics = self._risk_assessment(hist, info)
+            risk_metrics = self._risk_assessment(ind, info)
             
             # 7. COMBINED SCORE & DECISION
             combined_decision = self._combine_strategies(
@@ -77,7 +109,7 @@ class AdvancedTradingEngine:
                 risk_metrics
             )
             
-            current_price = hist['Close'].iloc[-1]
+            current_price = ind.price
             
             return {
                 "success": True,
@@ -107,6 +139,80 @@ class AdvancedTradingEngine:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def analyze_many(self, symbols: List[str], period: str = "1y", top_k: int = 20,
+                     min_bars: int = 60) -> Dict[str, Any]:
+        """
+        Cross-sectional screen of a whole universe
+        
+        Histories are bulk-prefetched, their feature store rows stacked into
+        (symbols x days) arrays and scored with the momentum, mean reversion, technical and risk rules in
+        one vectorized pass. Value (fundamentals) and the ML model need
+        per-symbol calls, so they stay in analyze_comprehensive; use this to
+        shortlist and that to drill down.
+        """
+        try:
+            symbols = list(dict.fromkeys(s.upper() for s in symbols))
+            ohlcv_store.prefetch(symbols, period)
+            
+            kept, tables, skipped = [], [], []
+            for symbol in symbols:
+                rows = feature_store.get_rows(symbol, period=period)
+                if len(rows) < min_bars:
+                    skipped.append(symbol)
+                    continue
+                kept.append(symbol)
+                tables.append(rows)
+            
+            if not kept:
+                return {"success": False, "error": "No data", "skipped": skipped}
+            
+            ind, counts = stack_features(tables, max(len(t) for t in tables))
+            result = score_universe(kept, ind, counts)
+            
+            return {
+                "success": True,
+                "analyzed": len(result),
+                "skipped": skipped,
+                "ranking": result.ranking(top_k),
+                "result": result,
+                "analysis_timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def live_indicators(self, symbol: str, price: Optional[float] = None, period: str = "1y") -> Dict[str, Any]:
+        """
+        Incrementally updated indicators for live prices
+        
+        The first call seeds an IndicatorStream from the stored history; later
+        calls only fold in bars that closed since. The store's last bar is held
+        back while its session is open, and `price` (a live tick, else that
+        bar's stored close) is evaluated as its close without being committed.
+        """
+        try:
+            hist = ohlcv_store.get_history(symbol, period=period, refresh=False)
+            if hist.empty:
+                return {"success": False, "error": "No data"}
+            
+            stream = self.streams.get(symbol.upper())
+            if stream is None:
+                stream = self.streams[symbol.upper()] = IndicatorStream.from_history(hist)
+            else:
+                stream.extend(hist)
+            
+            return {
+                "success": True,
+                "symbol": symbol,
+                "bars": stream.bars,
+                "as_of_bar": stream.last_bar.isoformat() if stream.last_bar is not None else None,
+                "forming_bar": stream.forming_bar.isoformat() if stream.forming_bar is not None else None,
+                "live": price is not None,
+                "indicators": (stream.peek(price) if price is not None or stream.forming is not None
+                               else stream.values())
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def _value_investing_analysis(self, info: Dict) -> Dict[str, Any]:
         """
         Warren Buffett style value analysis
@@ -175,20 +281,17 @@ class AdvancedTradingEngine:
             "strategy": "Value Investing (Buffett)"
         }
     
-    def _momentum_analysis(self, hist: pd.DataFrame) -> Dict[str, Any]:
+    def _momentum_analysis(self, ind: Indicators) -> Dict[str, Any]:
         """
         Momentum/Trend following (Renaissance/Quant style)
         """
         score = 0
         signals = []
         
-        close = hist['Close']
-        
         # Multiple timeframe momentum
-        returns_1d = close.pct_change(1).iloc[-1] * 100
-        returns_5d = close.pct_change(5).iloc[-1] * 100
-        returns_20d = close.pct_change(20).iloc[-1] * 100
-        returns_60d = close.pct_change(60).iloc[-1] * 100
+        returns_1d = ind.change_percent(1)
+        returns_20d = ind.change_percent(20)
+        returns_60d = ind.change_percent(60)
         
         # Short-term momentum (1-5 days)
         if returns_1d > 1:
@@ -215,9 +318,9 @@ class AdvancedTradingEngine:
             signals.append(f"⚠️ Negative 60-day momentum ({returns_60d:.2f}%)")
         
         # Moving average crossovers
-        ma_20 = close.rolling(20).mean().iloc[-1]
-        ma_50 = close.rolling(50).mean().iloc[-1] if len(close) >= 50 else ma_20
-        current_price = close.iloc[-1]
+        ma_20 = ind.sma_20[-1]
+        ma_50 = ind.sma_50[-1] if len(ind) >= 50 else ma_20
+        current_price = ind.price
         
         if current_price > ma_20 > ma_50:
             score += 2
@@ -227,7 +330,7 @@ class AdvancedTradingEngine:
             signals.append("⚠️ Death cross pattern (bearish)")
         
         # Rate of change (acceleration)
-        roc_20 = ((close.iloc[-1] - close.iloc[-21]) / close.iloc[-21] * 100) if len(close) > 21 else 0
+        roc_20 = ind.change_percent(20) if len(ind) > 21 else 0
         if roc_20 > 10:
             score += 1
             signals.append(f"✅ Strong momentum acceleration ({roc_20:.1f}%)")
@@ -242,25 +345,18 @@ class AdvancedTradingEngine:
             "strategy": "Momentum Trading (Quant)"
         }
     
-    def _mean_reversion_analysis(self, hist: pd.DataFrame) -> Dict[str, Any]:
+    def _mean_reversion_analysis(self, ind: Indicators) -> Dict[str, Any]:
         """
         Mean reversion / Statistical arbitrage
         """
         score = 0
         signals = []
         
-        close = hist['Close']
-        
         # Bollinger Bands
-        sma_20 = close.rolling(20).mean()
-        std_20 = close.rolling(20).std()
-        upper_band = sma_20 + (2 * std_20)
-        lower_band = sma_20 - (2 * std_20)
-        
-        current_price = close.iloc[-1]
-        current_sma = sma_20.iloc[-1]
-        current_upper = upper_band.iloc[-1]
-        current_lower = lower_band.iloc[-1]
+        current_price = ind.price
+        current_sma = ind.sma_20[-1]
+        current_upper = ind.bb_upper[-1]
+        current_lower = ind.bb_lower[-1]
         
         # Check if oversold (near lower band) - buy signal
         if current_price < current_lower:
@@ -279,12 +375,7 @@ class AdvancedTradingEngine:
             signals.append("⚠️ Above mean - potential reversion down")
         
         # RSI (Relative Strength Index)
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        current_rsi = rsi.iloc[-1]
+        current_rsi = ind.rsi_14[-1]
         
         if current_rsi < 30:
             score += 2
@@ -294,7 +385,7 @@ class AdvancedTradingEngine:
             signals.append(f"⚠️ RSI overbought ({current_rsi:.1f}) - sell signal")
         
         # Z-score (distance from mean in standard deviations)
-        z_score = (current_price - current_sma) / std_20.iloc[-1]
+        z_score = (current_price - current_sma) / ind.std_20[-1]
         if z_score < -2:
             score += 2
             signals.append(f"✅ Extremely oversold (Z-score: {z_score:.2f})")
@@ -312,137 +403,93 @@ class AdvancedTradingEngine:
             "strategy": "Mean Reversion (Statistical)"
         }
     
-    def _technical_indicators(self, hist: pd.DataFrame) -> Dict[str, Any]:
+    def _technical_indicators(self, ind: Indicators) -> Dict[str, Any]:
         """
         Technical indicators analysis
         """
-        close = hist['Close']
-        volume = hist['Volume']
-        
         signals = []
         score = 0
         
         # MACD (Moving Average Convergence Divergence)
-        ema_12 = close.ewm(span=12).mean()
-        ema_26 = close.ewm(span=26).mean()
-        macd = ema_12 - ema_26
-        signal_line = macd.ewm(span=9).mean()
-        macd_histogram = macd - signal_line
+        macd = ind.macd[-1]
+        signal_line = ind.macd_signal[-1]
         
-        if macd.iloc[-1] > signal_line.iloc[-1] and macd_histogram.iloc[-1] > 0:
+        if macd > signal_line and ind.macd_hist[-1] > 0:
             score += 2
             signals.append("✅ MACD bullish crossover")
-        elif macd.iloc[-1] < signal_line.iloc[-1]:
+        elif macd < signal_line:
             score -= 1
             signals.append("⚠️ MACD bearish")
         
         # Volume trend
-        avg_volume = volume.rolling(20).mean().iloc[-1]
-        current_volume = volume.iloc[-1]
+        avg_volume = ind.volume_sma_20[-1]
+        current_volume = ind.volume[-1]
         
         if current_volume > avg_volume * 1.5:
             score += 1
             signals.append("✅ High volume (strong interest)")
         
-        # ADX (Average Directional Index) - trend strength
-        # Simplified version
-        high = hist['High']
-        low = hist['Low']
-        
-        plus_dm = high.diff()
-        minus_dm = -low.diff()
-        tr = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
-        
-        atr = tr.rolling(14).mean()
-        
         return {
             "score": score,
             "max_score": 5,
             "signals": signals,
-            "macd_bullish": macd.iloc[-1] > signal_line.iloc[-1],
-            "high_volume": current_volume > avg_volume * 1.5
+            "macd_bullish": bool(macd > signal_line),
+            "high_volume": bool(current_volume > avg_volume * 1.5),
+            "atr_14": float(ind.atr_14[-1])
         }
     
-    def _ml_prediction(self, hist: pd.DataFrame) -> Dict[str, Any]:
+    def _ml_prediction(self, ind: Indicators, symbol: str, bar_times: np.ndarray) -> Dict[str, Any]:
         """
         Machine Learning price prediction
+        
+        Inference only: the symbol's model (ML_MODEL_BACKEND) comes from
+        the model registry, which trains it once on a cold start and retrains it on
+        its own schedule.
         """
         try:
-            # Prepare features
-            df = hist.copy()
-            df['Returns'] = df['Close'].pct_change()
-            df['MA_5'] = df['Close'].rolling(5).mean()
-            df['MA_20'] = df['Close'].rolling(20).mean()
-            df['Vol_ratio'] = df['Volume'] / df['Volume'].rolling(20).mean()
-            df['RSI'] = self._calculate_rsi(df['Close'])
-            
-            # Drop NaN
-            df = df.dropna()
+            # Features: Returns, MA_5, MA_20, Vol_ratio, RSI (rows with NaN dropped)
+            dataset = ml_dataset(ind)
+            X, _, _, rows = dataset
             
-            if len(df) < 50:
+            if len(X) < MIN_ROWS:
                 return {"prediction": "insufficient_data", "confidence": 0}
             
-            # Create target (1 if price goes up next day, 0 if down)
-            df['Target'] = (df['Close'].shift(-1) > df['Close']).astype(int)
-            df = df[:-1]  # Remove last row (no target)
-            
-            # Features
-            features = ['Returns', 'MA_5', 'MA_20', 'Vol_ratio', 'RSI']
-            X = df[features].values[-60:]  # Last 60 days
-            y = df['Target'].values[-60:]
-            
-            # Train simple ML model
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            model.fit(X[:-5], y[:-5])  # Train on all but last 5
-            
-            # Predict next day
-            last_features = X[-1].reshape(1, -1)
-            prediction = model.predict(last_features)[0]
-            confidence = model.predict_proba(last_features)[0][prediction]
+            # Predict next day from the latest bar's features
+            scored = self.models.predict(symbol, dataset, bar_times)
+            prediction = scored['prediction']
             
             # Calculate predicted price change
-            recent_volatility = df['Returns'].std() * 100
+            recent_volatility = np.std(ind.returns[rows], ddof=1) * 100
             predicted_change = recent_volatility if prediction == 1 else -recent_volatility
             
             return {
                 "prediction": "UP" if prediction == 1 else "DOWN",
-                "confidence": float(confidence * 100),
+                "confidence": float(scored['confidence'] * 100),
                 "predicted_change_percent": float(predicted_change),
-                "model": "RandomForest"
+                "model": scored['model'],
+                "model_version": scored['model_version'],
+                "model_trained_at": datetime.fromtimestamp(scored['trained_at']).isoformat(),
+                "retrain_due": scored['retrain_due']
             }
             
         except Exception as e:
             return {"prediction": "error", "confidence": 0, "error": str(e)}
     
-    def _calculate_rsi(self, prices, period=14):
-        """Calculate RSI"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
-    
-    def _risk_assessment(self, hist: pd.DataFrame, info: Dict) -> Dict[str, Any]:
+    def _risk_assessment(self, ind: Indicators, info: Dict) -> Dict[str, Any]:
         """
         Comprehensive risk assessment
         """
-        close = hist['Close']
-        
         # Volatility (annualized)
-        returns = close.pct_change()
-        volatility = returns.std() * np.sqrt(252) * 100
+        volatility = ind.volatility()
         
         # Maximum drawdown
-        cumulative = (1 + returns).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min() * 100
+        max_drawdown = ind.max_drawdown()
         
         # Beta (market correlation)
         beta = info.get('beta', 1.0)
         
         # Sharpe ratio estimate
-        avg_return = returns.mean() * 252 * 100  # Annualized
+        avg_return = np.nanmean(ind.returns[1:]) * 252 * 100  # Annualized
         risk_free_rate = 4.0  # Approximate
         sharpe = (avg_return - risk_free_rate) / volatility if volatility > 0 else 0
         
@@ -570,3 +617,14 @@ class AdvancedTradingEngine:
                 "technical": technical_signals['score']
             }
         }
+
+def analyze_comprehensive_history(symbol: str, hist: pd.DataFrame, info: Dict) -> Dict[str, Any]:
+    """Module-level entry point for analysis pool workers"""
+    return AdvancedTradingEngine().analyze_history(symbol, hist, info)
+
+def _model_history(symbol: str):
+    return feature_store.get_indicators(symbol, period="1y")
+
+def retrain_due_models() -> Dict[str, str]:
+    """One model registry retraining pass over stored history (runs in an analysis pool worker)"""
+    return model_registry.retrain_due(_model_history)
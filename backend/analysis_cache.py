@@ -0,0 +1,258 @@
+"""Analysis Result Cache - memoized analyses keyed by symbol, engine, parameters and last bar
+
+On daily bars analyze_stock and AdvancedTradingEngine give the same answer
+until a new bar closes, yet chat mentions, auto-trading scans and dashboard
+refreshes each asked for a fresh run. Results are cached under
+(SYMBOL, engine, params, last bar timestamp) and each entry remembers the
+full last bar it was computed from:
+
+- a new bar closing changes the key, so the next lookup misses
+- the last bar being overwritten (ohlcv_store refreshing a partial bar)
+  no longer matches the remembered bar, and the entry is dropped
+- callers put the fundamentals and ML model versions in params, so a
+  refetch or a retrained model changes the key as well
+- at most ANALYSIS_CACHE_MAX_ENTRIES entries are kept (LRU eviction)
+- concurrent misses for the same key share one analysis (single-flight);
+  its failure reaches every waiter, and only a run whose client went away
+  is taken over by a waiter
+- with ANALYSIS_CACHE_PERSIST the table is snapshotted to disk periodically
+  (atomic write) and reloaded at startup, so a restart does not recompute
+"""
+from trading_config import trading_config
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from analysis_pool import AnalysisCancelled
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+Key = Tuple[str, str, Tuple, float]
+
+def newest_bar(hist: pd.DataFrame) -> Tuple[float, ...]:
+    """The newest bar of a yfinance-style frame as (epoch seconds, open, high, low, close, volume)"""
+    row = hist.iloc[-1]
+    return (hist.index[-1].timestamp(), *(float(row[column]) for column in OHLCV_COLUMNS))
+
+def _json_default(value: Any) -> Any:
+    # numpy scalars that slipped into a result
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class AnalysisCache:
+    """LRU of successful analysis results, invalidated by the OHLCV tail"""
+
+    def __init__(self, max_entries: Optional[int] = None, path: Optional[str] = None,
+                 persist: Optional[bool] = None):
+        self.max_entries = max_entries or trading_config.ANALYSIS_CACHE_MAX_ENTRIES
+        self.path = Path(path or trading_config.ANALYSIS_CACHE_PATH)
+        self.persist = trading_config.ANALYSIS_CACHE_PERSIST if persist is None else persist
+        self.snapshot_interval = trading_config.ANALYSIS_CACHE_SNAPSHOT_INTERVAL
+        self._entries: "OrderedDict[Key, Tuple[Tuple[float, ...], Dict[str, Any], float]]" = OrderedDict()
+        self._inflight: Dict[Key, asyncio.Future] = {}
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.snapshots = 0
+
+    @staticmethod
+    def key(symbol: str, engine: str, params: Tuple, last_bar: Sequence[float]) -> Key:
+        """last_bar: the newest bar as [epoch seconds, open, high, low, close, volume]"""
+        return (symbol.upper(), engine, tuple(params), float(last_bar[0]))
+
+    # ---------- lookups ----------
+
+    def get(self, key: Key, last_bar: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """The cached result if it was computed from exactly this last bar (does not touch hit/miss counters)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != tuple(float(x) for x in last_bar):
+            # Same bar timestamp, different prices: the tail was refreshed since
+            del self._entries[key]
+            self.invalidations += 1
+            self._dirty = True
+            return None
+        self._entries.move_to_end(key)
+        return dict(entry[1])
+
+    def put(self, key: Key, last_bar: Sequence[float], result: Dict[str, Any]):
+        self._entries[key] = (tuple(float(x) for x in last_bar), dict(result), time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._dirty = True
+
+    def clear(self):
+        self._entries.clear()
+        self._dirty = True
+
+    def lookup(self, key: Key, last_bar: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """get() plus hit/miss accounting, for synchronous callers"""
+        result = self.get(key, last_bar)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def get_or_compute(self, key: Key, last_bar: Sequence[float],
+                             compute: Callable[[], Awaitable[Dict[str, Any]]],
+                             stored_key: Optional[Callable[[Dict[str, Any]], Key]] = None) -> Dict[str, Any]:
+        """Serve from cache, join an in-flight analysis of the same key, or run
+        compute() and cache its result if it succeeded
+
+        stored_key(result) gives the key to cache the result under when
+        computing it revised part of the key (a model trained on a cold start).
+        """
+        result = self.get(key, last_bar)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return dict(await asyncio.shield(inflight))
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # this caller was cancelled
+                # The shared run's client went away: run our own
+                return await self.get_or_compute(key, last_bar, compute, stored_key)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+            if result.get('success'):
+                self.put(stored_key(result) if stored_key else key, last_bar, result)
+            future.set_result(result)
+            return result
+        except (asyncio.CancelledError, AnalysisCancelled):
+            future.cancel()  # waiters whose clients are still there run it themselves
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Followers get the exception; mark it retrieved so an
+            # unobserved future does not log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    # ---------- persistence ----------
+
+    def load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt analysis cache {self.path}: {e}")
+            return False
+
+        # Saved oldest first, so replaying keeps the LRU order
+        for (symbol, engine, params, last_ts), last_bar, result, stored_at in data.get('entries', []):
+            key = (symbol, engine, tuple(params), last_ts)
+            self._entries[key] = (tuple(last_bar), result, stored_at)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        logger.info(f"Loaded {len(self._entries)} cached analyses")
+        return True
+
+    def save(self, entries: Optional[List] = None):
+        """Write `entries` (default: the whole table, oldest first) to disk"""
+        if entries is None:
+            entries = list(self._entries.items())
+        payload = json.dumps({
+            'saved_at': time.time(),
+            'entries': [[list(key), list(last_bar), result, stored_at]
+                        for key, (last_bar, result, stored_at) in entries]
+        }, separators=(',', ':'), default=_json_default)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.snapshots += 1
+
+    async def snapshot(self):
+        """Write the table if it changed since the last snapshot"""
+        if self.persist and self._dirty:
+            # Copy on the event loop: lookups keep reordering the table while the thread writes
+            entries = list(self._entries.items())
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self.save, entries)
+            except Exception as e:
+                self._dirty = True
+                logger.warning(f"Analysis cache snapshot failed: {e}")
+
+    # ---------- lifecycle ----------
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            await self.snapshot()
+
+    def start(self):
+        """Reload the last snapshot and schedule periodic ones (FastAPI startup); no-op unless persisting"""
+        if not self.persist:
+            return
+        self.load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.persist and self._dirty:
+            self.save()
+            self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+            'inflight': len(self._inflight),
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            'persist': self.persist,
+            'snapshots': self.snapshots
+        }
+
+analysis_cache = AnalysisCache()
@@ -0,0 +1,225 @@
+"""Analysis Pool - CPU-bound analysis off the event loop and across cores
+
+analyze_stock (indicators + LinearRegression) and AdvancedTradingEngine
+(indicators + RandomForest) take hundreds of milliseconds per symbol. Run
+inline they stall every other request on the event loop and use one core.
+Jobs here run in a process pool whose workers are spawned at startup with
+numpy/pandas/sklearn and the analysis modules already imported, so the
+first request does not pay for the imports.
+
+- bounded: more than ANALYSIS_POOL_MAX_PENDING queued+running jobs raises
+  AnalysisPoolBusy (the API answers 503 + Retry-After) instead of queueing
+  without limit
+- cancellable: run(..., disconnected=request.is_disconnected) drops a job
+  whose client went away (a queued job never starts; a running one finishes
+  in the worker and its result is discarded)
+- timed: queue wait and run time are tracked per job function (stats())
+
+ANALYSIS_POOL_WORKERS=0 runs jobs in a thread instead (scripts, debugging).
+"""
+from trading_config import trading_config
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Imported once per worker process at spawn time
+WARM_MODULES = (
+    'numpy', 'pandas', 'scipy.signal', 'sklearn.linear_model', 'sklearn.ensemble',
+    'indicators', 'feature_store', 'model_backends', 'stock_analysis', 'advanced_trading_engine',
+    'backtest'
+)
+
+DISCONNECT_POLL = 0.25  # seconds between client-disconnect checks
+TIMING_WINDOW = 200  # recent jobs kept per function for stats
+
+class AnalysisPoolBusy(RuntimeError):
+    """Too many analysis jobs are queued - retry later"""
+
+class AnalysisCancelled(Exception):
+    """The client disconnected before its analysis finished"""
+
+def _warm_worker(modules: Tuple[str, ...]):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logging.warning(f"Analysis worker could not preload {name}: {e}")
+
+def _ping() -> int:
+    time.sleep(0.05)  # keep this worker busy so the next ping spawns another
+    return os.getpid()
+
+def _timed(fn: Callable, args: tuple, kwargs: Dict) -> Tuple[Any, float]:
+    """Runs in the worker: the result plus the job's own run time"""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+class AnalysisPool:
+    """Process pool lifecycle, admission control and job timing"""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.workers = trading_config.ANALYSIS_POOL_WORKERS if workers is None else workers
+        self.max_pending = max_pending or trading_config.ANALYSIS_POOL_MAX_PENDING
+        self.timeout = timeout or trading_config.ANALYSIS_JOB_TIMEOUT
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warm_task: Optional[asyncio.Task] = None
+        self.warm_pids: set = set()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._timings: Dict[str, Deque[Tuple[float, float]]] = defaultdict(lambda: deque(maxlen=TIMING_WINDOW))
+
+    # ---------- lifecycle ----------
+
+    def _create_executor(self):
+        # spawn, not fork: the parent has an event loop, threads and open sockets
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_worker,
+            initargs=(WARM_MODULES,)
+        )
+
+    async def _warm(self):
+        """Spawn every worker now (each runs the initializer) rather than on first use"""
+        started = time.perf_counter()
+        try:
+            pids = await asyncio.gather(*(asyncio.wrap_future(self._executor.submit(_ping))
+                                          for _ in range(self.workers)))
+        except Exception as e:
+            logger.warning(f"Analysis pool warm-up failed: {e}")
+            return
+        self.warm_pids = set(pids)
+        logger.info(f"Analysis pool ready: {len(self.warm_pids)} workers in {time.perf_counter() - started:.1f}s")
+
+    def start(self):
+        """Create the pool and warm its workers in the background (FastAPI startup)"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._create_executor()
+        self._warm_task = asyncio.create_task(self._warm())
+
+    async def stop(self):
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            self._warm_task = None
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    def _restart(self):
+        """A worker died (segfault, OOM kill) - the executor is unusable, replace it"""
+        logger.error("Analysis pool broken, restarting workers")
+        broken, self._executor = self._executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        self.restarts += 1
+        self._create_executor()
+
+    # ---------- jobs ----------
+
+    async def _wait(self, future: asyncio.Future, disconnected: Optional[Callable[[], Awaitable[bool]]],
+                    timeout: float) -> Any:
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise asyncio.TimeoutError(f"Analysis did not finish within {timeout:g}s")
+                poll = min(remaining, DISCONNECT_POLL) if disconnected else remaining
+                done, _ = await asyncio.wait({future}, timeout=poll)
+                if done:
+                    return future.result()
+                if disconnected and await disconnected():
+                    self.cancelled += 1
+                    raise AnalysisCancelled()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def free_slots(self) -> int:
+        """Jobs that can be submitted now without AnalysisPoolBusy"""
+        return max(0, self.max_pending - self.pending)
+
+    async def run(self, fn: Callable, *args, disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                  timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in a worker; fn and its arguments must be picklable
+        (a module-level function taking plain data / DataFrames)"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise AnalysisPoolBusy(f"Analysis queue is full ({self.pending} jobs), retry shortly")
+
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        self.pending += 1
+        self.submitted += 1
+        started = time.perf_counter()
+        try:
+            if self._executor is None:
+                future = asyncio.ensure_future(asyncio.to_thread(_timed, fn, args, kwargs))
+            else:
+                future = asyncio.wrap_future(self._executor.submit(_timed, fn, args, kwargs))
+            result, run_seconds = await self._wait(future, disconnected, timeout or self.timeout)
+        except BrokenProcessPool:
+            self.failed += 1
+            self._restart()
+            raise
+        except (AnalysisCancelled, asyncio.TimeoutError, asyncio.CancelledError):
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        total = time.perf_counter() - started
+        self.completed += 1
+        self._timings[name].append((max(total - run_seconds, 0.0), run_seconds))
+        return result
+
+    # ---------- stats ----------
+
+    def stats(self) -> Dict[str, Any]:
+        jobs = {}
+        for name, timings in self._timings.items():
+            queued = [q for q, _ in timings]
+            runs = sorted(r for _, r in timings)
+            jobs[name] = {
+                'recent': len(runs),
+                'avg_queue_ms': round(sum(queued) / len(queued) * 1000, 1),
+                'avg_run_ms': round(sum(runs) / len(runs) * 1000, 1),
+                'p95_run_ms': round(runs[min(len(runs) - 1, int(len(runs) * 0.95))] * 1000, 1)
+            }
+        return {
+            'mode': 'process' if self._executor is not None else 'thread',
+            'workers': self.workers,
+            'warm_workers': len(self.warm_pids),
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'cancelled': self.cancelled,
+            'timeouts': self.timeouts,
+            'restarts': self.restarts,
+            'jobs': jobs
+        }
+
+analysis_pool = AnalysisPool()
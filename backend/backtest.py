@@ -0,0 +1,419 @@
+"""Backtest - the engines' scoring rules replayed on every historical bar
+
+There was no way to tell how AdvancedTradingEngine._combine_strategies or
+analyze_stock's signal score would have traded. Here both are evaluated for
+every bar of every symbol at once: the feature store's rows are stacked into
+(symbols x bars) matrices (right-aligned, like cross_section) and each rule
+becomes an array expression. The trailing-year statistics the engines take
+over their 1y history (risk level, average volume) and analyze_stock's
+30-bar regression forecast are rolling windows built from cumulative sums,
+so there is no per-day Python loop.
+
+Strategies:
+
+    combined  _combine_strategies confidence from momentum, mean reversion,
+              technical and risk, as in cross_section.score_universe; value
+              and ML need point-in-time fundamentals and one model fit per
+              bar, so they are left out and the rest is scaled up by the 65%
+              weight it carries (unscaled it never reaches the BUY band)
+    stock     analyze_stock's score: moving averages, volume ratio and the
+              7-day regression forecast
+
+Positions are long-only by default: BUY goes long, SELL goes flat (short with
+short=True) and HOLD keeps the position. A signal from bar t's close is
+filled at bar t+lag's close, paying fee + slippage basis points of the traded
+notional. Every symbol is an equal-weight sleeve of the portfolio (cash before
+its first bar, rebalanced daily); the sleeves' daily returns give the equity
+curve, Sharpe ratio and drawdown.
+
+run_backtest() splits the universe into chunks evaluated in worker processes
+(each reads its symbols' memory-mapped feature rows) and merges the sleeves
+on the union of their bar dates.
+
+Usage:
+    python backtest.py AAPL MSFT NVDA --period 10y --strategy stock
+"""
+from trading_config import trading_config
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cross_section import CONFIDENCE_BANDS, RISK_FREE_RATE, combined_confidence
+from feature_store import feature_store, stack_features
+from indicators import TRADING_DAYS, Indicators
+
+STRATEGIES = ('combined', 'stock')
+SIGNALS = np.array([-1, -1, 0, 1, 1])  # SELL / HOLD / BUY per confidence band (cross_section.ACTIONS)
+VOLATILITY_BARS = TRADING_DAYS - 1     # returns in the 1y history behind the engine's risk level
+FORECAST_BARS = 30                     # analyze_stock regresses the last 30 closes...
+FORECAST_AHEAD = 7                     # ...and extrapolates them 7 bars ahead
+WARMUP_BARS = 60                       # bars of history before a symbol's signals count (analyze_many's min_bars)
+CHUNK_SYMBOLS = 50                     # symbols per worker job
+MAX_REQUEST_SYMBOLS = 500              # symbols per API request (10 worker jobs)
+
+def _steps(values: np.ndarray, upper: float, lower: float, up: float, down: float) -> np.ndarray:
+    """+up where values > upper, -down where values < lower, else 0 (NaN scores 0)"""
+    return np.where(values > upper, up, np.where(values < lower, -down, 0.0))
+
+def _lagged(values: np.ndarray, periods: int, fill: float = np.nan) -> np.ndarray:
+    """values moved `periods` bars later along the bar axis"""
+    if periods < 0:
+        raise ValueError(f"periods must be >= 0 (a negative shift reads future bars), got {periods}")
+    if periods == 0:
+        return values
+    out = np.full(values.shape, fill)
+    out[:, periods:] = values[:, :-periods]
+    return out
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum over the trailing `window` bars (fewer at the start), from one cumulative sum"""
+    total = np.cumsum(values, axis=1)
+    out = total.copy()
+    out[:, window:] -= total[:, :-window]
+    return out
+
+def _rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """NaN-aware trailing mean and sample std over up to `window` bars (NaN below 1 / 2 values)"""
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+    n = _rolling_sum(valid.astype(np.float64), window)
+    s = _rolling_sum(x, window)
+    q = _rolling_sum(x * x, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(n >= 1, s / n, np.nan)
+        var = np.where(n >= 2, (q - s * mean) / (n - 1), np.nan)
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+# ---------- signals ----------
+
+def combined_signals(ind: Indicators, bars: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(confidence, signal) per bar of _combine_strategies without value and ML inputs
+    (rescaled to their weight); `bars` is the number of real bars up to each one"""
+    close = ind.close
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns_1d = (close / _lagged(close, 1) - 1.0) * 100
+        returns_20d = (close / _lagged(close, 20) - 1.0) * 100
+        returns_60d = (close / _lagged(close, 60) - 1.0) * 100
+        z_score = (close - ind.sma_20) / ind.std_20
+
+    # Momentum (_momentum_analysis)
+    ma_20 = ind.sma_20
+    ma_50 = np.where(bars >= 50, ind.sma_50, ma_20)
+    momentum = (_steps(returns_1d, 1, -1, 1, 1)
+                + _steps(returns_20d, 5, -5, 2, 2)
+                + _steps(returns_60d, 10, -10, 2, 2)
+                + np.where((close > ma_20) & (ma_20 > ma_50), 2.0,
+                           np.where((close < ma_20) & (ma_20 < ma_50), -2.0, 0.0))
+                + np.where((bars > 21) & (returns_20d > 10), 1.0, 0.0))
+
+    # Mean reversion (_mean_reversion_analysis)
+    sma_20 = ind.sma_20
+    mean_reversion = (np.where(close < ind.bb_lower, 3.0, np.where(close < sma_20 * 0.95, 2.0, 0.0))
+                      - np.where(close > ind.bb_upper, 3.0, np.where(close > sma_20 * 1.05, 2.0, 0.0))
+                      + _steps(ind.rsi_14, 70, 30, -2, -2)
+                      + _steps(z_score, 2, -2, -2, -2))
+
+    # Technical (_technical_indicators)
+    macd, signal = ind.macd, ind.macd_signal
+    technical = (np.where((macd > signal) & (ind.macd_hist > 0), 2.0, np.where(macd < signal, -1.0, 0.0))
+                 + np.where(ind.volume > ind.volume_sma_20 * 1.5, 1.0, 0.0))
+
+    # Risk level (_risk_assessment): volatility of the trailing year's returns
+    _, std = _rolling_mean_std(ind.returns, VOLATILITY_BARS)
+    volatility = std * np.sqrt(TRADING_DAYS) * 100
+
+    confidence = combined_confidence(momentum, mean_reversion, technical, volatility)
+    return confidence, SIGNALS[np.searchsorted(CONFIDENCE_BANDS, confidence, side='right')]
+
+def stock_signals(ind: Indicators, bars: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(confidence_score, signal) per bar of analyze_stock's scoring (stock_analysis.py)"""
+    price = ind.close
+    ma_20 = np.where(bars >= 20, ind.sma_20, price)
+    ma_50 = np.where(bars >= 50, ind.sma_50, price)
+
+    # Volume against the average of the trailing year
+    avg_volume, _ = _rolling_mean_std(ind.volume, TRADING_DAYS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ratio = np.where(avg_volume > 0, ind.volume / avg_volume, 0.0)
+
+    # Least-squares line through the last FORECAST_BARS closes, evaluated
+    # FORECAST_AHEAD bars past the newest: slope = sum((k - mean_k) * y_k) / sum((k - mean_k)^2)
+    # with k = position in the window; sum(k * y_k) comes from a cumulative sum of j * y_j
+    window = FORECAST_BARS
+    center = (window - 1) / 2
+    y = np.nan_to_num(price)
+    j = np.arange(price.shape[1], dtype=np.float64)
+    sum_y = _rolling_sum(y, window)
+    sum_jy = _rolling_sum(y * j, window)
+    sum_ky = sum_jy - (j - (window - 1)) * sum_y
+    slope = (sum_ky - center * sum_y) / (window * (window * window - 1) / 12)
+    forecast = sum_y / window + slope * (window + FORECAST_AHEAD - center)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        predicted_change = np.where(bars >= window, (forecast - price) / price * 100, 0.0)
+
+    score = (np.where(price > ma_20, 1.0, -1.0)
+             + np.where(price > ma_50, 1.0, -1.0)
+             + np.where(ma_20 > ma_50, 1.0, -1.0)
+             + np.where(volume_ratio > 1.5, 1.0, np.where(volume_ratio < 0.5, -0.5, 0.0))
+             + _steps(predicted_change, 5, -5, 2, 2))
+    signal = np.where(score >= 2, 1, np.where(score >= -1, 0, -1))
+    return (score + 5) * 10, signal
+
+SIGNAL_RULES = {'combined': combined_signals, 'stock': stock_signals}
+
+# ---------- simulation ----------
+
+def positions(signal: np.ndarray, short: bool = False) -> np.ndarray:
+    """Target position per bar: BUY -> long, SELL -> flat (short), HOLD keeps the last one"""
+    state = np.where(signal > 0, 1.0, np.where(signal < 0, -1.0 if short else 0.0, np.nan))
+    # Forward-fill: index of the latest bar that set a position
+    index = np.where(np.isnan(state), 0, np.arange(state.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    return np.nan_to_num(np.take_along_axis(state, index, axis=1))
+
+def simulate(ind: Indicators, target: np.ndarray, lag: int = 1,
+             cost: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """(daily sleeve returns, held position) for target positions decided at each
+    bar's close; `cost` is the fraction of traded notional lost to fees and slippage.
+    Returns are NaN where a symbol has no bar."""
+    held = _lagged(target, lag, fill=0.0)
+    traded = np.abs(np.diff(held, axis=1, prepend=0.0))
+    sleeve = _lagged(held, 1, fill=0.0) * np.nan_to_num(ind.returns) - traded * cost
+    return np.where(np.isnan(ind.close), np.nan, sleeve), held
+
+def evaluate(ind: Indicators, strategy: str = 'combined', lag: int = 1, cost: float = 0.0,
+             short: bool = False, warmup: int = WARMUP_BARS) -> Dict[str, np.ndarray]:
+    """Signals, positions and sleeve returns for stacked (symbols, bars) indicators"""
+    if strategy not in SIGNAL_RULES:
+        raise ValueError(f"Unknown strategy '{strategy}', expected one of {list(SIGNAL_RULES)}")
+    bars = np.cumsum(~np.isnan(ind.close), axis=1)
+    confidence, signal = SIGNAL_RULES[strategy](ind, bars)
+    signal = np.where(bars >= warmup, signal, 0)
+    returns, held = simulate(ind, positions(signal, short), lag, cost)
+    return {'confidence': confidence, 'signal': signal, 'held': held, 'returns': returns}
+
+def performance(returns: np.ndarray, risk_free: float = RISK_FREE_RATE) -> Dict[str, np.ndarray]:
+    """Per-row total return, CAGR, volatility, Sharpe (over `risk_free` percent a year)
+    and max drawdown (percent) of daily returns; NaN marks bars a row does not have"""
+    bars = np.sum(~np.isnan(returns), axis=1)
+    equity = np.cumprod(1.0 + np.nan_to_num(returns), axis=1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.nanmean(returns, axis=1)
+        std = np.nanstd(returns, axis=1, ddof=1)
+        sharpe = np.where(std > 0, (mean - risk_free / 100 / TRADING_DAYS) / std * np.sqrt(TRADING_DAYS), 0.0)
+        cagr = np.where(bars > 0, equity[:, -1] ** (TRADING_DAYS / bars) - 1.0, np.nan)
+    return {
+        'total_return': (equity[:, -1] - 1.0) * 100,
+        'cagr': cagr * 100,
+        'volatility': std * np.sqrt(TRADING_DAYS) * 100,
+        'sharpe': sharpe,
+        'max_drawdown': drawdown.min(axis=1) * 100
+    }
+
+# ---------- universe runs ----------
+
+def _stack_times(tables: Sequence[np.ndarray], days: int) -> np.ndarray:
+    times = np.full((len(tables), days), np.nan)
+    for row, rows in enumerate(tables):
+        tail = rows[-days:]
+        if len(tail):
+            times[row, days - len(tail):] = tail[:, 0]
+    return times
+
+def backtest_chunk(symbols: Sequence[str], period: str = '10y', strategy: str = 'combined',
+                   fee_bps: Optional[float] = None, slippage_bps: Optional[float] = None,
+                   lag: int = 1, short: bool = False, warmup: int = WARMUP_BARS) -> Dict[str, Any]:
+    """Sleeve returns and per-symbol results for a group of symbols, from their
+    feature store rows (module-level so analysis pool workers can run it)"""
+    fee_bps = trading_config.BACKTEST_FEE_BPS if fee_bps is None else fee_bps
+    slippage_bps = trading_config.BACKTEST_SLIPPAGE_BPS if slippage_bps is None else slippage_bps
+    kept, tables, skipped = [], [], []
+    for symbol in symbols:
+        rows = feature_store.get_rows(symbol, period=period)
+        if len(rows) <= warmup:
+            skipped.append(symbol)
+            continue
+        kept.append(symbol)
+        tables.append(rows)
+    if not kept:
+        return {'symbols': [], 'skipped': skipped}
+
+    days = max(len(t) for t in tables)
+    ind, _ = stack_features(tables, days)
+    run = evaluate(ind, strategy, lag, (fee_bps + slippage_bps) / 1e4, short, warmup)
+    valid = ~np.isnan(ind.close)
+    return {
+        'symbols': kept,
+        'skipped': skipped,
+        'times': _stack_times(tables, days)[valid],
+        'returns': run['returns'][valid],
+        'held': run['held'][valid],
+        'trades': np.count_nonzero(np.diff(run['held'], axis=1, prepend=0.0), axis=1),
+        'exposure': np.nanmean(np.where(valid, np.abs(run['held']), np.nan), axis=1) * 100,
+        'last_signal': run['signal'][:, -1],
+        'last_confidence': run['confidence'][:, -1],
+        **performance(run['returns'])
+    }
+
+@dataclass
+class BacktestResult:
+    """Portfolio equity curve plus one entry per symbol (same order as `symbols`)"""
+    strategy: str
+    params: Dict[str, Any]
+    symbols: np.ndarray
+    skipped: List[str]
+    times: np.ndarray        # union of the symbols' bar dates (epoch seconds)
+    returns: np.ndarray      # portfolio daily returns
+    equity: np.ndarray       # growth of 1.0
+    exposure: np.ndarray     # fraction of the sleeves holding a position
+    per_symbol: Dict[str, np.ndarray]
+    elapsed: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def summary(self) -> Dict[str, Any]:
+        metrics = performance(self.returns[None, :])
+        return {
+            **{name: round(float(values[0]), 4) for name, values in metrics.items()},
+            'bars': int(len(self.times)),
+            'symbols': int(len(self.symbols)),
+            'trades': int(self.per_symbol['trades'].sum()) if len(self.symbols) else 0,
+            'avg_exposure': round(float(self.exposure.mean()) * 100, 2) if len(self.times) else 0.0,
+            'start': datetime.fromtimestamp(self.times[0], tz=timezone.utc).date().isoformat() if len(self.times) else None,
+            'end': datetime.fromtimestamp(self.times[-1], tz=timezone.utc).date().isoformat() if len(self.times) else None
+        }
+
+    def row(self, i: int) -> Dict[str, Any]:
+        out = {'symbol': str(self.symbols[i])}
+        for name, values in self.per_symbol.items():
+            value = values[i]
+            out[name] = int(value) if np.issubdtype(values.dtype, np.integer) else round(float(value), 4)
+        return out
+
+    def ranking(self, k: int = 20, by: str = 'sharpe') -> List[Dict[str, Any]]:
+        values = np.nan_to_num(self.per_symbol[by], nan=-np.inf)
+        return [self.row(i) for i in np.argsort(-values, kind='stable')[:k]]
+
+    def equity_curve(self, points: int = 500) -> List[List[Any]]:
+        """[date, equity] pairs, thinned to about `points` (the last bar is always kept)"""
+        if not len(self.times):
+            return []
+        step = max(1, len(self.times) // points)
+        index = np.unique(np.append(np.arange(0, len(self.times), step), len(self.times) - 1))
+        return [[datetime.fromtimestamp(self.times[i], tz=timezone.utc).date().isoformat(), round(float(self.equity[i]), 6)]
+                for i in index]
+
+    def to_dict(self, top_k: int = 20, points: int = 500) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "strategy": self.strategy,
+            "params": self.params,
+            "summary": self.summary(),
+            "equity_curve": self.equity_curve(points),
+            "ranking": self.ranking(top_k),
+            "skipped": self.skipped,
+            "elapsed_seconds": round(self.elapsed, 3)
+        }
+
+PER_SYMBOL = ('total_return', 'cagr', 'volatility', 'sharpe', 'max_drawdown', 'trades', 'exposure',
+              'last_signal', 'last_confidence')
+
+def merge(chunks: Sequence[Dict[str, Any]], strategy: str, params: Dict[str, Any]) -> BacktestResult:
+    """Equal-weight portfolio of every chunk's sleeves on the union of their bar dates"""
+    skipped = [s for chunk in chunks for s in chunk['skipped']]
+    chunks = [chunk for chunk in chunks if chunk['symbols']]
+    symbols = [s for chunk in chunks for s in chunk['symbols']]
+    times = np.unique(np.concatenate([chunk['times'] for chunk in chunks])) if chunks else np.empty(0)
+    total = np.zeros(len(times))
+    held = np.zeros(len(times))
+    for chunk in chunks:
+        index = np.searchsorted(times, chunk['times'])
+        total += np.bincount(index, weights=chunk['returns'], minlength=len(times))
+        held += np.bincount(index, weights=np.abs(chunk['held']), minlength=len(times))
+    n = max(len(symbols), 1)
+    returns = total / n
+    per_symbol = {name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.empty(0)
+                  for name in PER_SYMBOL}
+    return BacktestResult(
+        strategy=strategy,
+        params=params,
+        symbols=np.asarray(symbols),
+        skipped=skipped,
+        times=times,
+        returns=returns,
+        equity=np.cumprod(1.0 + returns),
+        exposure=held / n,
+        per_symbol=per_symbol
+    )
+
+def chunked(symbols: Sequence[str], size: int = CHUNK_SYMBOLS) -> List[List[str]]:
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+def backtest_params(period: str = '10y', fee_bps: Optional[float] = None, slippage_bps: Optional[float] = None,
+                    lag: int = 1, short: bool = False, warmup: int = WARMUP_BARS) -> Dict[str, Any]:
+    """A run's settings with the configured fee / slippage defaults filled in"""
+    return {
+        'period': period,
+        'fee_bps': trading_config.BACKTEST_FEE_BPS if fee_bps is None else fee_bps,
+        'slippage_bps': trading_config.BACKTEST_SLIPPAGE_BPS if slippage_bps is None else slippage_bps,
+        'lag': lag,
+        'short': short,
+        'warmup': warmup
+    }
+
+def run_backtest(symbols: Sequence[str], period: str = '10y', strategy: str = 'combined',
+                 fee_bps: Optional[float] = None, slippage_bps: Optional[float] = None, lag: int = 1,
+                 short: bool = False, warmup: int = WARMUP_BARS, workers: Optional[int] = None) -> BacktestResult:
+    """Backtest a universe from stored history, chunks spread over `workers` processes
+    (BACKTEST_WORKERS by default; 1 runs them inline)"""
+    started = time.perf_counter()
+    if strategy not in SIGNAL_RULES:
+        raise ValueError(f"Unknown strategy '{strategy}', expected one of {list(SIGNAL_RULES)}")
+    params = backtest_params(period, fee_bps, slippage_bps, lag, short, warmup)
+    groups = chunked(symbols)
+    args = [(group, period, strategy, params['fee_bps'], params['slippage_bps'], lag, short, warmup)
+            for group in groups]
+    workers = min(trading_config.BACKTEST_WORKERS if workers is None else workers, len(groups))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(backtest_chunk, *zip(*args)))
+    else:
+        chunks = [backtest_chunk(*a) for a in args]
+    result = merge(chunks, strategy, params)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest the engines\' scoring rules over stored history')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--period', default='10y')
+    parser.add_argument('--strategy', default='combined', choices=STRATEGIES)
+    parser.add_argument('--fee-bps', type=float, default=None)
+    parser.add_argument('--slippage-bps', type=float, default=None)
+    parser.add_argument('--lag', type=int, default=1, help='bars between a signal and its fill')
+    parser.add_argument('--short', action='store_true', help='SELL signals go short instead of flat')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--prefetch', action='store_true', help='download missing history first')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.prefetch:
+        from ohlcv_store import ohlcv_store
+        ohlcv_store.prefetch([s.upper() for s in args.symbols], args.period)
+    result = run_backtest(args.symbols, args.period, args.strategy, args.fee_bps, args.slippage_bps,
+                          args.lag, args.short, workers=args.workers)
+    print(f"{args.strategy} on {len(result)} symbols in {result.elapsed:.2f}s (skipped: {result.skipped or 'none'})")
+    for name, value in result.summary().items():
+        print(f"  {name:<14} {value}")
+    print(f"top {args.top} by Sharpe:")
+    for row in result.ranking(args.top):
+        print(f"  {row['symbol']:<8} sharpe {row['sharpe']:7.3f}  return {row['total_return']:9.2f}%  "
+              f"max dd {row['max_drawdown']:7.2f}%  trades {row['trades']}")
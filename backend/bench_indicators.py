@@ -0,0 +1,124 @@
+"""Indicator Benchmark - pandas rolling/ewm path vs the vectorized indicators module
+
+The pandas side replays what analyze_stock and AdvancedTradingEngine used to
+compute per request (each analysis rebuilt its own SMA/std/RSI/EMA series),
+the NumPy side is one compute_indicators() call. Both run on the same
+synthetic geometric-Brownian-motion bars, and the largest absolute
+difference per series is printed so a speedup never hides a wrong value.
+
+Usage:
+    python bench_indicators.py --bars 252 --repeats 200
+"""
+import argparse
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from indicators import compute_indicators
+
+def synthetic_history(bars: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(100_000, 5_000_000, bars).astype(np.float64)
+    }, index=pd.date_range('2020-01-01', periods=bars, freq='B'))
+
+def _pandas_rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+def pandas_path(hist: pd.DataFrame) -> Dict[str, pd.Series]:
+    """The per-request pandas work both engines did before the shared module"""
+    close, volume, high, low = hist['Close'], hist['Volume'], hist['High'], hist['Low']
+
+    # analyze_stock
+    close.rolling(window=20).mean()
+    close.rolling(window=50).mean()
+    sma_200 = close.rolling(window=200).mean()
+    close.pct_change().std()
+
+    # _momentum_analysis
+    close.pct_change(1), close.pct_change(5), close.pct_change(20), close.pct_change(60)
+    close.rolling(20).mean()
+    sma_50 = close.rolling(50).mean()
+
+    # _mean_reversion_analysis
+    sma_20 = close.rolling(20).mean()
+    std_20 = close.rolling(20).std()
+    rsi_14 = _pandas_rsi(close)
+
+    # _technical_indicators
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    macd_signal = macd.ewm(span=9).mean()
+    volume_sma_20 = volume.rolling(20).mean()
+    tr = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    atr_14 = tr.rolling(14).mean()
+
+    # _ml_prediction
+    returns = close.pct_change()
+    sma_5 = close.rolling(5).mean()
+    close.rolling(20).mean()
+    _pandas_rsi(close)
+
+    # _risk_assessment
+    cumulative = (1 + returns).cumprod()
+    (cumulative - cumulative.expanding().max()) / cumulative.expanding().max()
+
+    return {
+        'returns': returns, 'sma_5': sma_5, 'sma_20': sma_20, 'sma_50': sma_50,
+        'sma_200': sma_200, 'std_20': std_20, 'rsi_14': rsi_14, 'macd': macd,
+        'macd_signal': macd_signal, 'volume_sma_20': volume_sma_20, 'atr_14': atr_14
+    }
+
+def numpy_path(hist: pd.DataFrame):
+    return compute_indicators(hist['High'].to_numpy(), hist['Low'].to_numpy(),
+                              hist['Close'].to_numpy(), hist['Volume'].to_numpy())
+
+def _time(fn: Callable, repeats: int) -> float:
+    """Best-of-3 mean seconds per call"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+def max_abs_diff(expected: pd.Series, actual: np.ndarray) -> float:
+    expected = expected.to_numpy(dtype=np.float64)
+    if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return float('inf')
+    mask = ~np.isnan(expected)
+    return float(np.max(np.abs(expected[mask] - actual[mask]))) if mask.any() else 0.0
+
+def main(bars: int, repeats: int):
+    hist = synthetic_history(bars)
+
+    expected = pandas_path(hist)
+    ind = numpy_path(hist)
+    print(f"{bars} bars, {repeats} repeats")
+    print("max |pandas - numpy|:")
+    for name, series in expected.items():
+        print(f"  {name:<14} {max_abs_diff(series, getattr(ind, name)):.3e}")
+
+    pandas_s = _time(lambda: pandas_path(hist), repeats)
+    numpy_s = _time(lambda: numpy_path(hist), repeats)
+    print(f"pandas path: {pandas_s * 1e3:8.3f} ms/request")
+    print(f"numpy path:  {numpy_s * 1e3:8.3f} ms/request")
+    print(f"speedup:     {pandas_s / numpy_s:8.1f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the shared indicator library against the pandas path')
+    parser.add_argument('--bars', type=int, default=252, help='bars of synthetic history (252 = 1y daily)')
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+    main(args.bars, args.repeats)
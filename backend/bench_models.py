@@ -0,0 +1,112 @@
+"""Model Benchmark - fit time, inference latency and walk-forward accuracy per ML backend
+
+Every backend in model_backends is trained on the same ml_dataset() rows
+_ml_prediction uses (TRAIN_ROWS trailing labelled rows) and timed on:
+
+    fit      one full fit on the training window
+    update   folding one new labelled row in (online backends only)
+    score    one prediction with the compiled scorer the registry serves
+
+Walk-forward accuracy replays the history bar by bar: each row is predicted
+with a model that has only seen earlier rows, then the model catches up the
+way the registry would run it (the forest refits on the trailing window
+every --refit-every bars, online backends partial_fit each new row).
+"always UP" is the baseline a model has to beat. The compiled scorer is
+checked against the sklearn model, so a fast path never hides a wrong one.
+
+Usage:
+    python bench_models.py --bars 756 --symbols 5
+    python bench_models.py --stored AAPL MSFT --period 5y   # bars from the feature store
+"""
+import argparse
+import time
+from copy import deepcopy as copy_model
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from bench_indicators import synthetic_history
+from indicators import indicators_from_history
+from model_backends import BACKENDS
+from model_registry import TRAIN_ROWS, ml_dataset
+from trading_config import trading_config
+
+def _time(fn: Callable, repeats: int) -> float:
+    """Best-of-3 mean seconds per call"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+def walk_forward(backend, X: np.ndarray, y: np.ndarray, refit_every: int) -> np.ndarray:
+    """Out-of-sample predictions for rows TRAIN_ROWS.. of X"""
+    predictions = np.empty(len(X) - TRAIN_ROWS, dtype=int)
+    model = backend.fit(X[:TRAIN_ROWS], y[:TRAIN_ROWS])
+    scorer = backend.compile(model)
+    for i, t in enumerate(range(TRAIN_ROWS, len(X))):
+        predictions[i] = scorer.predict(X[t])[0]
+        if backend.online:
+            model = backend.update(model, X[t:t + 1], y[t:t + 1])
+            scorer = backend.compile(model)
+        elif (i + 1) % refit_every == 0:
+            model = backend.fit(X[t + 1 - TRAIN_ROWS:t + 1], y[t + 1 - TRAIN_ROWS:t + 1])
+            scorer = backend.compile(model)
+    return predictions
+
+def datasets(args) -> Dict[str, tuple]:
+    if args.stored:
+        from feature_store import feature_store
+        return {symbol: ml_dataset(feature_store.get_indicators(symbol, period=args.period)[0])
+                for symbol in args.stored}
+    return {f"synthetic-{seed}": ml_dataset(indicators_from_history(synthetic_history(args.bars, seed=seed)))
+            for seed in range(args.symbols)}
+
+def main(args):
+    data = {name: (X, y) for name, (X, y, _, _) in datasets(args).items() if len(X) > TRAIN_ROWS + 1}
+    if not data:
+        raise SystemExit(f"Need more than {TRAIN_ROWS + 1} labelled rows per symbol")
+    rows = sum(len(X) - TRAIN_ROWS for X, _ in data.values())
+    print(f"{len(data)} symbols, {rows} walk-forward predictions, refit every {args.refit_every} bars")
+    print(f"{'backend':<14} {'fit ms':>9} {'update ms':>10} {'score us':>9} {'accuracy':>9} {'max |dp|':>9}")
+
+    up = [y[TRAIN_ROWS:] for _, y in data.values()]
+    for key in args.backends:
+        backend = BACKENDS[key]
+        X, y = next(iter(data.values()))
+        model = backend.fit(X[:TRAIN_ROWS], y[:TRAIN_ROWS])
+        scorer = backend.compile(model)
+
+        # Compiled scorer vs sklearn on the held-back rows
+        expected = (model[1].predict_proba(model[0].transform(X[TRAIN_ROWS:])) if backend.online
+                    else model.predict_proba(X[TRAIN_ROWS:]))
+        actual = np.array([scorer.predict_proba(x) for x in X[TRAIN_ROWS:]])
+        diff = float(np.max(np.abs(expected - actual)))
+
+        fit_s = _time(lambda: backend.fit(X[:TRAIN_ROWS], y[:TRAIN_ROWS]), max(1, args.repeats // 50))
+        score_s = _time(lambda: scorer.predict(X[-1]), args.repeats)
+        update = '-'
+        if backend.online:
+            # update() learns in place: time it on a throwaway copy
+            copy = copy_model(model)
+            update = f"{_time(lambda: backend.update(copy, X[-1:], y[-1:]), args.repeats) * 1e3:10.3f}"
+
+        hits: List[np.ndarray] = [walk_forward(backend, X, y, args.refit_every) == y[TRAIN_ROWS:]
+                                  for X, y in data.values()]
+        accuracy = float(np.concatenate(hits).mean())
+        print(f"{backend.name:<14} {fit_s * 1e3:9.3f} {update:>10} {score_s * 1e6:9.1f} {accuracy:9.3f} {diff:9.1e}")
+    print(f"{'always UP':<14} {'':>9} {'':>10} {'':>9} {float(np.concatenate(up).mean()):9.3f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the ML model backends of _ml_prediction')
+    parser.add_argument('--bars', type=int, default=756, help='bars of synthetic history per symbol (756 = 3y daily)')
+    parser.add_argument('--symbols', type=int, default=5, help='synthetic symbols (different seeds)')
+    parser.add_argument('--stored', nargs='*', help='use these symbols from the feature store instead')
+    parser.add_argument('--period', default='5y', help='history period for --stored symbols')
+    parser.add_argument('--refit-every', type=int, default=trading_config.ML_RETRAIN_BARS,
+                        help='bars between forest refits in the walk-forward replay')
+    parser.add_argument('--backends', nargs='*', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--repeats', type=int, default=500)
+    main(parser.parse_args())
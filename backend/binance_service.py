@@ -2,6 +2,8 @@
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
 from trading_config import trading_config
+from market_journal import market_journal
+import asyncio
 import logging
 from typing import Dict, List, Optional
 
@@ -27,13 +29,24 @@ class BinanceService:
                 logger.error(f"Failed to initialize Binance: {e}")
                 self.enabled = False
     
+    @property
+    def readable(self) -> bool:
+        """Account/market reads work live, or from the market journal when replaying"""
+        return self.enabled or market_journal.replaying
+    
+    async def _read(self, call: str, **kwargs):
+        """Blocking REST read in a worker thread, recorded/replayed by the market journal"""
+        return await market_journal.call(
+            'binance', call, kwargs, lambda: asyncio.to_thread(getattr(self.client, call), **kwargs)
+        )
+    
     async def get_account_info(self) -> Dict:
         """Get Binance account information"""
-        if not self.enabled:
+        if not self.readable:
             return {}
         
         try:
-            account = self.client.get_account()
+            account = await self._read('get_account')
             return {
                 'account_type': account['accountType'],
                 'can_trade': account['canTrade'],
@@ -56,11 +69,11 @@ class BinanceService:
     
     async def get_asset_balance(self, asset: str) -> float:
         """Get balance for specific asset"""
-        if not self.enabled:
+        if not self.readable:
             return 0.0
         
         try:
-            balance = self.client.get_asset_balance(asset=asset.upper())
+            balance = await self._read('get_asset_balance', asset=asset.upper())
             if balance:
                 return float(balance['free'])
         except Exception as e:
@@ -160,11 +173,11 @@ class BinanceService:
     
     async def get_symbol_price(self, symbol: str) -> Dict:
         """Get current price for a symbol"""
-        if not self.enabled:
+        if not self.readable:
             return {}
         
         try:
-            ticker = self.client.get_symbol_ticker(symbol=symbol.upper())
+            ticker = await self._read('get_symbol_ticker', symbol=symbol.upper())
             return {
                 'symbol': ticker['symbol'],
                 'price': float(ticker['price']),
@@ -176,11 +189,11 @@ class BinanceService:
     
     async def get_all_tickers(self) -> List[Dict]:
         """Get prices for all symbols"""
-        if not self.enabled:
+        if not self.readable:
             return []
         
         try:
-            tickers = self.client.get_all_tickers()
+            tickers = await self._read('get_all_tickers')
             return [
                 {
                     'symbol': ticker['symbol'],
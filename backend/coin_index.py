@@ -0,0 +1,220 @@
+"""CoinGecko Id Index - symbol -> coin id resolution persisted to disk"""
+from trading_config import trading_config
+from http_client import http_client
+from rate_limiter import rate_limiter, Priority
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class CoinIdIndex:
+    """O(1) symbol -> CoinGecko id lookup built from /coins/list
+
+    Many coins share a ticker, so the id with the best market-cap rank wins
+    (unranked coins lose to ranked ones, ties fall back to the shortest id).
+    Symbols that are not in the index are remembered in a negative cache so
+    they do not cost a rate-limited price call again; it holds at most
+    COIN_INDEX_NEGATIVE_MAX unexpired symbols, since lookups come from user input.
+    """
+
+    def __init__(self, api_url: str, overrides: Optional[Dict[str, str]] = None):
+        self.api_url = api_url
+        self.overrides = {symbol.upper(): coin_id for symbol, coin_id in (overrides or {}).items()}
+        self.path = Path(trading_config.COIN_INDEX_PATH)
+        self.refresh_seconds = trading_config.COIN_INDEX_REFRESH_HOURS * 3600
+        self.negative_ttl = trading_config.COIN_INDEX_NEGATIVE_TTL
+        self.negative_max = trading_config.COIN_INDEX_NEGATIVE_MAX
+        self.rank_pages = trading_config.COIN_INDEX_RANK_PAGES
+        self._by_symbol: Dict[str, str] = {}
+        self._negative: Dict[str, float] = {}  # SYMBOL -> expiry (epoch seconds), soonest first
+        self.built_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.lookups = 0
+        self.negative_hits = 0
+        self.unresolved = 0
+
+    # ---------- lookup ----------
+
+    def resolve(self, symbol: str) -> Optional[str]:
+        """CoinGecko id for a ticker, or None if it is known not to exist"""
+        key = symbol.upper()
+        self.lookups += 1
+        if key in self.overrides:
+            return self.overrides[key]
+        coin_id = self._by_symbol.get(key)
+        if coin_id:
+            return coin_id
+
+        expires_at = self._negative.get(key)
+        if expires_at is not None:
+            if expires_at > time.time():
+                self.negative_hits += 1
+                return None
+            del self._negative[key]
+
+        if not self._by_symbol:
+            # Index not built yet - keep the old best-effort guess
+            return symbol.lower()
+
+        self.unresolved += 1
+        self.mark_unknown(symbol)
+        return None
+
+    def mark_unknown(self, symbol: str):
+        """Remember that CoinGecko has nothing for this symbol"""
+        key = symbol.upper()
+        self._negative.pop(key, None)
+        self._negative[key] = time.time() + self.negative_ttl
+        self._prune_negative()
+
+    def _prune_negative(self):
+        """Drop expired symbols, then the oldest beyond negative_max (entries
+        are kept in expiry order, so both come off the front)"""
+        now = time.time()
+        while self._negative:
+            key, expires_at = next(iter(self._negative.items()))
+            if expires_at > now and len(self._negative) <= self.negative_max:
+                break
+            del self._negative[key]
+
+    # ---------- persistence ----------
+
+    def load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt coin index {self.path}: {e}")
+            return False
+
+        self._by_symbol = data.get('symbols', {})
+        now = time.time()
+        self._negative = dict(sorted(((s, exp) for s, exp in data.get('negative', {}).items() if exp > now),
+                                     key=lambda item: item[1]))
+        self._prune_negative()
+        self.built_at = data.get('built_at', 0.0)
+        logger.info(f"Loaded coin index: {len(self._by_symbol)} symbols")
+        return True
+
+    def save(self):
+        self._prune_negative()
+        payload = json.dumps({
+            'built_at': self.built_at,
+            'symbols': self._by_symbol,
+            'negative': self._negative
+        }, separators=(',', ':'))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    # ---------- build ----------
+
+    async def _get_json(self, path: str, params: Optional[Dict] = None) -> Optional[Any]:
+        if not await rate_limiter.acquire('coingecko', Priority.BACKGROUND, max_wait=120):
+            return None
+        response = await http_client.get(f"{self.api_url}{path}", params=params, timeout=30)
+        if response.status_code == 429:
+            rate_limiter.penalize('coingecko')
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def build(coins: List[Dict], ranks: Dict[str, int]) -> Dict[str, str]:
+        """Pick one id per symbol: best market-cap rank, then shortest id"""
+        best: Dict[str, tuple] = {}
+        for coin in coins:
+            symbol = (coin.get('symbol') or '').upper()
+            coin_id = coin.get('id')
+            if not symbol or not coin_id:
+                continue
+            candidate = (ranks.get(coin_id, float('inf')), len(coin_id), coin_id)
+            if symbol not in best or candidate < best[symbol]:
+                best[symbol] = candidate
+        return {symbol: candidate[2] for symbol, candidate in best.items()}
+
+    async def refresh(self) -> bool:
+        """Rebuild from /coins/list plus the top market-cap pages"""
+        try:
+            coins = await self._get_json('/coins/list')
+            if not coins:
+                return False
+
+            ranks: Dict[str, int] = {}
+            for page in range(1, self.rank_pages + 1):
+                markets = await self._get_json('/coins/markets', {
+                    'vs_currency': 'usd',
+                    'order': 'market_cap_desc',
+                    'per_page': 250,
+                    'page': page
+                })
+                if not markets:
+                    break
+                for coin in markets:
+                    if coin.get('market_cap_rank'):
+                        ranks[coin['id']] = coin['market_cap_rank']
+        except Exception as e:
+            logger.warning(f"Coin index refresh failed: {e}")
+            return False
+
+        self._by_symbol = self.build(coins, ranks)
+        self.built_at = time.time()
+        # Symbols that were unknown may have been listed since
+        self._negative = {s: exp for s, exp in self._negative.items() if s not in self._by_symbol}
+        await asyncio.to_thread(self.save)
+        logger.info(f"Coin index rebuilt: {len(self._by_symbol)} symbols, {len(ranks)} ranked")
+        return True
+
+    # ---------- lifecycle ----------
+
+    async def _run(self):
+        while True:
+            age = time.time() - self.built_at
+            if age >= self.refresh_seconds:
+                ok = await self.refresh()
+                delay = self.refresh_seconds if ok else 600
+            else:
+                delay = self.refresh_seconds - age
+            await asyncio.sleep(delay)
+
+    def start(self):
+        """Load from disk and schedule periodic rebuilds (FastAPI startup)"""
+        self.load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._by_symbol or self._negative:
+            self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'symbols': len(self._by_symbol),
+            'built_at': datetime.fromtimestamp(self.built_at, timezone.utc).isoformat() if self.built_at else None,
+            'negative_cached': len(self._negative),
+            'lookups': self.lookups,
+            'negative_hits': self.negative_hits,
+            'unresolved': self.unresolved
+        }
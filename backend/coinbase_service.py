@@ -1,6 +1,8 @@
 """Coinbase Pro (Advanced Trade) Integration Service"""
 from coinbase.rest import RESTClient
 from trading_config import trading_config
+from market_journal import market_journal
+import asyncio
 import logging
 from typing import Dict, List, Optional
 from decimal import Decimal
@@ -26,13 +28,25 @@ class CoinbaseService:
                 logger.error(f"Failed to initialize Coinbase: {e}")
                 self.enabled = False
     
+    @property
+    def readable(self) -> bool:
+        """Account/market reads work live, or from the market journal when replaying"""
+        return self.enabled or market_journal.replaying
+    
+    async def _read(self, call: str, **kwargs):
+        """Blocking REST read in a worker thread, recorded/replayed by the market journal"""
+        def fetch():
+            response = getattr(self.client, call)(**kwargs)
+            return response.to_dict() if hasattr(response, 'to_dict') else response
+        return await market_journal.call('coinbase', call, kwargs, lambda: asyncio.to_thread(fetch))
+    
     async def get_accounts(self) -> List[Dict]:
         """Get all Coinbase accounts with balances"""
-        if not self.enabled:
+        if not self.readable:
             return []
         
         try:
-            response = self.client.get_accounts()
+            response = await self._read('get_accounts')
             accounts = response.get('accounts', [])
             
             return [
@@ -157,11 +171,11 @@ class CoinbaseService:
     
     async def get_product_info(self, product_id: str) -> Dict:
         """Get trading pair information"""
-        if not self.enabled:
+        if not self.readable:
             return {}
         
         try:
-            product = self.client.get_product(product_id=product_id)
+            product = await self._read('get_product', product_id=product_id)
             return {
                 'product_id': product.get('product_id'),
                 'price': float(product.get('price', 0)),
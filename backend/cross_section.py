@@ -0,0 +1,200 @@
+"""Cross-Sectional Analysis - score a whole universe in one vectorized pass
+
+analyze_comprehensive() runs one pandas/Python pipeline per symbol; screening
+thousands of tickers that way is thousands of pipelines. Here every symbol's
+bars are stacked into (symbols x days) matrices and the momentum,
+mean-reversion, technical and risk rules of AdvancedTradingEngine are
+evaluated with array operations over all rows at once.
+
+Rows are right-aligned by bar: column -1 is each symbol's latest bar and
+shorter histories are NaN-padded on the left. Every rule is a time-series
+rule per symbol, so this gives the same readings as the per-symbol engine
+without inventing bars for symbols that did not trade on a given date.
+
+The indicator matrices are the feature store's stored rows
+(feature_store.stack_features) or computed from stacked bars (score_bars).
+"""
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+from indicators import TRADING_DAYS, Indicators, compute_indicators
+
+RISK_FREE_RATE = 4.0  # percent, same approximation as _risk_assessment
+
+# Combined-score weights of the strategies available without per-symbol
+# fundamentals or model training (momentum 30%, mean reversion 20%, technical 15%)
+MOMENTUM_WEIGHT = 0.30
+MEAN_REVERSION_WEIGHT = 0.20
+TECHNICAL_WEIGHT = 0.15
+SCORED_WEIGHT = MOMENTUM_WEIGHT + MEAN_REVERSION_WEIGHT + TECHNICAL_WEIGHT  # of _combine_strategies' 100%
+
+ACTIONS = np.array(['SELL', 'SELL', 'HOLD', 'BUY', 'BUY'])
+RECOMMENDATIONS = np.array(['🔴 STRONG SELL', '🟠 SELL', '⚪ HOLD', '🟡 BUY', '🟢 STRONG BUY'])
+CONFIDENCE_BANDS = [25, 40, 60, 75]
+
+def stack_bars(bars: Sequence[np.ndarray], days: int) -> Dict[str, np.ndarray]:
+    """Right-align per-symbol (n, 6) store bars into (symbols, days) matrices
+
+    Returns 'timestamp', 'high', 'low', 'close', 'volume' matrices plus the
+    number of real bars per row ('bars').
+    """
+    shape = (len(bars), days)
+    out = {name: np.full(shape, np.nan) for name in ('timestamp', 'high', 'low', 'close', 'volume')}
+    counts = np.zeros(len(bars), dtype=np.int64)
+    for row, symbol_bars in enumerate(bars):
+        tail = symbol_bars[-days:]
+        n = len(tail)
+        counts[row] = n
+        if n:
+            out['timestamp'][row, days - n:] = tail[:, 0]
+            out['high'][row, days - n:] = tail[:, 2]
+            out['low'][row, days - n:] = tail[:, 3]
+            out['close'][row, days - n:] = tail[:, 4]
+            out['volume'][row, days - n:] = tail[:, 5]
+    out['bars'] = counts
+    return out
+
+def _change_percent(close: np.ndarray, periods: int) -> np.ndarray:
+    """Last-bar percent change over `periods` bars for every row (NaN if the window is too short)"""
+    if close.shape[1] <= periods:
+        return np.full(close.shape[0], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (close[:, -1] / close[:, -1 - periods] - 1.0) * 100
+
+def _steps(values: np.ndarray, upper: float, lower: float, up: float, down: float) -> np.ndarray:
+    """+up where values > upper, -down where values < lower, else 0 (NaN scores 0)"""
+    return np.where(values > upper, up, np.where(values < lower, -down, 0.0))
+
+def combined_confidence(momentum: np.ndarray, mean_reversion: np.ndarray, technical: np.ndarray,
+                        volatility: np.ndarray) -> np.ndarray:
+    """_combine_strategies' confidence without value and ML inputs: the scored
+    strategies rescaled to their SCORED_WEIGHT share (unscaled they top out
+    near 65 and never reach the upper bands), cut 15% for high volatility"""
+    confidence = np.clip((momentum / 10 * 100 * MOMENTUM_WEIGHT
+                          + mean_reversion / 10 * 100 * MEAN_REVERSION_WEIGHT
+                          + technical / 5 * 100 * TECHNICAL_WEIGHT) / SCORED_WEIGHT, 0, 100)
+    return np.where(volatility >= 35, confidence * 0.85, confidence)
+
+@dataclass
+class CrossSectionResult:
+    """Array-backed scores, one entry per symbol (same order as `symbols`)"""
+    symbols: np.ndarray
+    bars: np.ndarray
+    price: np.ndarray
+    momentum: np.ndarray
+    mean_reversion: np.ndarray
+    technical: np.ndarray
+    returns_20d: np.ndarray
+    rsi: np.ndarray
+    z_score: np.ndarray
+    volatility: np.ndarray
+    max_drawdown: np.ndarray
+    sharpe: np.ndarray
+    confidence: np.ndarray
+    action: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def top(self, k: int = 20, by: str = 'confidence') -> np.ndarray:
+        """Row indices of the k highest values of `by` (NaN never ranks)"""
+        values = np.nan_to_num(getattr(self, by), nan=-np.inf)
+        k = min(k, len(values))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        best = np.argpartition(-values, k - 1)[:k]
+        return best[np.argsort(-values[best], kind='stable')]
+
+    def row(self, i: int) -> Dict[str, Any]:
+        confidence = float(self.confidence[i])
+        band = int(np.searchsorted(CONFIDENCE_BANDS, confidence, side='right'))
+        return {
+            "symbol": str(self.symbols[i]),
+            "current_price": float(self.price[i]),
+            "bars": int(self.bars[i]),
+            "momentum_score": float(self.momentum[i]),
+            "mean_reversion_score": float(self.mean_reversion[i]),
+            "technical_score": float(self.technical[i]),
+            "returns_20d": float(self.returns_20d[i]),
+            "rsi": float(self.rsi[i]),
+            "z_score": float(self.z_score[i]),
+            "volatility": float(self.volatility[i]),
+            "max_drawdown": float(self.max_drawdown[i]),
+            "sharpe_ratio": float(self.sharpe[i]),
+            "confidence": round(confidence, 1),
+            "action": str(self.action[i]),
+            "recommendation": str(RECOMMENDATIONS[band])
+        }
+
+    def ranking(self, k: int = 20, by: str = 'confidence') -> List[Dict[str, Any]]:
+        return [self.row(i) for i in self.top(k, by)]
+
+def score_bars(symbols: Sequence[str], matrices: Dict[str, np.ndarray]) -> CrossSectionResult:
+    """score_universe() for stack_bars() output (indicators computed here)"""
+    ind = compute_indicators(matrices['high'], matrices['low'], matrices['close'], matrices['volume'])
+    return score_universe(symbols, ind, matrices['bars'])
+
+def score_universe(symbols: Sequence[str], ind: Indicators, bars: np.ndarray) -> CrossSectionResult:
+    """Momentum / mean-reversion / technical / risk scores for every row of
+    (symbols, days) indicator matrices; `bars` is each row's number of real bars"""
+    close, volume = ind.close, ind.volume
+    price = close[:, -1]
+
+    # Momentum (_momentum_analysis)
+    returns_1d = _change_percent(close, 1)
+    returns_20d = _change_percent(close, 20)
+    returns_60d = _change_percent(close, 60)
+    ma_20 = ind.sma_20[:, -1]
+    ma_50 = np.where(bars >= 50, ind.sma_50[:, -1], ma_20)
+    momentum = (_steps(returns_1d, 1, -1, 1, 1)
+                + _steps(returns_20d, 5, -5, 2, 2)
+                + _steps(returns_60d, 10, -10, 2, 2)
+                + np.where((price > ma_20) & (ma_20 > ma_50), 2.0,
+                           np.where((price < ma_20) & (ma_20 < ma_50), -2.0, 0.0))
+                + np.where((bars > 21) & (returns_20d > 10), 1.0, 0.0))
+
+    # Mean reversion (_mean_reversion_analysis)
+    sma_20, std_20 = ind.sma_20[:, -1], ind.std_20[:, -1]
+    upper, lower = ind.bb_upper[:, -1], ind.bb_lower[:, -1]
+    rsi = ind.rsi_14[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_score = (price - sma_20) / std_20
+    mean_reversion = (np.where(price < lower, 3.0, np.where(price < sma_20 * 0.95, 2.0, 0.0))
+                      - np.where(price > upper, 3.0, np.where(price > sma_20 * 1.05, 2.0, 0.0))
+                      + _steps(rsi, 70, 30, -2, -2)
+                      + _steps(z_score, 2, -2, -2, -2))
+
+    # Technical (_technical_indicators)
+    macd, signal = ind.macd[:, -1], ind.macd_signal[:, -1]
+    technical = (np.where((macd > signal) & (ind.macd_hist[:, -1] > 0), 2.0, np.where(macd < signal, -1.0, 0.0))
+                 + np.where(volume[:, -1] > ind.volume_sma_20[:, -1] * 1.5, 1.0, 0.0))
+
+    # Risk (_risk_assessment)
+    returns = ind.returns[:, 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = np.nanstd(returns, axis=1, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+        drawdown = close / np.fmax.accumulate(close, axis=1) - 1.0
+        max_drawdown = np.nanmin(np.where(np.isnan(close), 0.0, drawdown), axis=1) * 100
+        avg_return = np.nanmean(returns, axis=1) * TRADING_DAYS * 100
+        sharpe = np.where(volatility > 0, (avg_return - RISK_FREE_RATE) / volatility, 0.0)
+
+    # Combined score (_combine_strategies without value and ML inputs)
+    confidence = combined_confidence(momentum, mean_reversion, technical, volatility)
+
+    return CrossSectionResult(
+        symbols=np.asarray(symbols),
+        bars=bars,
+        price=price,
+        momentum=momentum,
+        mean_reversion=mean_reversion,
+        technical=technical,
+        returns_20d=returns_20d,
+        rsi=rsi,
+        z_score=z_score,
+        volatility=volatility,
+        max_drawdown=max_drawdown,
+        sharpe=sharpe,
+        confidence=confidence,
+        action=ACTIONS[np.searchsorted(CONFIDENCE_BANDS, confidence, side='right')]
+    )
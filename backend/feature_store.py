@@ -0,0 +1,320 @@
+"""Feature Store - indicator rows materialized once per bar, keyed by (symbol, bar timestamp)
+
+analyze_stock, AdvancedTradingEngine (momentum, mean reversion, ML features),
+the model registry's training passes and the universe screen all derive the
+same returns / moving averages / volume ratio / RSI / MACD series from the
+same stored bars. Here they are computed once per new bar and kept next to
+the OHLCV store, one float64 table per (symbol, interval):
+
+    features/1d/AAPL.f64    (n_bars, 1 + len(COLUMNS)): bar epoch seconds, then every Indicators series
+    features/1d/AAPL.json   rows, bar file generation, first/last synced bar and the EMA state after the last two rows
+
+sync() brings a table level with the symbol's ohlcv_store bars. Only rows
+after the last synced bar are computed: rolling features from a LOOKBACK-bar
+window, EMAs continued from the stored numerator/denominator. A last bar that
+ohlcv_store overwrote (an intraday partial bar) is recomputed, and a bar file
+that was rewritten (a longer or re-adjusted history downloaded, seen as a new
+ohlcv_store generation) rebuilds the table. Readers
+get Indicators whose series are read-only memmap views of the table.
+"""
+from trading_config import trading_config
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import fields
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicators import Indicators, compute_indicators, ema_filter, indicators_from_history
+from ohlcv_store import ohlcv_store, period_days
+
+try:
+    import fcntl  # cross-process file locks (Linux/macOS)
+except ImportError:
+    fcntl = None
+
+COLUMNS = tuple(field.name for field in fields(Indicators))
+WIDTH = 1 + len(COLUMNS)
+DTYPE = np.dtype('<f8')
+ROW_BYTES = WIDTH * DTYPE.itemsize
+CLOSE = 1 + COLUMNS.index('close')
+
+LOOKBACK = 200  # bars before the first new row that the longest window (sma_200) needs
+EMA_SPANS = {'ema_12': 12, 'ema_26': 26, 'macd_signal': 9}
+
+EmaState = Dict[str, Optional[List[float]]]  # EMA name -> [numerator, denominator]
+
+def bar_times(hist: pd.DataFrame) -> np.ndarray:
+    """Epoch seconds of each bar"""
+    return hist.index.as_unit('ns').asi8 / 1e9
+
+def as_indicators(rows: np.ndarray) -> Indicators:
+    """Indicators over table rows (column views, no copy)"""
+    return Indicators(**{name: rows[:, 1 + i] for i, name in enumerate(COLUMNS)})
+
+def compute_rows(bars: np.ndarray, start: int = 0,
+                 state: Optional[EmaState] = None) -> Tuple[np.ndarray, EmaState, EmaState]:
+    """Feature rows for bars[start:] of (n, 6) ohlcv_store bars
+
+    `state` is the EMA state as of bars[start - 1] (None when start is 0).
+    Returns (rows, EMA state after the last row, EMA state after the one before it).
+    """
+    first = max(0, start - LOOKBACK)
+    skip = start - first
+    window = bars[first:]
+    ind = compute_indicators(window[:, 2], window[:, 3], window[:, 4], window[:, 5])
+    columns = {name: getattr(ind, name)[skip:] for name in COLUMNS}
+
+    state = state or {}
+    after: EmaState = {}
+    before: EmaState = {}
+
+    def continued(name: str, values: np.ndarray) -> np.ndarray:
+        series, numerator, denominator = ema_filter(values, EMA_SPANS[name], state.get(name))
+        after[name] = [float(numerator[-1]), float(denominator[-1])]
+        before[name] = [float(numerator[-2]), float(denominator[-2])] if len(values) > 1 else state.get(name)
+        return series
+
+    # The window EMAs above start mid-history; continue the stored ones instead
+    columns['ema_12'] = continued('ema_12', columns['close'])
+    columns['ema_26'] = continued('ema_26', columns['close'])
+    columns['macd'] = columns['ema_12'] - columns['ema_26']
+    columns['macd_signal'] = continued('macd_signal', columns['macd'])
+    columns['macd_hist'] = columns['macd'] - columns['macd_signal']
+
+    rows = np.column_stack([bars[start:, 0]] + [columns[name] for name in COLUMNS]).astype(DTYPE, copy=False)
+    return rows, after, before
+
+def stack_features(tables: Sequence[np.ndarray], days: int) -> Tuple[Indicators, np.ndarray]:
+    """Right-align per-symbol table rows into (symbols, days) Indicators
+    (NaN-padded on the left, like cross_section.stack_bars); also returns
+    the number of real rows per symbol"""
+    stacked = np.full((len(tables), days, WIDTH), np.nan)
+    counts = np.zeros(len(tables), dtype=np.int64)
+    for row, rows in enumerate(tables):
+        tail = rows[-days:]
+        counts[row] = len(tail)
+        if len(tail):
+            stacked[row, days - len(tail):] = tail
+    return Indicators(**{name: stacked[:, :, 1 + i] for i, name in enumerate(COLUMNS)}), counts
+
+class FeatureStore:
+    """Per-symbol feature tables derived from the OHLCV store"""
+
+    def __init__(self, root: Optional[str] = None, bars=None):
+        self.root = Path(root or trading_config.FEATURE_STORE_DIR)
+        self.bars = bars or ohlcv_store
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._maps: Dict[Tuple[str, str], Tuple[Tuple[int, int], np.ndarray]] = {}
+        self.syncs = 0
+        self.rebuilds = 0
+        self.computed_rows = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- paths & metadata ----------
+
+    @staticmethod
+    def _key(symbol: str, interval: str) -> Tuple[str, str]:
+        return (symbol.upper(), interval)
+
+    def _paths(self, symbol: str, interval: str) -> Tuple[Path, Path]:
+        safe = symbol.upper().replace('/', '_').replace('^', '_')
+        base = self.root / interval / safe
+        return base.with_suffix('.f64'), base.with_suffix('.json')
+
+    def _load_meta(self, symbol: str, interval: str) -> Optional[Dict]:
+        _, meta_path = self._paths(symbol, interval)
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _atomic_write(path: Path, payload: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @contextmanager
+    def _locked(self, symbol: str, interval: str):
+        """Serialize writers for one key across threads and worker processes"""
+        key = self._key(symbol, interval)
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            data_path, _ = self._paths(symbol, interval)
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(data_path.with_suffix('.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ---------- materialization ----------
+
+    @staticmethod
+    def _is_current(meta: Optional[Dict], bars: np.ndarray, generation: int) -> bool:
+        return bool(meta and meta.get('generation') == generation
+                    and meta['rows'] == len(bars) and meta['first_ts'] == bars[0, 0]
+                    and np.array_equal(meta['last_bar'], bars[-1], equal_nan=True))
+
+    @staticmethod
+    def _resume_point(meta: Optional[Dict], bars: np.ndarray, generation: int) -> Tuple[int, Optional[EmaState]]:
+        """(first bar to compute, EMA state before it); (0, None) rebuilds the table"""
+        if not meta or meta.get('generation') != generation:
+            return 0, None  # the bar file was replaced: every earlier bar may have been re-adjusted
+        if meta['first_ts'] != bars[0, 0] or not 0 < meta['rows'] <= len(bars):
+            return 0, None
+        last = meta['rows'] - 1
+        if bars[last, 0] != meta['last_ts']:
+            return 0, None
+        if np.array_equal(meta['last_bar'], bars[last], equal_nan=True):
+            return last + 1, meta['ema']
+        # The last synced bar was overwritten (partial bar refreshed): redo it
+        return last, meta['ema_before_last']
+
+    def sync(self, symbol: str, interval: str = '1d') -> int:
+        """Compute the rows for bars the table does not hold yet; returns how many"""
+        # Generation first: bars replaced after this read only cost an extra rebuild
+        generation = self.bars.generation(symbol, interval)
+        bars = self.bars.bars(symbol, interval)
+        if not len(bars) or self._is_current(self._load_meta(symbol, interval), bars, generation):
+            return 0
+
+        with self._locked(symbol, interval):
+            meta = self._load_meta(symbol, interval)
+            if self._is_current(meta, bars, generation):
+                return 0
+            start, state = self._resume_point(meta, bars, generation)
+            rows, after, before = compute_rows(bars, start, state)
+
+            data_path, meta_path = self._paths(symbol, interval)
+            if start == 0:
+                self._atomic_write(data_path, rows.tobytes())
+                self.rebuilds += 1
+            else:
+                # Overwrite from `start` on; the file only grows, so open maps stay valid
+                with open(data_path, 'r+b') as f:
+                    f.seek(start * ROW_BYTES)
+                    f.write(rows.tobytes())
+            self._atomic_write(meta_path, json.dumps({
+                'symbol': symbol.upper(),
+                'interval': interval,
+                'generation': int(generation),
+                'rows': int(len(bars)),
+                'first_ts': float(bars[0, 0]),
+                'last_ts': float(bars[-1, 0]),
+                'last_bar': bars[-1].tolist(),
+                'ema': after,
+                'ema_before_last': before,
+                'synced_at': time.time()
+            }).encode())
+
+        self.syncs += 1
+        self.computed_rows += len(rows)
+        return len(rows)
+
+    # ---------- readers ----------
+
+    def table(self, symbol: str, interval: str = '1d') -> np.ndarray:
+        """Every stored row as a read-only (n, WIDTH) memmap (no sync)"""
+        key = self._key(symbol, interval)
+        data_path, _ = self._paths(symbol, interval)
+        try:
+            stat = data_path.stat()
+        except FileNotFoundError:
+            return np.empty((0, WIDTH), dtype=DTYPE)
+
+        # A rebuild replaces the file (new inode); appends only grow it
+        identity = (stat.st_ino, stat.st_size)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        n = stat.st_size // ROW_BYTES
+        if not n:
+            return np.empty((0, WIDTH), dtype=DTYPE)
+
+        mapped = np.memmap(data_path, dtype=DTYPE, mode='r', shape=(n, WIDTH))
+        self._maps[key] = (identity, mapped)
+        return mapped
+
+    def _lookup(self, symbol: str, times: np.ndarray, close: float, interval: str) -> Optional[np.ndarray]:
+        table = self.table(symbol, interval)
+        start = int(np.searchsorted(table[:, 0], times[0]))
+        end = start + len(times)
+        if end > len(table) or table[start, 0] != times[0] or table[end - 1, 0] != times[-1]:
+            return None
+        if table[end - 1, CLOSE] != close:
+            return None
+        return table[start:end]
+
+    def rows(self, symbol: str, times: np.ndarray, close: float, interval: str = '1d') -> Optional[np.ndarray]:
+        """Table rows for exactly the bars at `times` (ascending epoch seconds,
+        the last one closing at `close`), syncing first if the table is behind;
+        None if the store does not hold these bars"""
+        if not len(times):
+            return None
+        rows = self._lookup(symbol, times, close, interval)
+        if rows is None:
+            self.sync(symbol, interval)
+            rows = self._lookup(symbol, times, close, interval)
+        if rows is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return rows
+
+    def indicators(self, symbol: str, hist: pd.DataFrame, interval: str = '1d') -> Indicators:
+        """Indicators for the bars of `hist`: stored rows when the store holds
+        them, computed directly otherwise (history that did not come from ohlcv_store)"""
+        if not hist.empty:
+            rows = self.rows(symbol, bar_times(hist), float(hist['Close'].iloc[-1]), interval)
+            if rows is not None:
+                return as_indicators(rows)
+        return indicators_from_history(hist)
+
+    def get_rows(self, symbol: str, period: str = '1y', interval: str = '1d') -> np.ndarray:
+        """Rows covering `period` back from the latest stored bar (syncs, no network)"""
+        self.sync(symbol, interval)
+        table = self.table(symbol, interval)
+        if not len(table):
+            return table
+        cutoff = table[-1, 0] - period_days(period) * 86400
+        return table[int(np.searchsorted(table[:, 0], cutoff, side='right')):]
+
+    def get_indicators(self, symbol: str, period: str = '1y', interval: str = '1d') -> Tuple[Indicators, np.ndarray]:
+        """(indicators, bar epoch seconds) covering `period` of stored history"""
+        rows = self.get_rows(symbol, period, interval)
+        return as_indicators(rows), rows[:, 0]
+
+    def stats(self) -> Dict:
+        return {
+            'root': str(self.root),
+            'open_maps': len(self._maps),
+            'syncs': self.syncs,
+            'rebuilds': self.rebuilds,
+            'computed_rows': self.computed_rows,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+feature_store = FeatureStore()
@@ -0,0 +1,296 @@
+"""Fundamentals Cache - Ticker.info fields with daily TTLs, refreshed in the background
+
+yf.Ticker(symbol).info is the slowest call behind analyze_stock and
+AdvancedTradingEngine (often over a second), yet the fields they read
+(P/E, P/B, ROE, beta, margins, 52-week range, name) change at most daily.
+Only the fields in SCHEMA are kept, each cast to its type and stamped with
+its own fetch time; the table is persisted to FUNDAMENTALS_CACHE_PATH.
+
+get() never calls the provider while the refresher runs: it returns what
+is cached (fields older than FUNDAMENTALS_MAX_STALENESS are dropped) and
+queues the symbol when it is unknown or a field is past its TTL. Every
+symbol ever asked for joins the tracked universe (plus FUNDAMENTALS_SYMBOLS),
+which the background task walks every FUNDAMENTALS_REFRESH_INTERVAL seconds,
+refreshing due symbols at background priority on the Yahoo budget.
+Without a running refresher (scripts) get() fetches missing symbols inline.
+"""
+from trading_config import trading_config
+from market_journal import market_journal
+from rate_limiter import rate_limiter, Priority
+import yfinance as yf
+import asyncio
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ticker.info key -> (type, TTL class); 'daily' fields live FUNDAMENTALS_TTL seconds,
+# 'static' ones FUNDAMENTALS_STATIC_TTL
+SCHEMA: Dict[str, Tuple[Callable[[Any], Any], str]] = {
+    'longName': (str, 'static'),
+    'currency': (str, 'static'),
+    'marketCap': (float, 'daily'),
+    'trailingPE': (float, 'daily'),
+    'priceToBook': (float, 'daily'),
+    'debtToEquity': (float, 'daily'),
+    'returnOnEquity': (float, 'daily'),
+    'profitMargins': (float, 'daily'),
+    'dividendYield': (float, 'daily'),
+    'beta': (float, 'static'),
+    'fiftyTwoWeekHigh': (float, 'daily'),
+    'fiftyTwoWeekLow': (float, 'daily'),
+}
+
+def _cast(value: Any, kind: Callable[[Any], Any]) -> Optional[Any]:
+    """Schema type of a raw .info value, None for missing / non-finite values"""
+    if value is None or value == '':
+        return None
+    try:
+        value = kind(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+class FundamentalsCache:
+    """SYMBOL -> {field: (value, fetched_at)} for the fields in SCHEMA"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or trading_config.FUNDAMENTALS_CACHE_PATH)
+        self.ttls = {
+            'daily': trading_config.FUNDAMENTALS_TTL,
+            'static': trading_config.FUNDAMENTALS_STATIC_TTL
+        }
+        self.max_staleness = trading_config.FUNDAMENTALS_MAX_STALENESS
+        self.refresh_interval = trading_config.FUNDAMENTALS_REFRESH_INTERVAL
+        self.retry_seconds = trading_config.FUNDAMENTALS_RETRY_SECONDS
+        self.batch_size = trading_config.FUNDAMENTALS_BATCH_SIZE
+        self._fields: Dict[str, Dict[str, Tuple[Any, float]]] = {}
+        self._attempted: Dict[str, float] = {}  # SYMBOL -> last fetch attempt (epoch seconds)
+        self._tracked = {s.strip().upper() for s in trading_config.FUNDAMENTALS_SYMBOLS.split(',') if s.strip()}
+        self._wanted: Dict[str, None] = {}  # queued by get(), refreshed first (insertion order)
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.inline_fetches = 0
+        self.fetches = 0
+        self.fetch_failures = 0
+        self.refresh_passes = 0
+
+    # ---------- lookups ----------
+
+    def _ttl(self, field: str) -> float:
+        return self.ttls[SCHEMA[field][1]]
+
+    def _is_due(self, symbol: str, now: float) -> bool:
+        """Unknown or holding a field past its TTL, and not attempted in the last retry window
+        (fields the provider does not report for a symbol are retried with the daily ones)"""
+        if now - self._attempted.get(symbol, 0.0) < self.retry_seconds:
+            return False
+        fields = self._fields.get(symbol)
+        if not fields:
+            return True
+        return any(now - fetched_at > self._ttl(field) for field, (_, fetched_at) in fields.items())
+
+    def get(self, symbol: str) -> Dict[str, Any]:
+        """Cached fundamentals as a Ticker.info-style dict ({} if nothing is known yet)"""
+        key = symbol.upper()
+        now = time.time()
+        self._tracked.add(key)
+        if self._is_due(key, now):
+            if self._task is None:
+                self.inline_fetches += 1
+                self._store(key, self._fetch(key))
+            else:
+                self._queue(key)
+
+        fields = self._fields.get(key, {})
+        info = {field: value for field, (value, fetched_at) in fields.items() if now - fetched_at <= self.max_staleness}
+        if not info:
+            self.misses += 1
+        elif len(info) < len(fields) or key in self._wanted:
+            self.stale += 1
+        else:
+            self.hits += 1
+        return info
+
+    def version(self, symbol: str) -> float:
+        """When the symbol's newest field was fetched (0 if never); part of analysis cache keys"""
+        fields = self._fields.get(symbol.upper())
+        return max((fetched_at for _, fetched_at in fields.values()), default=0.0) if fields else 0.0
+
+    def _queue(self, symbol: str):
+        self._wanted[symbol] = None
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # ---------- fetching ----------
+
+    @staticmethod
+    def _fetch(symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            return market_journal.call_sync('yfinance', 'info', {'symbol': symbol}, lambda: yf.Ticker(symbol).info)
+        except Exception as e:
+            logger.warning(f"Fundamentals fetch failed for {symbol}: {e}")
+            return None
+
+    def _store(self, symbol: str, info: Optional[Dict[str, Any]]):
+        """Merge a fresh .info payload; fields it lacks keep their previous values"""
+        now = time.time()
+        self._attempted[symbol] = now
+        self.fetches += 1
+        if not info:
+            self.fetch_failures += 1
+            return
+        fields = self._fields.setdefault(symbol, {})
+        for field, (kind, _) in SCHEMA.items():
+            value = _cast(info.get(field), kind)
+            if value is not None:
+                fields[field] = (value, now)
+        self._dirty = True
+
+    def due(self) -> List[str]:
+        """Symbols to refresh, queued ones first, then the least recently attempted"""
+        now = time.time()
+        for symbol in [s for s in self._wanted if not self._is_due(s, now)]:
+            del self._wanted[symbol]  # attempted meanwhile
+        wanted = list(self._wanted)
+        rest = sorted((s for s in self._tracked if s not in self._wanted and self._is_due(s, now)),
+                      key=lambda s: self._attempted.get(s, 0.0))
+        return wanted + rest
+
+    async def refresh_due(self) -> int:
+        """One background pass over the tracked universe; returns how many symbols were fetched"""
+        self.refresh_passes += 1
+        fetched = 0
+        for symbol in self.due()[:self.batch_size]:
+            if not await rate_limiter.acquire('yahoo', Priority.BACKGROUND, max_wait=60):
+                break  # budget is busy with interactive calls, try next pass
+            self._store(symbol, await asyncio.to_thread(self._fetch, symbol))
+            self._wanted.pop(symbol, None)
+            fetched += 1
+        await self.snapshot()
+        return fetched
+
+    # ---------- persistence ----------
+
+    def load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt fundamentals cache {self.path}: {e}")
+            return False
+
+        for symbol, record in data.get('symbols', {}).items():
+            fields = {field: (value, fetched_at) for field, (value, fetched_at) in record.get('fields', {}).items()
+                      if field in SCHEMA}
+            if fields:
+                self._fields[symbol] = fields
+            self._attempted[symbol] = record.get('attempted_at', 0.0)
+            self._tracked.add(symbol)
+        logger.info(f"Loaded fundamentals for {len(self._fields)} symbols")
+        return True
+
+    def save(self, symbols: Optional[Dict] = None):
+        if symbols is None:
+            symbols = self._records()
+        payload = json.dumps({'saved_at': time.time(), 'symbols': symbols}, separators=(',', ':'))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _records(self) -> Dict[str, Dict]:
+        return {
+            symbol: {
+                'fields': {field: list(entry) for field, entry in self._fields.get(symbol, {}).items()},
+                'attempted_at': self._attempted.get(symbol, 0.0)
+            }
+            for symbol in self._tracked
+        }
+
+    async def snapshot(self):
+        """Write the table if it changed since the last snapshot"""
+        if self._dirty:
+            records = self._records()  # copied on the event loop, written in a thread
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self.save, records)
+            except Exception as e:
+                self._dirty = True
+                logger.warning(f"Fundamentals snapshot failed: {e}")
+
+    # ---------- lifecycle ----------
+
+    async def _run(self):
+        while True:
+            try:
+                fetched = await self.refresh_due()
+                if fetched:
+                    logger.info(f"Refreshed fundamentals for {fetched} symbols")
+            except Exception as e:
+                logger.warning(f"Fundamentals refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        """Load from disk and schedule background refreshes (FastAPI startup)"""
+        self.load()
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._dirty:
+            self.save()
+            self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale + self.misses
+        return {
+            'symbols': len(self._fields),
+            'tracked': len(self._tracked),
+            'queued': len(self._wanted),
+            'due': len(self.due()),
+            'ttl_seconds': dict(self.ttls),
+            'hits': self.hits,
+            'stale': self.stale,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'inline_fetches': self.inline_fetches,
+            'fetches': self.fetches,
+            'fetch_failures': self.fetch_failures,
+            'refresh_passes': self.refresh_passes
+        }
+
+fundamentals_cache = FundamentalsCache()
@@ -0,0 +1,88 @@
+"""Shared Async HTTP Client - pooled keep-alive connections for market data providers"""
+import httpx
+from trading_config import trading_config
+from market_journal import market_journal, encode_response, decode_response
+import asyncio
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support for httpx is optional)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HTTPClientService:
+    """Owns one httpx.AsyncClient for the whole app (started/stopped with FastAPI)"""
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.http2 = trading_config.HTTP2_ENABLED and HTTP2_AVAILABLE
+        self.per_host_limit = trading_config.HTTP_MAX_CONNECTIONS_PER_HOST
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        timeout = httpx.Timeout(
+            trading_config.HTTP_TIMEOUT,
+            connect=trading_config.HTTP_CONNECT_TIMEOUT
+        )
+        limits = httpx.Limits(
+            max_connections=trading_config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=trading_config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=trading_config.HTTP_KEEPALIVE_EXPIRY
+        )
+        return httpx.AsyncClient(
+            timeout=timeout,
+            limits=limits,
+            http2=self.http2,
+            headers={'Accept': 'application/json'},
+            follow_redirects=True
+        )
+
+    async def start(self):
+        """Open the connection pool (FastAPI startup)"""
+        if self.client is None or self.client.is_closed:
+            self.client = self._build_client()
+            logger.info(f"HTTP client started (http2={self.http2}, per-host limit={self.per_host_limit})")
+
+    async def close(self):
+        """Close the connection pool (FastAPI shutdown)"""
+        if self.client is not None and not self.client.is_closed:
+            await self.client.aclose()
+            logger.info("HTTP client closed")
+        self.client = None
+        self._host_slots = {}
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.per_host_limit)
+            self._host_slots[host] = slot
+        return slot
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool, capped per host"""
+        if self.client is None or self.client.is_closed:
+            # Used outside the app lifecycle (scripts, tests) - open lazily
+            await self.start()
+
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+
+        async with self._host_slot(url):
+            return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, params: Optional[Dict] = None, timeout: Optional[float] = None,
+                  **kwargs) -> httpx.Response:
+        """GET through the shared pool (recorded/replayed by the market journal)"""
+        return await market_journal.call(
+            'http', 'GET', {'url': url, 'params': params},
+            lambda: self.request('GET', url, params=params, timeout=timeout, **kwargs),
+            encode=encode_response, decode=decode_response
+        )
+
+http_client = HTTPClientService()
@@ -0,0 +1,211 @@
+"""Vectorized Indicator Library - every technical series both analysis engines use
+
+One compute_indicators() call turns contiguous float64 OHLCV arrays into the
+full indicator set (SMA, Bollinger, RSI, MACD, ATR, volume average/ratio, returns)
+so analyze_stock and AdvancedTradingEngine stop recomputing the same pandas
+rolling/ewm series several times per request. Values match the pandas
+definitions they replace: rolling means/stds (ddof=1) with NaN until the
+window is full, ewm(span=..., adjust=True) for EMAs, and the simple
+rolling-mean RSI.
+
+The series functions work along the last axis, so the same code scores a
+whole universe laid out as a (symbols x days) matrix (see cross_section.py).
+
+Benchmark against the pandas path with `python bench_indicators.py`.
+"""
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+TRADING_DAYS = 252
+
+def _as_array(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean, NaN for the first window-1 points (pandas rolling(window).mean())"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(values, window, axis=-1).mean(axis=-1)
+    return out
+
+def rolling_std(values: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Rolling sample standard deviation (pandas rolling(window).std())"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(values, window, axis=-1).std(axis=-1, ddof=ddof)
+    return out
+
+def ema_filter(values: np.ndarray, span: int,
+               state: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ema() plus its running numerator and denominator
+
+    state=(numerator, denominator) as of the value before values[0] continues
+    an earlier run, so EMAs can be extended bar by bar without the history.
+    """
+    decay = 1.0 - 2.0 / (span + 1.0)
+    valid = ~np.isnan(values)
+    terms = (np.where(valid, values, 0.0), valid.astype(np.float64))
+    if state is None:
+        numerator, denominator = (lfilter([1.0], [1.0, -decay], x, axis=-1) for x in terms)
+    else:
+        numerator, denominator = (lfilter([1.0], [1.0, -decay], x, axis=-1, zi=[decay * carried])[0]
+                                  for x, carried in zip(terms, state))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return numerator / denominator, numerator, denominator
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential mean with pandas ewm(span=span, adjust=True) weighting
+
+    y_t = sum((1-a)^i * x_{t-i}) / sum((1-a)^i), evaluated as two first-order
+    IIR filters so the recursion runs in C. NaNs carry no weight (NaN until
+    the first value, like pandas).
+    """
+    if not values.shape[-1]:
+        return np.empty(values.shape)
+    return ema_filter(values, span)[0]
+
+def pct_change(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """values[t] / values[t-periods] - 1, NaN where there is no earlier value"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] > periods:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[..., periods:] = values[..., periods:] / values[..., :-periods] - 1.0
+    return out
+
+def _shifted(values: np.ndarray) -> np.ndarray:
+    """values[t-1] along the last axis, NaN at t=0"""
+    out = np.full(values.shape, np.nan)
+    out[..., 1:] = values[..., :-1]
+    return out
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Simple-average RSI (rolling means of gains and losses, like the old _calculate_rsi)"""
+    delta = close - _shifted(close)
+    gain = sma(np.where(delta > 0, delta, 0.0), period)
+    loss = sma(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+def wilder_rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder RSI: seeded with the simple average of the first `period` moves,
+    then smoothed with avg = avg + (move - avg) / period"""
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    delta = np.diff(close)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    alpha = 1.0 / period
+    averages = []
+    for moves in (gains, losses):
+        seed = moves[:period].mean()
+        smoothed, _ = lfilter([alpha], [1.0, alpha - 1.0], moves[period:], zi=[(1.0 - alpha) * seed])
+        averages.append(np.concatenate(([seed], smoothed)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[period:] = 100.0 - 100.0 / (1.0 + averages[0] / averages[1])
+    return out
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    previous = _shifted(close)
+    # fmax skips the NaN previous close on the first bar, like pandas max(axis=1)
+    return np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+
+@dataclass
+class Indicators:
+    """Full-length indicator series (index-aligned with the input bars)"""
+    close: np.ndarray
+    volume: np.ndarray
+    returns: np.ndarray
+    sma_5: np.ndarray
+    sma_20: np.ndarray
+    sma_50: np.ndarray
+    sma_200: np.ndarray
+    std_20: np.ndarray
+    bb_upper: np.ndarray
+    bb_lower: np.ndarray
+    rsi_14: np.ndarray
+    ema_12: np.ndarray
+    ema_26: np.ndarray
+    macd: np.ndarray
+    macd_signal: np.ndarray
+    macd_hist: np.ndarray
+    volume_sma_20: np.ndarray
+    volume_ratio: np.ndarray
+    atr_14: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @property
+    def price(self) -> float:
+        return float(self.close[-1])
+
+    def change_percent(self, periods: int) -> float:
+        """Percent change over the last `periods` bars (NaN if the history is too short)"""
+        if len(self.close) <= periods:
+            return float('nan')
+        return float((self.close[-1] / self.close[-1 - periods] - 1.0) * 100)
+
+    def volatility(self) -> float:
+        """Annualized volatility of daily returns, percent"""
+        returns = self.returns[1:]
+        if len(returns) < 2:
+            return float('nan')
+        return float(np.nanstd(returns, ddof=1) * np.sqrt(TRADING_DAYS) * 100)
+
+    def max_drawdown(self) -> float:
+        """Largest peak-to-trough fall of the close, percent (<= 0)"""
+        if len(self.close) < 2:
+            return float('nan')
+        growth = self.close / self.close[0]
+        return float(np.min(growth / np.maximum.accumulate(growth) - 1.0) * 100)
+
+def compute_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       volume: np.ndarray) -> Indicators:
+    """Compute every indicator in one pass over float64 arrays"""
+    high, low, close, volume = (_as_array(a) for a in (high, low, close, volume))
+
+    sma_20 = sma(close, 20)
+    std_20 = rolling_std(close, 20)
+    ema_12 = ema(close, 12)
+    ema_26 = ema(close, 26)
+    macd = ema_12 - ema_26
+    macd_signal = ema(macd, 9)
+    volume_sma_20 = sma(volume, 20)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ratio = volume / volume_sma_20
+
+    return Indicators(
+        close=close,
+        volume=volume,
+        returns=pct_change(close, 1),
+        sma_5=sma(close, 5),
+        sma_20=sma_20,
+        sma_50=sma(close, 50),
+        sma_200=sma(close, 200),
+        std_20=std_20,
+        bb_upper=sma_20 + 2 * std_20,
+        bb_lower=sma_20 - 2 * std_20,
+        rsi_14=rsi(close, 14),
+        ema_12=ema_12,
+        ema_26=ema_26,
+        macd=macd,
+        macd_signal=macd_signal,
+        macd_hist=macd - macd_signal,
+        volume_sma_20=volume_sma_20,
+        volume_ratio=volume_ratio,
+        atr_14=sma(true_range(high, low, close), 14)
+    )
+
+def indicators_from_history(hist: pd.DataFrame) -> Indicators:
+    """compute_indicators() for a yfinance-style OHLCV frame"""
+    return compute_indicators(
+        hist['High'].to_numpy(),
+        hist['Low'].to_numpy(),
+        hist['Close'].to_numpy(),
+        hist['Volume'].to_numpy()
+    )
@@ -0,0 +1,148 @@
+"""Last-Known-Good Prices - the most recent real quote per symbol, persisted to disk
+
+Every successful live fetch updates the table; when all providers fail the
+fallback path serves the real last price with its age instead of a hardcoded
+number. The table is snapshotted periodically (atomic write) and reloaded at
+startup, so a restart during a rate-limit window still has prices.
+"""
+from trading_config import trading_config
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LastKnownPriceStore:
+    """(asset_type, SYMBOL) -> (price, source, fetched_at epoch seconds)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or trading_config.LAST_KNOWN_PRICES_PATH)
+        self.snapshot_interval = trading_config.LAST_KNOWN_SNAPSHOT_INTERVAL
+        self.default_max_age = trading_config.LAST_KNOWN_PRICE_MAX_AGE
+        self._prices: Dict[Tuple[str, str], Tuple[float, str, float]] = {}
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self.updates = 0
+        self.served = 0
+        self.too_old = 0
+        self.unknown = 0
+        self.snapshots = 0
+
+    # ---------- updates / lookups ----------
+
+    def record(self, symbol: str, asset_type: str, price: float, source: str = '',
+               fetched_at: Optional[float] = None):
+        """Remember a real quote (ignores empty/zero prices)"""
+        if not price:
+            return
+        self._prices[(asset_type, symbol.upper())] = (float(price), source, fetched_at or time.time())
+        self._dirty = True
+        self.updates += 1
+
+    def get(self, symbol: str, asset_type: str = 'crypto', max_age: Optional[float] = None) -> Optional[Dict]:
+        """Last real price with its age, or None if unknown or older than max_age seconds"""
+        entry = self._prices.get((asset_type, symbol.upper()))
+        if entry is None:
+            self.unknown += 1
+            return None
+        price, source, fetched_at = entry
+        age = time.time() - fetched_at
+        if age > (self.default_max_age if max_age is None else max_age):
+            self.too_old += 1
+            return None
+        self.served += 1
+        return {
+            'symbol': symbol.upper(),
+            'price': price,
+            'source': source,
+            'as_of': datetime.fromtimestamp(fetched_at, timezone.utc).isoformat(),
+            'age_seconds': round(age, 1)
+        }
+
+    # ---------- persistence ----------
+
+    def load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt price snapshot {self.path}: {e}")
+            return False
+
+        for key, (price, source, fetched_at) in data.get('prices', {}).items():
+            asset_type, _, symbol = key.partition(':')
+            current = self._prices.get((asset_type, symbol))
+            if current is None or current[2] < fetched_at:
+                self._prices[(asset_type, symbol)] = (price, source, fetched_at)
+        logger.info(f"Loaded {len(self._prices)} last-known prices")
+        return True
+
+    def save(self):
+        payload = json.dumps({
+            'saved_at': time.time(),
+            'prices': {f"{asset_type}:{symbol}": list(entry) for (asset_type, symbol), entry in self._prices.items()}
+        }, separators=(',', ':'))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._dirty = False
+        self.snapshots += 1
+
+    async def snapshot(self):
+        """Write the table if it changed since the last snapshot"""
+        if self._dirty:
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                logger.warning(f"Price snapshot failed: {e}")
+
+    # ---------- lifecycle ----------
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            await self.snapshot()
+
+    def start(self):
+        """Load the last snapshot and schedule periodic ones (FastAPI startup)"""
+        self.load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._dirty:
+            self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'symbols': len(self._prices),
+            'max_age_seconds': self.default_max_age,
+            'updates': self.updates,
+            'served': self.served,
+            'too_old': self.too_old,
+            'unknown': self.unknown,
+            'snapshots': self.snapshots
+        }
+
+last_known_prices = LastKnownPriceStore()
@@ -3,12 +3,41 @@ import yfinance as yf
 from alpha_vantage.timeseries import TimeSeries
 from trading_config import trading_config
 import logging
-from typing import Dict, List, Optional
+import asyncio
+import pandas as pd
+from typing import Awaitable, Callable, Dict, List, Optional
 from datetime import datetime
-import requests
+from http_client import http_client
+from price_cache import PriceCache
+from price_refresher import PriceRefresher
+from rate_limiter import rate_limiter, Priority
+from swr_cache import StaleWhileRevalidateCache, CachedValue
+from coin_index import CoinIdIndex
+from binance_service import binance_service
+from coinbase_service import coinbase_service
+from ticker_stream import ticker_stream
+from last_known_prices import last_known_prices
+from simple_market_data import get_fallback_price
+from market_journal import market_journal, encode_frame, decode_frame
+import statistics
+import time
+import httpx
 
 logger = logging.getLogger(__name__)
 
+# Pinned CoinGecko IDs for common symbols (take precedence over the index)
+COINGECKO_IDS = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'BNB': 'binancecoin',
+    'USDT': 'tether',
+    'USDC': 'usd-coin',
+    'XRP': 'ripple',
+    'ADA': 'cardano',
+    'SOL': 'solana',
+    'DOGE': 'dogecoin'
+}
+
 class MarketDataService:
     """Aggregates market data from multiple free sources"""
     
@@ -17,68 +46,136 @@ class MarketDataService:
         self.alpha_vantage = None
         if trading_config.ALPHA_VANTAGE_KEY:
             self.alpha_vantage = TimeSeries(key=trading_config.ALPHA_VANTAGE_KEY, output_format='json')
+        self.coin_index = CoinIdIndex(self.coingecko_api_url, overrides=COINGECKO_IDS)
+        self.price_cache = PriceCache()
+        self.refresher = PriceRefresher(self._refresh_prices)
+        self.summary_cache = StaleWhileRevalidateCache(
+            'market_summary',
+            trading_config.MARKET_SUMMARY_FRESH_TTL,
+            trading_config.MARKET_SUMMARY_MAX_STALENESS
+        )
+        self.trending_cache = StaleWhileRevalidateCache(
+            'trending',
+            trading_config.TRENDING_FRESH_TTL,
+            trading_config.TRENDING_MAX_STALENESS
+        )
+    
+    def _coingecko_id(self, symbol: str) -> Optional[str]:
+        """Resolve via the coin index (None = known not to exist on CoinGecko)"""
+        return self.coin_index.resolve(symbol)
+    
+    @staticmethod
+    def _format_coingecko_quote(symbol: str, quote: Dict) -> Dict:
+        return {
+            'symbol': symbol.upper(),
+            'price': quote['usd'],
+            'market_cap': quote.get('usd_market_cap', 0),
+            'volume_24h': quote.get('usd_24h_vol', 0),
+            'change_24h': quote.get('usd_24h_change', 0),
+            'source': 'CoinGecko',
+            'timestamp': datetime.utcnow().isoformat()
+        }
     
-    async def get_crypto_price_coingecko(self, symbol: str) -> Optional[Dict]:
+    async def _coingecko_simple_price(self, coin_ids: List[str],
+                                      priority: Priority = Priority.INTERACTIVE) -> Optional[Dict]:
+        """One /simple/price round-trip for a list of coin ids (None on failure)"""
+        if not await rate_limiter.acquire('coingecko', priority):
+            return None
+        
+        url = f"{self.coingecko_api_url}/simple/price"
+        params = {
+            'ids': ','.join(coin_ids),
+            'vs_currencies': 'usd',
+            'include_market_cap': 'true',
+            'include_24hr_vol': 'true',
+            'include_24hr_change': 'true'
+        }
+        
+        response = await http_client.get(url, params=params)
+        
+        # Check for rate limit
+        if response.status_code == 429:
+            logger.warning(f"CoinGecko rate limited - using fallback")
+            rate_limiter.penalize('coingecko', self._retry_after(response))
+            return None
+            
+        response.raise_for_status()
+        return response.json()
+    
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        try:
+            return float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            return None
+    
+    async def get_crypto_price_coingecko(self, symbol: str, priority: Priority = Priority.INTERACTIVE) -> Optional[Dict]:
         """Get crypto price from CoinGecko (Free tier) - Direct API"""
         try:
-            # Map common symbols to CoinGecko IDs
-            symbol_map = {
-                'BTC': 'bitcoin',
-                'ETH': 'ethereum',
-                'BNB': 'binancecoin',
-                'USDT': 'tether',
-                'USDC': 'usd-coin',
-                'XRP': 'ripple',
-                'ADA': 'cardano',
-                'SOL': 'solana',
-                'DOGE': 'dogecoin'
-            }
-            
-            coin_id = symbol_map.get(symbol.upper(), symbol.lower())
-            
-            # Direct API call
-            url = f"{self.coingecko_api_url}/simple/price"
-            params = {
-                'ids': coin_id,
-                'vs_currencies': 'usd',
-                'include_market_cap': 'true',
-                'include_24hr_vol': 'true',
-                'include_24hr_change': 'true'
-            }
-            
-            response = requests.get(url, params=params, timeout=5)
-            
-            # Check for rate limit
-            if response.status_code == 429:
-                logger.warning(f"CoinGecko rate limited - using Yahoo Finance fallback")
+            coin_id = self._coingecko_id(symbol)
+            if not coin_id:
                 return None
-                
-            response.raise_for_status()
-            data = response.json()
+            data = await self._coingecko_simple_price([coin_id], priority)
             
-            if coin_id in data:
-                return {
-                    'symbol': symbol.upper(),
-                    'price': data[coin_id]['usd'],
-                    'market_cap': data[coin_id].get('usd_market_cap', 0),
-                    'volume_24h': data[coin_id].get('usd_24h_vol', 0),
-                    'change_24h': data[coin_id].get('usd_24h_change', 0),
-                    'source': 'CoinGecko',
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-        except requests.Timeout:
+            if data is not None and coin_id not in data:
+                self.coin_index.mark_unknown(symbol)
+            elif data:
+                return self._format_coingecko_quote(symbol, data[coin_id])
+        except httpx.TimeoutException:
             logger.warning(f"CoinGecko timeout for {symbol} - trying fallback")
         except Exception as e:
             logger.warning(f"CoinGecko error for {symbol}: {e} - trying fallback")
         return None
     
-    async def get_stock_price_alphavantage(self, symbol: str) -> Optional[Dict]:
+    async def get_crypto_prices_coingecko(self, symbols: List[str],
+                                          priority: Priority = Priority.INTERACTIVE) -> Dict[str, Dict]:
+        """Get many crypto prices from CoinGecko, packing ids into as few calls as allowed"""
+        ids_by_symbol = {symbol: self._coingecko_id(symbol) for symbol in symbols}
+        ids_by_symbol = {symbol: coin_id for symbol, coin_id in ids_by_symbol.items() if coin_id}
+        coin_ids = list(dict.fromkeys(ids_by_symbol.values()))
+        batch_size = trading_config.COINGECKO_BATCH_SIZE
+        chunks = [coin_ids[i:i + batch_size] for i in range(0, len(coin_ids), batch_size)]
+        
+        responses = await asyncio.gather(
+            *(self._coingecko_simple_price(chunk, priority) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        quotes = {}
+        answered = set()
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, httpx.TimeoutException):
+                logger.warning(f"CoinGecko timeout for {len(chunk)} ids - trying fallback")
+            elif isinstance(response, Exception):
+                logger.warning(f"CoinGecko batch error: {response} - trying fallback")
+            elif response is not None:
+                quotes.update(response)
+                answered.update(chunk)
+        
+        for symbol, coin_id in ids_by_symbol.items():
+            if coin_id in answered and coin_id not in quotes:
+                self.coin_index.mark_unknown(symbol)
+        
+        return {
+            symbol: self._format_coingecko_quote(symbol, quotes[coin_id])
+            for symbol, coin_id in ids_by_symbol.items()
+            if coin_id in quotes
+        }
+    
+    async def get_stock_price_alphavantage(self, symbol: str, priority: Priority = Priority.INTERACTIVE) -> Optional[Dict]:
         """Get stock price from Alpha Vantage (Free 25 calls/day)"""
         if not self.alpha_vantage:
             return None
         
+        if not await rate_limiter.acquire('alphavantage', priority):
+            return None
+        
         try:
-            data, meta = self.alpha_vantage.get_quote_endpoint(symbol=symbol)
+            data, meta = await market_journal.call(
+                'alphavantage', 'quote', {'symbol': symbol.upper()},
+                lambda: asyncio.to_thread(self.alpha_vantage.get_quote_endpoint, symbol=symbol),
+                decode=tuple
+            )
             
             if data:
                 return {
@@ -97,11 +194,18 @@ class MarketDataService:
             logger.error(f"Alpha Vantage error for {symbol}: {e}")
         return None
     
-    async def get_stock_price_yahoo(self, symbol: str) -> Optional[Dict]:
+    async def get_stock_price_yahoo(self, symbol: str, priority: Priority = Priority.INTERACTIVE) -> Optional[Dict]:
         """Get stock price from Yahoo Finance (Free, unofficial)"""
+        if not await rate_limiter.acquire('yahoo', priority):
+            return None
+        
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.history(period='1d')
+            info = await asyncio.to_thread(
+                market_journal.call_sync,
+                'yfinance', 'history', {'symbol': symbol.upper(), 'period': '1d'},
+                lambda: yf.Ticker(symbol).history(period='1d'),
+                encode=encode_frame, decode=decode_frame
+            )
             
             if not info.empty:
                 latest = info.iloc[-1]
@@ -111,7 +215,7 @@ class MarketDataService:
                     'open': float(latest['Open']),
                     'high': float(latest['High']),
                     'low': float(latest['Low']),
-                    'volume': int(latest['Volume']),
+                    'volume': int(latest['Volume']) if pd.notna(latest['Volume']) else 0,
                     'source': 'Yahoo Finance',
                     'timestamp': datetime.utcnow().isoformat()
                 }
@@ -119,14 +223,97 @@ class MarketDataService:
             logger.error(f"Yahoo Finance error for {symbol}: {e}")
         return None
     
-    async def get_aggregated_price(self, symbol: str, asset_type: str = 'crypto') -> Dict:
-        """Get price from multiple sources and aggregate"""
+    async def get_stock_prices_yahoo(self, symbols: List[str],
+                                     priority: Priority = Priority.INTERACTIVE) -> Dict[str, Dict]:
+        """Get many stock prices with one yfinance multi-ticker download"""
+        if not await rate_limiter.acquire('yahoo', priority):
+            return {}
+        
+        try:
+            tickers = ' '.join(symbols)
+            data = await asyncio.to_thread(
+                market_journal.call_sync,
+                'yfinance', 'download', {'tickers': tickers, 'period': '5d'},
+                lambda: yf.download(
+                    tickers=tickers,
+                    period='5d',
+                    group_by='ticker',
+                    threads=True,
+                    progress=False,
+                    auto_adjust=False
+                ),
+                encode=encode_frame, decode=decode_frame
+            )
+        except Exception as e:
+            logger.error(f"Yahoo Finance batch error: {e}")
+            return {}
+        
+        if data is None or data.empty:
+            return {}
+        
+        prices = {}
+        for symbol in symbols:
+            try:
+                frame = data[symbol.upper()] if isinstance(data.columns, pd.MultiIndex) else data
+                frame = frame.dropna(subset=['Close'])
+                if frame.empty:
+                    continue
+                latest = frame.iloc[-1]
+                prices[symbol] = {
+                    'symbol': symbol.upper(),
+                    'price': float(latest['Close']),
+                    'open': float(latest['Open']),
+                    'high': float(latest['High']),
+                    'low': float(latest['Low']),
+                    'volume': int(latest['Volume']) if pd.notna(latest['Volume']) else 0,
+                    'source': 'Yahoo Finance',
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+            except (KeyError, ValueError):
+                continue
+        return prices
+    
+    async def get_aggregated_price(self, symbol: str, asset_type: str = 'crypto',
+                                   priority: Priority = Priority.INTERACTIVE) -> Dict:
+        """Get price from multiple sources and aggregate (cached, single-flight)"""
+        self.refresher.touch(symbol, asset_type)
+        snapshot = self.refresher.get(symbol, asset_type)
+        if snapshot:
+            return snapshot
+        
+        return await self.price_cache.get_or_fetch(
+            symbol,
+            asset_type,
+            lambda: self._fetch_aggregated_price(symbol, asset_type, priority),
+            cacheable=self._is_live_price
+        )
+    
+    @staticmethod
+    def _is_live_price(aggregated: Dict) -> bool:
+        """Only cache real quotes - fallback data should be retried on the next call"""
+        return any(not source.get('is_fallback') for source in aggregated.get('sources', []))
+    
+    def _remember(self, symbol: str, asset_type: str, aggregated: Dict) -> Dict:
+        """Record a live aggregate as the symbol's last-known-good price"""
+        if self._is_live_price(aggregated):
+            sources = aggregated.get('sources', [])
+            source = sources[0].get('source', '') if len(sources) == 1 else 'median of ' + ', '.join(
+                quote.get('source', '') for quote in sources)
+            last_known_prices.record(symbol, asset_type, aggregated.get('primary_price'), source)
+        return aggregated
+    
+    async def _fetch_aggregated_price(self, symbol: str, asset_type: str,
+                                      priority: Priority = Priority.INTERACTIVE) -> Dict:
+        """Query the upstream sources for one symbol (bypasses the cache)"""
+        if trading_config.PRICE_FANOUT_ENABLED:
+            return self._remember(symbol, asset_type, await self._fetch_quorum_price(symbol, asset_type, priority))
+        
         results = []
         
         if asset_type == 'crypto':
             # Try CoinGecko first (with timeout)
             try:
-                cg_data = await self.get_crypto_price_coingecko(symbol)
+                cg_data = await self.get_crypto_price_coingecko(symbol, priority)
                 if cg_data:
                     results.append(cg_data)
             except:
@@ -135,31 +322,252 @@ class MarketDataService:
         elif asset_type == 'stock':
             # Try Alpha Vantage
             try:
-                av_data = await self.get_stock_price_alphavantage(symbol)
+                av_data = await self.get_stock_price_alphavantage(symbol, priority)
                 if av_data:
                     results.append(av_data)
             except:
                 pass
         
-        # If no results, use fallback data
+        # If no results, use the last known good price
         if not results:
-            from simple_market_data import get_fallback_price
-            fallback = get_fallback_price(symbol)
-            results.append(fallback)
+            results.append(get_fallback_price(symbol, asset_type))
         
-        # Return all sources
+        return self._remember(symbol, asset_type, self._aggregate(symbol, results))
+    
+    async def get_crypto_price_binance(self, symbol: str) -> Optional[Dict]:
+        """Spot price from the Binance USDT pair (streamed ticker if fresh)"""
+        streamed = ticker_stream.get('binance', f"{symbol.upper()}USDT")
+        if streamed:
+            return {
+                'symbol': symbol.upper(),
+                'price': streamed.price,
+                'source': 'Binance (stream)',
+                'timestamp': datetime.utcfromtimestamp(streamed.received_at).isoformat()
+            }
+        ticker = await binance_service.get_symbol_price(f"{symbol.upper()}USDT")
+        if not ticker.get('price'):
+            return None
+        return {
+            'symbol': symbol.upper(),
+            'price': ticker['price'],
+            'source': 'Binance',
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    async def get_crypto_price_coinbase(self, symbol: str) -> Optional[Dict]:
+        """Spot price from the Coinbase USD product (streamed ticker if fresh)"""
+        streamed = ticker_stream.get('coinbase', f"{symbol.upper()}-USD")
+        if streamed:
+            return {
+                'symbol': symbol.upper(),
+                'price': streamed.price,
+                'source': 'Coinbase (stream)',
+                'timestamp': datetime.utcfromtimestamp(streamed.received_at).isoformat()
+            }
+        product = await coinbase_service.get_product_info(f"{symbol.upper()}-USD")
+        if not product.get('price'):
+            return None
+        return {
+            'symbol': symbol.upper(),
+            'price': product['price'],
+            'change_24h': product.get('price_percentage_change_24h', 0),
+            'volume_24h': product.get('volume_24h', 0),
+            'source': 'Coinbase',
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    async def get_crypto_price_yahoo(self, symbol: str, priority: Priority = Priority.INTERACTIVE) -> Optional[Dict]:
+        """Crypto price from Yahoo Finance's SYMBOL-USD ticker"""
+        quote = await self.get_stock_price_yahoo(f"{symbol.upper()}-USD", priority)
+        if quote:
+            quote['symbol'] = symbol.upper()
+        return quote
+    
+    def _price_sources(self, symbol: str, asset_type: str, priority: Priority) -> Dict[str, Callable[[], Awaitable[Optional[Dict]]]]:
+        """Source name -> coroutine factory for every source that can price this symbol"""
+        if asset_type == 'crypto':
+            sources = {
+                'coingecko': lambda: self.get_crypto_price_coingecko(symbol, priority),
+                'yahoo': lambda: self.get_crypto_price_yahoo(symbol, priority)
+            }
+            if binance_service.readable or ticker_stream.get('binance', f"{symbol.upper()}USDT"):
+                sources['binance'] = lambda: self.get_crypto_price_binance(symbol)
+            if coinbase_service.readable or ticker_stream.get('coinbase', f"{symbol.upper()}-USD"):
+                sources['coinbase'] = lambda: self.get_crypto_price_coinbase(symbol)
+            return sources
+        if asset_type == 'stock':
+            sources = {'yahoo': lambda: self.get_stock_price_yahoo(symbol, priority)}
+            if self.alpha_vantage:
+                sources['alphavantage'] = lambda: self.get_stock_price_alphavantage(symbol, priority)
+            return sources
+        return {}
+    
+    @staticmethod
+    async def _ready(quote: Optional[Dict]) -> Optional[Dict]:
+        return quote
+    
+    async def _fetch_quorum_price(self, symbol: str, asset_type: str, priority: Priority,
+                                  known: Optional[Dict[str, Optional[Dict]]] = None,
+                                  budgeted: bool = True) -> Dict:
+        """Query every source at once; answer as soon as a quorum has responded
+
+        Each source gets PRICE_SOURCE_DEADLINE seconds. The primary price is the
+        median of the responses, so one bad source cannot skew it and one slow
+        source cannot hold up the answer once the quorum is met. `known` maps
+        source names to their answers from a batch call (None = no quote);
+        those sources are not called again. budgeted=False leaves out the other
+        sources that draw on a rate-limit budget (Yahoo, Alpha Vantage), so
+        batch reads do not spend one call per symbol on them.
+        """
+        known = known or {}
+        sources = self._price_sources(symbol, asset_type, priority)
+        if not budgeted:
+            sources = {name: factory for name, factory in sources.items()
+                       if name in known or name not in rate_limiter.providers}
+        for name, quote in known.items():
+            if name in sources:
+                sources[name] = lambda quote=quote: self._ready(quote)
+        quorum = min(trading_config.PRICE_QUORUM, len(sources))
+        deadline = trading_config.PRICE_SOURCE_DEADLINE
+        started = time.monotonic()
+        
+        tasks = {
+            asyncio.create_task(asyncio.wait_for(factory(), timeout=deadline)): name
+            for name, factory in sources.items()
+        }
+        results = []
+        pending = set(tasks)
+        try:
+            while pending and len(results) < quorum:
+                remaining = deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    quote = task.result()
+                    if quote and quote.get('price'):
+                        results.append(quote)
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        if not results:
+            return self._aggregate(symbol, [get_fallback_price(symbol, asset_type)])
+        
+        aggregated = self._aggregate(symbol, results)
+        prices = [float(quote['price']) for quote in results]
+        median = statistics.median(prices)
+        aggregated['primary_price'] = median
+        aggregated['quorum'] = {
+            'required': quorum,
+            'responded': len(results),
+            'queried': len(sources),
+            'met': len(results) >= quorum,
+            'latency_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+        aggregated['dispersion'] = {
+            'min': min(prices),
+            'max': max(prices),
+            'spread_percent': round((max(prices) - min(prices)) / median * 100, 4) if median else 0,
+            'stdev': statistics.pstdev(prices)
+        }
+        return aggregated
+    
+    @staticmethod
+    def _aggregate(symbol: str, results: List[Dict]) -> Dict:
+        """Return all sources"""
         return {
             'symbol': symbol,
             'sources': results,
             'primary_price': results[0]['price'] if results else 0,
-            'data_available': len(results)
+            'data_available': len(results),
+            'as_of': datetime.utcnow().isoformat()
+        }
+    
+    async def get_aggregated_prices(self, symbols: List[str], asset_type: str = 'crypto',
+                                    priority: Priority = Priority.INTERACTIVE) -> Dict[str, Dict]:
+        """Batched get_aggregated_price - one upstream round-trip for all cache misses"""
+        results = {}
+        cold = []
+        for symbol in symbols:
+            self.refresher.touch(symbol, asset_type)
+            snapshot = self.refresher.get(symbol, asset_type)
+            if snapshot:
+                results[symbol] = snapshot
+            else:
+                cold.append(symbol)
+        
+        if cold:
+            results.update(await self.price_cache.get_or_fetch_many(
+                cold,
+                asset_type,
+                lambda missing: self._fetch_aggregated_prices(missing, asset_type, priority),
+                cacheable=self._is_live_price
+            ))
+        return results
+    
+    async def _refresh_prices(self, symbols: List[str], asset_type: str) -> Dict[str, Dict]:
+        """Background refresh for the hot set - live quotes only, also written to the cache"""
+        fetched = await self._fetch_aggregated_prices(symbols, asset_type, Priority.BACKGROUND)
+        live = {symbol: value for symbol, value in fetched.items() if self._is_live_price(value)}
+        for symbol, value in live.items():
+            self.price_cache.put(symbol, asset_type, value)
+        return live
+    
+    async def _fetch_aggregated_prices(self, symbols: List[str], asset_type: str,
+                                       priority: Priority = Priority.INTERACTIVE) -> Dict[str, Dict]:
+        """Query the batch-capable upstream source for many symbols (bypasses the cache)
+
+        With PRICE_FANOUT_ENABLED each symbol then goes through the quorum
+        fan-out, the batch quote counting as that source's response. Only the
+        exchange sources without a tight budget (Binance, Coinbase) join it;
+        Yahoo and Alpha Vantage stay one batch call, not one call per symbol.
+        """
+        quotes = {}
+        batch_source = None
+        
+        if asset_type == 'crypto':
+            batch_source = 'coingecko'
+            quotes = await self.get_crypto_prices_coingecko(symbols, priority)
+        elif asset_type == 'stock':
+            # Alpha Vantage has no batch quote on the free tier - Yahoo does
+            batch_source = 'yahoo'
+            quotes = await self.get_stock_prices_yahoo(symbols, priority)
+        
+        if trading_config.PRICE_FANOUT_ENABLED and batch_source:
+            aggregated = await asyncio.gather(*(
+                self._fetch_quorum_price(symbol, asset_type, priority,
+                                         known={batch_source: quotes.get(symbol)}, budgeted=False)
+                for symbol in symbols
+            ))
+            return {symbol: self._remember(symbol, asset_type, value) for symbol, value in zip(symbols, aggregated)}
+        
+        return {
+            symbol: self._remember(symbol, asset_type, self._aggregate(
+                symbol, [quotes[symbol]] if symbol in quotes else [get_fallback_price(symbol, asset_type)]
+            ))
+            for symbol in symbols
         }
     
     async def get_trending_cryptos(self) -> List[Dict]:
-        """Get trending cryptocurrencies from CoinGecko"""
+        """Get trending cryptocurrencies from CoinGecko (stale-while-revalidate)"""
+        cached = await self.get_trending_cryptos_cached()
+        return cached.value if cached else []
+    
+    async def get_trending_cryptos_cached(self) -> Optional[CachedValue]:
+        """Trending list with its age; None if nothing servable"""
+        return await self.trending_cache.get('trending', self._fetch_trending_cryptos)
+    
+    async def _fetch_trending_cryptos(self) -> Optional[List[Dict]]:
+        """Query /search/trending (None on failure)"""
+        if not await rate_limiter.acquire('coingecko', Priority.BACKGROUND):
+            return None
+        
         try:
             url = f"{self.coingecko_api_url}/search/trending"
-            response = requests.get(url, timeout=5)
+            response = await http_client.get(url)
             response.raise_for_status()
             trending = response.json()
             
@@ -174,13 +582,37 @@ class MarketDataService:
             ]
         except Exception as e:
             logger.error(f"Error getting trending cryptos: {e}")
-            return []
+            return None
     
     async def get_market_summary(self) -> Dict:
-        """Get overall market summary"""
+        """Get overall market summary (stale-while-revalidate)"""
+        cached = await self.get_market_summary_cached()
+        return cached.value if cached else self.empty_market_summary()
+    
+    @staticmethod
+    def empty_market_summary() -> Dict:
+        """Return empty but valid structure"""
+        return {
+            'total_market_cap_usd': 0,
+            'total_volume_24h_usd': 0,
+            'bitcoin_dominance': 0,
+            'active_cryptocurrencies': 0,
+            'markets': 0,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    async def get_market_summary_cached(self) -> Optional[CachedValue]:
+        """Market summary with its age; None if nothing servable"""
+        return await self.summary_cache.get('global', self._fetch_market_summary)
+    
+    async def _fetch_market_summary(self) -> Optional[Dict]:
+        """Query /global (None on failure)"""
+        if not await rate_limiter.acquire('coingecko', Priority.BACKGROUND):
+            return None
+        
         try:
             url = f"{self.coingecko_api_url}/global"
-            response = requests.get(url, timeout=5)
+            response = await http_client.get(url)
             response.raise_for_status()
             result = response.json()
             
@@ -197,14 +629,6 @@ class MarketDataService:
             }
         except Exception as e:
             logger.error(f"Error getting market summary: {e}")
-            # Return empty but valid structure
-            return {
-                'total_market_cap_usd': 0,
-                'total_volume_24h_usd': 0,
-                'bitcoin_dominance': 0,
-                'active_cryptocurrencies': 0,
-                'markets': 0,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            return None
 
 market_data_service = MarketDataService()
@@ -0,0 +1,256 @@
+"""Market Data Journal - record provider responses, replay them for offline load tests
+
+MARKET_JOURNAL_MODE=record appends every external read (CoinGecko/Alpha
+Vantage HTTP, yfinance, Coinbase/Binance REST reads) to a gzip'd JSON-lines
+journal together with how long it took. MARKET_JOURNAL_MODE=replay answers
+the same calls from the journal without touching the network, sleeping the
+recorded latency divided by MARKET_JOURNAL_SPEED (0 = no delay), so
+analyze_stock / auto_trading_decision / get_all_balances can be benchmarked
+repeatably. Calls that were recorded several times are replayed in order and
+then cycled; a call missing from the journal raises JournalMiss.
+
+Journal line: {"k": "<source>.<call> <args json>", "l": latency_s, "v": payload}
+or {"k": ..., "l": ..., "e": "<error message>"} for calls that raised.
+"""
+import httpx
+import pandas as pd
+from trading_config import trading_config
+import asyncio
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'record', 'replay')
+
+class JournalMiss(LookupError):
+    """Replay mode was asked for a call that was never recorded"""
+
+class ReplayedError(RuntimeError):
+    """A call that raised while recording raises this when replayed"""
+
+# ---------- payload codecs ----------
+
+def encode_frame(df: Optional[pd.DataFrame]) -> Optional[Dict]:
+    """yfinance DataFrame -> JSON-able dict (datetime index kept as epoch ns)"""
+    if df is None:
+        return None
+    index = df.index
+    tz = str(index.tz) if getattr(index, 'tz', None) is not None else None
+    if isinstance(index, pd.DatetimeIndex):
+        stamps = index.tz_convert('UTC') if tz else index
+        index_values = stamps.as_unit('ns').asi8.tolist()
+    else:
+        index_values = list(index)
+    return {
+        'index': index_values,
+        'datetime_index': isinstance(index, pd.DatetimeIndex),
+        'tz': tz,
+        'index_name': index.name,
+        'columns': [list(c) if isinstance(c, tuple) else c for c in df.columns],
+        'data': df.to_numpy(dtype=object).tolist()
+    }
+
+def decode_frame(payload: Optional[Dict]) -> Optional[pd.DataFrame]:
+    if payload is None:
+        return None
+    if payload['datetime_index']:
+        index = pd.to_datetime(payload['index'], unit='ns', utc=payload['tz'] is not None)
+        if payload['tz']:
+            index = index.tz_convert(payload['tz'])
+    else:
+        index = pd.Index(payload['index'])
+    index.name = payload['index_name']
+    columns = payload['columns']
+    if columns and isinstance(columns[0], list):
+        columns = pd.MultiIndex.from_tuples([tuple(c) for c in columns])
+    df = pd.DataFrame(payload['data'], index=index, columns=columns)
+    return df.infer_objects()
+
+def encode_response(response: httpx.Response) -> Dict:
+    keep = {name: response.headers[name] for name in ('content-type', 'retry-after') if name in response.headers}
+    return {
+        'status': response.status_code,
+        'headers': keep,
+        'url': str(response.request.url),
+        'body': response.text
+    }
+
+def decode_response(payload: Dict) -> httpx.Response:
+    return httpx.Response(
+        payload['status'],
+        headers=payload['headers'],
+        content=payload['body'].encode(),
+        request=httpx.Request('GET', payload['url'] or 'http://replay.invalid/')
+    )
+
+def _identity(value: Any) -> Any:
+    return value
+
+# ---------- journal ----------
+
+class MarketJournal:
+    """Record/replay switch shared by every market data read path"""
+
+    def __init__(self, mode: Optional[str] = None, path: Optional[str] = None, speed: Optional[float] = None):
+        self.mode = (mode or trading_config.MARKET_JOURNAL_MODE).lower()
+        if self.mode not in MODES:
+            raise ValueError(f"MARKET_JOURNAL_MODE must be one of {MODES}, got '{self.mode}'")
+        self.path = Path(path or trading_config.MARKET_JOURNAL_PATH)
+        self.speed = trading_config.MARKET_JOURNAL_SPEED if speed is None else speed
+        self._lock = threading.Lock()
+        self._writer = None
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        if self.mode == 'replay':
+            self.load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    @staticmethod
+    def key(source: str, call: str, args: Dict) -> str:
+        return f"{source}.{call} {json.dumps(args, sort_keys=True, default=str, separators=(',', ':'))}"
+
+    # ---------- persistence ----------
+
+    def load(self):
+        entries: Dict[str, List[Dict]] = defaultdict(list)
+        try:
+            with gzip.open(self.path, 'rt') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        entries[record['k']].append(record)
+        except FileNotFoundError:
+            logger.warning(f"Market journal {self.path} not found - every replayed call will miss")
+        except EOFError:
+            # Recorder was killed mid-write; everything before the cut is usable
+            logger.warning(f"Market journal {self.path} is truncated - replaying what was complete")
+        self._entries = dict(entries)
+        self._cursor.clear()
+        logger.info(f"Market journal loaded: {sum(len(v) for v in self._entries.values())} responses, "
+                    f"{len(self._entries)} distinct calls")
+
+    def _write(self, record: Dict):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._writer is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._writer = gzip.open(self.path, 'at')
+            self._writer.write(line)
+            self._writer.flush()  # sync flush: a crash loses at most the line being written
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    # ---------- record / replay ----------
+
+    def _next(self, key: str) -> Dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.missed += 1
+                raise JournalMiss(key)
+            position = self._cursor[key]
+            self._cursor[key] = position + 1
+            self.replayed += 1
+            return entries[position % len(entries)]
+
+    def _delay(self, entry: Dict) -> float:
+        return entry['l'] / self.speed if self.speed > 0 else 0.0
+
+    @staticmethod
+    def _result(entry: Dict, decode: Callable[[Any], Any]) -> Any:
+        if 'e' in entry:
+            raise ReplayedError(entry['e'])
+        return decode(entry['v'])
+
+    def _record(self, key: str, started: float, value: Any = None, error: Optional[Exception] = None,
+                encode: Callable[[Any], Any] = _identity):
+        record = {'k': key, 'l': round(time.perf_counter() - started, 4)}
+        if error is not None:
+            record['e'] = f"{type(error).__name__}: {error}"
+        else:
+            record['v'] = encode(value)
+        try:
+            self._write(record)
+        except Exception as e:
+            logger.warning(f"Market journal write failed for {key}: {e}")
+
+    async def call(self, source: str, call: str, args: Dict, fetch: Callable[[], Awaitable[Any]],
+                   encode: Callable[[Any], Any] = _identity, decode: Callable[[Any], Any] = _identity) -> Any:
+        """Run an async provider read through the journal"""
+        if self.mode == 'off':
+            return await fetch()
+
+        key = self.key(source, call, args)
+        if self.replaying:
+            entry = self._next(key)
+            delay = self._delay(entry)
+            if delay:
+                await asyncio.sleep(delay)
+            return self._result(entry, decode)
+
+        started = time.perf_counter()
+        try:
+            value = await fetch()
+        except Exception as e:
+            self._record(key, started, error=e)
+            raise
+        self._record(key, started, value, encode=encode)
+        return value
+
+    def call_sync(self, source: str, call: str, args: Dict, fetch: Callable[[], Any],
+                  encode: Callable[[Any], Any] = _identity, decode: Callable[[Any], Any] = _identity) -> Any:
+        """Same as call() for blocking reads (yfinance inside worker threads)"""
+        if self.mode == 'off':
+            return fetch()
+
+        key = self.key(source, call, args)
+        if self.replaying:
+            entry = self._next(key)
+            delay = self._delay(entry)
+            if delay:
+                time.sleep(delay)
+            return self._result(entry, decode)
+
+        started = time.perf_counter()
+        try:
+            value = fetch()
+        except Exception as e:
+            self._record(key, started, error=e)
+            raise
+        self._record(key, started, value, encode=encode)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'path': str(self.path),
+            'speed': self.speed,
+            'recorded': self.recorded,
+            'replayed': self.replayed,
+            'missed': self.missed,
+            'distinct_calls': len(self._entries)
+        }
+
+market_journal = MarketJournal()
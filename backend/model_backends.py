@@ -0,0 +1,191 @@
+"""Model Backends - the estimators the model registry can train for _ml_prediction
+
+A backend fits an sklearn estimator on ml_dataset() rows and compiles it into
+a small NumPy scorer whose arrays are stored next to it (vN.<suffix>.joblib)
+and memory-mapped at request time:
+
+    forest  RandomForestClassifier(100 trees), scored by CompiledForest
+    sgd     logistic regression trained by SGD, scored by LinearScorer;
+            online: new bars are folded in with partial_fit instead of a refit
+
+Only backends with online = True have update(); the registry and the
+benchmark check that flag before folding rows in. ML_MODEL_BACKEND picks the
+backend for new versions; each version records
+the backend it was trained with, so switching does not break stored models.
+Compare them with `python bench_models.py`.
+"""
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from typing import Any, Dict, Tuple
+
+CLASSES = np.array([0, 1])  # next bar closes lower / higher
+
+class CompiledForest:
+    """A fitted RandomForestClassifier flattened into node arrays
+
+    All trees' nodes are concatenated; a row is scored by stepping every
+    tree's cursor down one level per iteration, so a prediction is `depth`
+    vectorized steps instead of 100 Python-level tree calls.
+    """
+
+    def __init__(self, left: np.ndarray, right: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, depth: int, classes: np.ndarray):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.classes = classes
+
+    @classmethod
+    def from_sklearn(cls, model: RandomForestClassifier) -> 'CompiledForest':
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            leaf = tree.children_left < 0
+            roots.append(offset)
+            left.append(np.where(leaf, -1, tree.children_left + offset))
+            right.append(np.where(leaf, -1, tree.children_right + offset))
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            counts = tree.value[:, 0, :]
+            value.append(counts / counts.sum(axis=1, keepdims=True))
+            offset += tree.node_count
+        return cls(
+            left=np.concatenate(left).astype(np.int64),
+            right=np.concatenate(right).astype(np.int64),
+            feature=np.concatenate(feature).astype(np.int64),
+            threshold=np.concatenate(threshold),
+            value=np.concatenate(value),
+            roots=np.asarray(roots, dtype=np.int64),
+            depth=max(estimator.tree_.max_depth for estimator in model.estimators_),
+            classes=np.asarray(model.classes_)
+        )
+
+    def arrays(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in
+                ('left', 'right', 'feature', 'threshold', 'value', 'roots', 'depth', 'classes')}
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Class probabilities for one feature row (same as the sklearn forest)"""
+        # sklearn trees compare float32 inputs against float64 thresholds
+        x = np.asarray(x, dtype=np.float32).astype(np.float64)
+        node = self.roots
+        for _ in range(self.depth):
+            left = self.left[node]
+            go_left = x[self.feature[node]] <= self.threshold[node]
+            node = np.where(left < 0, node, np.where(go_left, left, self.right[node]))
+        return self.value[node].mean(axis=0)
+
+    def predict(self, x: np.ndarray) -> Tuple[Any, float]:
+        """(predicted class, its probability)"""
+        proba = self.predict_proba(x)
+        best = int(np.argmax(proba))
+        return self.classes[best], float(proba[best])
+
+class LinearScorer:
+    """Standardize, dot with the coefficients, logistic link (binary log-loss models)"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, coef: np.ndarray, intercept: float,
+                 classes: np.ndarray):
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.classes = classes
+
+    @classmethod
+    def from_sklearn(cls, model: Tuple[StandardScaler, SGDClassifier]) -> 'LinearScorer':
+        scaler, classifier = model
+        return cls(
+            mean=scaler.mean_.copy(),
+            scale=scaler.scale_.copy(),
+            coef=classifier.coef_[0].copy(),
+            intercept=float(classifier.intercept_[0]),
+            classes=np.asarray(classifier.classes_)
+        )
+
+    def arrays(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in ('mean', 'scale', 'coef', 'intercept', 'classes')}
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Class probabilities for one feature row (same as the sklearn pipeline)"""
+        z = float(np.dot((np.asarray(x, dtype=np.float64) - self.mean) / self.scale, self.coef)) + self.intercept
+        up = 1.0 / (1.0 + np.exp(-z))
+        return np.array([1.0 - up, up])
+
+    def predict(self, x: np.ndarray) -> Tuple[Any, float]:
+        """(predicted class, its probability)"""
+        proba = self.predict_proba(x)
+        best = int(np.argmax(proba))
+        return self.classes[best], float(proba[best])
+
+class ForestBackend:
+    """The original 100-tree random forest, refit from scratch each time"""
+    name = 'RandomForest'
+    suffix = 'forest'
+    online = False
+    scorer = CompiledForest
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> RandomForestClassifier:
+        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        return model.fit(X, y)
+
+    def predict(self, model: RandomForestClassifier, X: np.ndarray) -> np.ndarray:
+        return model.predict(X)
+
+    def compile(self, model: RandomForestClassifier) -> CompiledForest:
+        return CompiledForest.from_sklearn(model)
+
+class OnlineSGDBackend:
+    """Logistic regression trained by SGD on standardized features
+
+    fit() standardizes with the training rows and runs EPOCHS passes of
+    partial_fit; update() folds new labelled rows in with one more pass,
+    keeping the scaler of the fit so the coefficients stay comparable
+    (drift past ML_DRIFT_THRESHOLD triggers a full refit instead).
+    """
+    name = 'OnlineSGD'
+    suffix = 'linear'
+    online = True
+    scorer = LinearScorer
+    EPOCHS = 20
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> Tuple[StandardScaler, SGDClassifier]:
+        scaler = StandardScaler().fit(X)
+        classifier = SGDClassifier(loss='log_loss', alpha=1e-3, random_state=42)
+        scaled = scaler.transform(X)
+        for _ in range(self.EPOCHS):
+            classifier.partial_fit(scaled, y, classes=CLASSES)
+        return scaler, classifier
+
+    def update(self, model: Tuple[StandardScaler, SGDClassifier], X: np.ndarray,
+               y: np.ndarray) -> Tuple[StandardScaler, SGDClassifier]:
+        scaler, classifier = model
+        if len(X):
+            classifier.partial_fit(scaler.transform(X), y, classes=CLASSES)
+        return model
+
+    def predict(self, model: Tuple[StandardScaler, SGDClassifier], X: np.ndarray) -> np.ndarray:
+        scaler, classifier = model
+        return classifier.predict(scaler.transform(X))
+
+    def compile(self, model: Tuple[StandardScaler, SGDClassifier]) -> LinearScorer:
+        return LinearScorer.from_sklearn(model)
+
+BACKENDS = {
+    'forest': ForestBackend(),
+    'sgd': OnlineSGDBackend()
+}
+
+def backend_for(name: str):
+    """Backend by config name ('forest', 'sgd') or by the name stored in version metadata"""
+    for key, backend in BACKENDS.items():
+        if name in (key, backend.name):
+            return backend
+    raise ValueError(f"Unknown model backend '{name}', expected one of {sorted(BACKENDS)}")
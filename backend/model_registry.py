@@ -0,0 +1,387 @@
+"""Model Registry - versioned ML models on disk, retrained on a schedule or on drift
+
+_ml_prediction used to fit a fresh 100-tree RandomForest on every call and
+throw it away. Models now live under ML_MODEL_DIR, one directory per key
+(a symbol, or _POOLED for one model shared by every symbol):
+
+    models/AAPL/v7.joblib          fitted sklearn model (audit / reuse / online updates)
+    models/AAPL/v7.forest.joblib   the same model compiled to NumPy arrays (model_backends)
+    models/AAPL/v7.json            version metadata (backend, training window, drift baseline)
+    models/AAPL/current.json       metadata of the version requests should use
+
+Request-time scoring loads only the compiled arrays (memory-mapped, so
+every analysis worker shares the same pages): tens of microseconds for
+the forest instead of the ~5 ms sklearn predict_proba costs for a single
+row, a few for the online SGD model. Training happens on a cold start and from the
+retrain scheduler, which refits a model once it is older than
+ML_RETRAIN_INTERVAL, ML_RETRAIN_BARS new bars have closed, or the recent
+features have drifted ML_DRIFT_THRESHOLD training stds from its baseline.
+With an online backend (ML_MODEL_BACKEND=sgd) each pass instead folds the
+bars labelled since the last version into the model with partial_fit;
+age, drift and a backend switch still force a full refit.
+"""
+from trading_config import trading_config
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from indicators import Indicators
+from model_backends import backend_for
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ('returns', 'sma_5', 'sma_20', 'volume_ratio', 'rsi_14')
+TRAIN_ROWS = 60    # most recent labelled rows used for a fit...
+HOLDOUT_ROWS = 5   # ...of which the last few are held out for validation
+MIN_ROWS = 50      # fewer complete feature rows -> no prediction
+DRIFT_ROWS = 20    # recent rows compared against the training baseline
+POOLED = '_POOLED'
+
+def ml_dataset(ind: Indicators) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Feature rows of the model, from an indicator set
+
+    Returns (X, y, latest, rows): X/y are the labelled rows (target = next
+    complete row closes higher), latest the features of the newest complete
+    row (what a prediction scores) and rows the bar positions of X.
+    Rows with any NaN feature are dropped.
+    """
+    features = np.column_stack([getattr(ind, name) for name in FEATURES])
+    rows = np.flatnonzero(~np.isnan(features).any(axis=1))
+    if not len(rows):
+        empty = np.empty((0, len(FEATURES)))
+        return empty, np.empty(0, dtype=int), empty, rows
+    close = ind.close[rows]
+    y = (close[1:] > close[:-1]).astype(int)
+    return features[rows[:-1]], y, features[rows[-1]], rows[:-1]
+
+def _atomic_write(path: Path, write: Callable[[str], None]):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _write_json(path: Path, payload: Dict):
+    def write(tmp: str):
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+    _atomic_write(path, write)
+
+class ModelRegistry:
+    """Per-key model versions on disk plus an in-process cache of loaded scorers"""
+
+    def __init__(self, root: Optional[str] = None, scope: Optional[str] = None, backend: Optional[str] = None):
+        self.root = Path(root or trading_config.ML_MODEL_DIR)
+        self.backend = backend_for(backend or trading_config.ML_MODEL_BACKEND)
+        self.scope = (scope or trading_config.ML_MODEL_SCOPE).lower()
+        if self.scope not in ('symbol', 'pooled'):
+            raise ValueError(f"ML_MODEL_SCOPE must be 'symbol' or 'pooled', got '{self.scope}'")
+        self.retrain_interval = trading_config.ML_RETRAIN_INTERVAL
+        self.retrain_bars = trading_config.ML_RETRAIN_BARS
+        self.drift_threshold = trading_config.ML_DRIFT_THRESHOLD
+        self.check_interval = trading_config.ML_RETRAIN_CHECK_INTERVAL
+        self.keep_versions = trading_config.ML_MODEL_KEEP_VERSIONS
+        self._meta: Dict[str, Tuple[int, Dict]] = {}  # key -> (current.json mtime_ns, metadata)
+        self._scorers: Dict[str, Tuple[int, Any]] = {}  # key -> (version, compiled scorer)
+        self._task: Optional[asyncio.Task] = None
+        self.predictions = 0
+        self.trainings = 0
+        self.updates = 0
+        self.cold_starts = 0
+        self.loads = 0
+        self.retrain_runs = 0
+
+    def key_for(self, symbol: str) -> str:
+        return POOLED if self.scope == 'pooled' else symbol.upper()
+
+    def _dir(self, key: str) -> Path:
+        return self.root / key
+
+    def keys(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / 'current.json').exists())
+
+    def symbols(self) -> List[str]:
+        """Every symbol the registry has seen (the pooled model's universe)"""
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and p.name != POOLED)
+
+    def register(self, symbol: str):
+        self._dir(symbol.upper()).mkdir(parents=True, exist_ok=True)
+
+    # ---------- versions ----------
+
+    def current(self, key: str) -> Optional[Dict]:
+        """Metadata of the key's current version (re-read only when the file changed,
+        so versions trained by another process are picked up)"""
+        path = self._dir(key) / 'current.json'
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._meta.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path) as f:
+            meta = json.load(f)
+        self._meta[key] = (mtime, meta)
+        return meta
+
+    def version(self, symbol: str) -> int:
+        """Current model version serving the symbol (0 if none); part of analysis cache keys"""
+        meta = self.current(self.key_for(symbol))
+        return meta['version'] if meta else 0
+
+    def load(self, key: str) -> Optional[Tuple[Any, Dict]]:
+        """(compiled scorer, metadata) of the key's current version"""
+        meta = self.current(key)
+        if meta is None:
+            return None
+        cached = self._scorers.get(key)
+        if cached and cached[0] == meta['version']:
+            return cached[1], meta
+        backend = backend_for(meta['model'])
+        arrays = joblib.load(self._dir(key) / f"v{meta['version']}.{backend.suffix}.joblib", mmap_mode='r')
+        scorer = backend.scorer(**arrays)
+        self._scorers[key] = (meta['version'], scorer)
+        self.loads += 1
+        return scorer, meta
+
+    @staticmethod
+    def _claim(directory: Path, version: int) -> int:
+        """Reserve the first free version number from `version` on by creating its
+        vN.json exclusively, so workers publishing the same key at once never
+        write over each other's files"""
+        while True:
+            try:
+                os.close(os.open(directory / f"v{version}.json", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return version
+            except FileExistsError:
+                version += 1
+
+    def _publish(self, key: str, backend, model: Any, fields: Dict) -> Dict:
+        """Write `model` and its compiled scorer as the key's next version"""
+        scorer = backend.compile(model)
+        directory = self._dir(key)
+        directory.mkdir(parents=True, exist_ok=True)
+        previous = self.current(key)
+        version = self._claim(directory, (previous['version'] if previous else 0) + 1)
+        meta = {'key': key, 'version': version, 'model': backend.name, 'features': list(FEATURES), **fields}
+        _atomic_write(directory / f"v{version}.joblib", lambda tmp: joblib.dump(model, tmp))
+        _atomic_write(directory / f"v{version}.{backend.suffix}.joblib", lambda tmp: joblib.dump(scorer.arrays(), tmp))
+        _write_json(directory / f"v{version}.json", meta)
+        _write_json(directory / 'current.json', meta)  # publish last: readers never see a half-written version
+        self._scorers[key] = (version, scorer)
+        self._prune(directory, version)
+        return meta
+
+    def train(self, key: str, X: np.ndarray, y: np.ndarray, X_holdout: np.ndarray, y_holdout: np.ndarray,
+              baseline: np.ndarray, **context) -> Dict:
+        """Fit, validate and publish a new version of `key` with the configured backend"""
+        backend = self.backend
+        model = backend.fit(X, y)
+        meta = self._publish(key, backend, model, {
+            'trained_at': time.time(),
+            'train_rows': int(len(X)),
+            'holdout_accuracy': float((backend.predict(model, X_holdout) == y_holdout).mean()) if len(X_holdout) else None,
+            'feature_mean': baseline.mean(axis=0).tolist(),
+            'feature_std': baseline.std(axis=0).tolist(),
+            **context
+        })
+        self.trainings += 1
+        logger.info(f"Trained {key} {backend.name} model v{meta['version']} "
+                    f"({len(X)} rows, holdout accuracy {meta['holdout_accuracy']})")
+        return meta
+
+    def update(self, key: str, X: np.ndarray, y: np.ndarray, **context) -> Dict:
+        """Fold newly labelled rows into an online model (published as the next version;
+        trained_at and the drift baseline stay those of the last full fit)"""
+        meta = self.current(key)
+        backend = backend_for(meta['model'])
+        if not backend.online:
+            raise ValueError(f"{backend.name} models are not online, retrain {key} instead")
+        model = backend.update(joblib.load(self._dir(key) / f"v{meta['version']}.joblib"), X, y)
+        fields = {name: value for name, value in meta.items() if name not in ('key', 'version', 'model', 'features')}
+        fields.update(updated_at=time.time(), updated_rows=meta.get('updated_rows', 0) + int(len(X)), **context)
+        self.updates += 1
+        return self._publish(key, backend, model, fields)
+
+    def _prune(self, directory: Path, version: int):
+        for path in directory.glob('v*.json'):
+            old = int(path.stem[1:])
+            if old <= version - self.keep_versions:
+                for stale in directory.glob(f"v{old}.*"):
+                    stale.unlink(missing_ok=True)
+
+    # ---------- training data ----------
+
+    @staticmethod
+    def _split(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """The last TRAIN_ROWS labelled rows -> (train X, train y, holdout X, holdout y)"""
+        X, y = X[-TRAIN_ROWS:], y[-TRAIN_ROWS:]
+        return X[:-HOLDOUT_ROWS], y[:-HOLDOUT_ROWS], X[-HOLDOUT_ROWS:], y[-HOLDOUT_ROWS:]
+
+    def train_symbol(self, symbol: str, dataset: Tuple[np.ndarray, ...], bar_times: np.ndarray) -> Dict:
+        X, y, _, rows = dataset
+        X_train, y_train, X_hold, y_hold = self._split(X, y)
+        return self.train(symbol.upper(), X_train, y_train, X_hold, y_hold, X_train,
+                          last_bar=float(bar_times[rows[-1]]))
+
+    def train_pooled(self, datasets: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Optional[Dict]:
+        """One model over every symbol's recent rows"""
+        parts = [self._split(X, y) for X, y in datasets.values() if len(X) >= MIN_ROWS]
+        if not parts:
+            return None
+        X_train, y_train, X_hold, y_hold = (np.concatenate(arrays) for arrays in zip(*parts))
+        return self.train(POOLED, X_train, y_train, X_hold, y_hold, X_train, symbols=sorted(datasets))
+
+    def due(self, meta: Dict, X: np.ndarray, new_bars: int = 0) -> Optional[str]:
+        """Why this model should be retrained, or None"""
+        if meta['model'] != self.backend.name:
+            return 'backend'
+        if time.time() - meta['trained_at'] > self.retrain_interval:
+            return 'age'
+        if meta['key'] != POOLED and new_bars >= self.retrain_bars:
+            return 'new_bars'
+        if len(X):
+            std = np.asarray(meta['feature_std'])
+            shift = np.abs(X[-DRIFT_ROWS:].mean(axis=0) - np.asarray(meta['feature_mean']))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                drift = np.where(std > 0, shift / std, 0.0)
+            if drift.max() > self.drift_threshold:
+                return 'drift'
+        return None
+
+    # ---------- inference ----------
+
+    def predict(self, symbol: str, dataset: Tuple[np.ndarray, ...], bar_times: np.ndarray) -> Dict:
+        """Score the newest bar of an ml_dataset() with the symbol's current model
+        (training one on a cold start); bar_times are the bars' epoch seconds"""
+        X, y, latest, rows = dataset
+        key = self.key_for(symbol)
+        if key == POOLED:
+            self.register(symbol)
+
+        loaded = self.load(key)
+        if loaded is None:
+            self.cold_starts += 1
+            if key == POOLED:
+                self.train_pooled({symbol.upper(): (X, y)})
+            else:
+                self.train_symbol(symbol, dataset, bar_times)
+            loaded = self.load(key)
+        scorer, meta = loaded
+
+        prediction, confidence = scorer.predict(latest)
+        self.predictions += 1
+        new_bars = int(np.sum(bar_times[rows] > meta.get('last_bar', np.inf))) if key != POOLED else 0
+        return {
+            'prediction': int(prediction),
+            'confidence': confidence,
+            'model': meta['model'],
+            'model_key': key,
+            'model_version': meta['version'],
+            'trained_at': meta['trained_at'],
+            'retrain_due': self.due(meta, X, new_bars)
+        }
+
+    # ---------- scheduled retraining ----------
+
+    def retrain_due(self, history: Callable[[str], Tuple[Indicators, np.ndarray]]) -> Dict[str, str]:
+        """Retrain every model that is due; history(symbol) -> (indicators, bar epoch seconds)"""
+        self.retrain_runs += 1
+        retrained = {}
+        datasets = {}
+        for symbol in self.symbols():
+            try:
+                ind, bar_times = history(symbol)
+            except Exception as e:
+                logger.warning(f"Skipping {symbol} model: no history ({e})")
+                continue
+            dataset = ml_dataset(ind)
+            X, y, _, rows = dataset
+            if len(X) < MIN_ROWS:
+                continue
+            datasets[symbol] = (X, y)
+            meta = self.current(symbol)
+            if meta is None:
+                continue
+            fresh = bar_times[rows] > meta.get('last_bar', np.inf)
+            reason = self.due(meta, X, int(fresh.sum()))
+            if reason in (None, 'new_bars') and fresh.any() and self.backend.online:
+                # Online backends learn every new labelled bar instead of waiting for a refit
+                self.update(symbol, X[fresh], y[fresh], last_bar=float(bar_times[rows[-1]]))
+                retrained[symbol] = 'update'
+            elif reason:
+                self.train_symbol(symbol, dataset, bar_times)
+                retrained[symbol] = reason
+
+        pooled = self.current(POOLED)
+        if pooled is not None and datasets:
+            reason = self.due(pooled, np.concatenate([X[-DRIFT_ROWS:] for X, _ in datasets.values()]))
+            if reason or sorted(datasets) != pooled.get('symbols'):
+                self.train_pooled(datasets)
+                retrained[POOLED] = reason or 'universe'
+        return retrained
+
+    async def _run(self, run_job: Callable[[], Awaitable[Dict[str, str]]]):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                retrained = await run_job()
+                if retrained:
+                    logger.info(f"Retrained models: {retrained}")
+            except Exception as e:
+                logger.warning(f"Model retraining failed: {e}")
+
+    def start(self, run_job: Callable[[], Awaitable[Dict[str, str]]]):
+        """Schedule periodic retraining (FastAPI startup); run_job does one pass, e.g. in the analysis pool"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(run_job))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        models = {}
+        for key in self.keys():
+            meta = self.current(key)
+            models[key] = {
+                'version': meta['version'],
+                'model': meta['model'],
+                'age_seconds': round(time.time() - meta['trained_at']),
+                'holdout_accuracy': meta['holdout_accuracy']
+            }
+        return {
+            'root': str(self.root),
+            'scope': self.scope,
+            'backend': self.backend.name,
+            'models': models,
+            'predictions': self.predictions,
+            'trainings': self.trainings,
+            'updates': self.updates,
+            'cold_starts': self.cold_starts,
+            'loads': self.loads,
+            'retrain_runs': self.retrain_runs
+        }
+
+model_registry = ModelRegistry()
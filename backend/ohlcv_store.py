@@ -0,0 +1,425 @@
+"""Local OHLCV Store - memory-mapped bar history with incremental tail refresh
+
+Each (symbol, interval) lives in one little-endian float64 file of shape
+(n_bars, 6): epoch seconds (UTC), Open, High, Low, Close, Volume. Refreshes
+download only the bars after the last stored one and append them, readers
+get read-only memmap slices (no copy) or DataFrames built on top of them.
+
+Bars are stored split and dividend adjusted, so a corporate action rewrites
+every earlier bar. Tail downloads start one closed bar before the stored last
+one; if that overlap no longer matches the stored copy (or the tail reports a
+split or dividend) the whole history is downloaded again instead of appended.
+Every full download bumps the key's generation, so data derived from the bars
+(the feature store) can tell a replaced history from an appended one.
+"""
+import yfinance as yf
+import numpy as np
+import pandas as pd
+from trading_config import trading_config
+from market_journal import market_journal, encode_frame, decode_frame
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl  # cross-process file locks (Linux/macOS)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+FIELDS = 1 + len(COLUMNS)
+DTYPE = np.dtype('<f8')
+ADJUSTMENT_RTOL = 1e-6  # overlap bars further apart than this were re-adjusted
+
+# yfinance period strings -> days of history they cover
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, 'ytd': 366,
+    '1y': 366, '2y': 731, '5y': 1827, '10y': 3653, 'max': 36500
+}
+
+def period_days(period: str) -> int:
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period '{period}'")
+    return PERIOD_DAYS[period]
+
+class OHLCVStore:
+    """Persistent per-symbol bar store shared by every history reader"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or trading_config.OHLCV_STORE_DIR)
+        self.refresh_seconds = trading_config.OHLCV_REFRESH_SECONDS
+        self.bootstrap_period = trading_config.OHLCV_BOOTSTRAP_PERIOD
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._maps: Dict[Tuple[str, str], Tuple[Tuple[int, int], np.ndarray]] = {}
+        self.full_downloads = 0
+        self.tail_downloads = 0
+        self.readjustments = 0
+        self.bulk_downloads = 0
+        self.appended_bars = 0
+        self.reads = 0
+
+    # ---------- paths & metadata ----------
+
+    @staticmethod
+    def _key(symbol: str, interval: str) -> Tuple[str, str]:
+        return (symbol.upper(), interval)
+
+    def _paths(self, symbol: str, interval: str) -> Tuple[Path, Path]:
+        safe = symbol.upper().replace('/', '_').replace('^', '_')
+        base = self.root / interval / safe
+        return base.with_suffix('.f64'), base.with_suffix('.json')
+
+    def _load_meta(self, symbol: str, interval: str) -> Optional[Dict]:
+        _, meta_path = self._paths(symbol, interval)
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _atomic_write(path: Path, payload: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _save_meta(self, symbol: str, interval: str, meta: Dict):
+        _, meta_path = self._paths(symbol, interval)
+        self._atomic_write(meta_path, json.dumps(meta).encode())
+
+    @contextmanager
+    def _locked(self, symbol: str, interval: str):
+        """Serialize writers for one key across threads and worker processes"""
+        key = self._key(symbol, interval)
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            data_path, _ = self._paths(symbol, interval)
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(data_path.with_suffix('.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ---------- downloads ----------
+
+    @staticmethod
+    def _to_rows(df: pd.DataFrame) -> np.ndarray:
+        """yfinance frame -> (n, 6) float64 rows"""
+        if df is None or df.empty:
+            return np.empty((0, FIELDS), dtype=DTYPE)
+        df = df.dropna(subset=['Close'])
+        index = df.index
+        index = index.tz_convert('UTC') if index.tz is not None else index.tz_localize('UTC')
+        seconds = (index - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)
+        rows = np.empty((len(df), FIELDS), dtype=DTYPE)
+        rows[:, 0] = np.asarray(seconds, dtype=DTYPE)
+        rows[:, 1:] = df[COLUMNS].to_numpy(dtype=DTYPE)
+        return rows
+
+    @staticmethod
+    def _frame_tz(df: pd.DataFrame) -> str:
+        tz = getattr(df.index, 'tz', None)
+        return str(tz) if tz is not None else 'UTC'
+
+    def _download(self, symbol: str, interval: str, **kwargs) -> pd.DataFrame:
+        return market_journal.call_sync(
+            'yfinance', 'history', {'symbol': symbol.upper(), 'interval': interval, **kwargs},
+            lambda: yf.Ticker(symbol).history(interval=interval, **kwargs),
+            encode=encode_frame, decode=decode_frame
+        )
+
+    def _write_full(self, symbol: str, interval: str, rows: np.ndarray, tz: str, covers_from: float):
+        data_path, _ = self._paths(symbol, interval)
+        previous = self._load_meta(symbol, interval) or {}
+        self._atomic_write(data_path, np.ascontiguousarray(rows, dtype=DTYPE).tobytes())
+        self._save_meta(symbol, interval, {
+            'symbol': symbol.upper(),
+            'interval': interval,
+            'tz': tz,
+            'covers_from': covers_from,
+            'last_ts': float(rows[-1, 0]),
+            'bars': int(len(rows)),
+            'generation': int(previous.get('generation', 0)) + 1,
+            'refreshed_at': time.time()
+        })
+        self.full_downloads += 1
+
+    def _tail_from(self, symbol: str, interval: str, meta: Dict) -> float:
+        """Timestamp tail downloads start from: the last closed stored bar, so the
+        download overlaps the store and a re-adjusted history shows up"""
+        bars = self.bars(symbol, interval)
+        return float(bars[-2, 0]) if len(bars) >= 2 else meta['last_ts']
+
+    @staticmethod
+    def _has_actions(df: pd.DataFrame, after_ts: float) -> bool:
+        """The frame reports a split or dividend on a bar newer than `after_ts`
+        (Ticker.history includes them, bulk downloads do not)"""
+        actions = [c for c in ('Dividends', 'Stock Splits') if df is not None and c in df.columns]
+        if not actions:
+            return False
+        index = df.index.tz_convert('UTC') if df.index.tz is not None else df.index.tz_localize('UTC')
+        seconds = np.asarray((index - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1))
+        events = (df[actions].fillna(0) != 0).to_numpy().any(axis=1)
+        return bool((events & (seconds > after_ts)).any())
+
+    def _readjusted(self, symbol: str, interval: str, meta: Dict, rows: np.ndarray) -> bool:
+        """Downloaded bars before the stored last one differ from the stored copy"""
+        overlap = rows[rows[:, 0] < meta['last_ts']]
+        if not len(overlap):
+            return False
+        stored = self.bars(symbol, interval)
+        index = np.searchsorted(stored[:, 0], overlap[:, 0])
+        found = index < len(stored)
+        found[found] = stored[index[found], 0] == overlap[found, 0]
+        if not found.any():
+            return False
+        return not np.allclose(stored[index[found], 1:5], overlap[found, 1:5], rtol=ADJUSTMENT_RTOL, atol=0)
+
+    def _redownload(self, symbol: str, interval: str, meta: Dict, period: str):
+        """Replace the stored history with a fresh full download covering at least what it held"""
+        held = (time.time() - meta['covers_from']) / 86400
+        covering = min((p for p in PERIOD_DAYS if PERIOD_DAYS[p] >= held), key=period_days, default='max')
+        fetch_period = max(period, self.bootstrap_period, covering, key=period_days)
+        df = self._download(symbol, interval, period=fetch_period)
+        rows = self._to_rows(df)
+        if len(rows):
+            covers_from = time.time() - period_days(fetch_period) * 86400
+            self._write_full(symbol, interval, rows, meta.get('tz') or self._frame_tz(df), covers_from)
+        self.readjustments += 1
+        logger.info(f"{symbol.upper()} {interval}: stored history was re-adjusted, downloaded {fetch_period} again")
+
+    def _append_tail(self, symbol: str, interval: str, meta: Dict, rows: np.ndarray) -> bool:
+        """Overwrite the (possibly partial) last bar and append newer ones;
+        False (nothing written) if the overlap shows the history was re-adjusted"""
+        if self._readjusted(symbol, interval, meta, rows):
+            return False
+        data_path, _ = self._paths(symbol, interval)
+        last_ts = meta['last_ts']
+        same = rows[rows[:, 0] == last_ts]
+        newer = rows[rows[:, 0] > last_ts]
+
+        with open(data_path, 'r+b') as f:
+            if len(same):
+                f.seek(-FIELDS * DTYPE.itemsize, os.SEEK_END)
+                f.write(same[-1].tobytes())
+            if len(newer):
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(newer).tobytes())
+
+        if len(newer):
+            meta['last_ts'] = float(newer[-1, 0])
+            meta['bars'] = int(meta.get('bars', 0) + len(newer))
+            self.appended_bars += len(newer)
+        meta['refreshed_at'] = time.time()
+        self._save_meta(symbol, interval, meta)
+        self.tail_downloads += 1
+        return True
+
+    def _is_current(self, meta: Optional[Dict], period: str) -> bool:
+        """Stored bars cover `period` and were refreshed recently"""
+        needed_from = time.time() - period_days(period) * 86400
+        return bool(meta and meta['covers_from'] <= needed_from
+                    and time.time() - meta['refreshed_at'] < self.refresh_seconds)
+
+    def is_current(self, symbol: str, period: str = '1y', interval: str = '1d') -> bool:
+        """refresh() would not download anything"""
+        return self._is_current(self._load_meta(symbol, interval), period)
+
+    def refresh(self, symbol: str, period: str = '1y', interval: str = '1d', force: bool = False):
+        """Make sure the store covers `period` and has the latest bars"""
+        needed_from = time.time() - period_days(period) * 86400
+        meta = self._load_meta(symbol, interval)
+        if not force and self._is_current(meta, period):
+            return
+
+        with self._locked(symbol, interval):
+            meta = self._load_meta(symbol, interval)
+            if meta is None or meta['covers_from'] > needed_from:
+                # Missing, or asked for more history than we hold - full download
+                fetch_period = max(period, self.bootstrap_period, key=period_days)
+                df = self._download(symbol, interval, period=fetch_period)
+                rows = self._to_rows(df)
+                if len(rows):
+                    covers_from = time.time() - period_days(fetch_period) * 86400
+                    self._write_full(symbol, interval, rows, self._frame_tz(df), covers_from)
+                return
+
+            if not force and time.time() - meta['refreshed_at'] < self.refresh_seconds:
+                return
+
+            start = datetime.fromtimestamp(self._tail_from(symbol, interval, meta), timezone.utc).date()
+            df = self._download(symbol, interval, start=start.isoformat())
+            if self._has_actions(df, meta['last_ts']) or not self._append_tail(symbol, interval, meta, self._to_rows(df)):
+                self._redownload(symbol, interval, meta, period)
+
+    def ingest(self, symbol: str, df: pd.DataFrame, period: str, interval: str = '1d', tail: bool = False) -> bool:
+        """Store an already downloaded frame (bulk multi-ticker downloads);
+        False if it held no bars
+
+        tail=True means the frame was requested from the stored last bar on,
+        so it is appended even if that bar itself is absent; if it shows the
+        stored history was re-adjusted, the symbol is downloaded again.
+        """
+        rows = self._to_rows(df)
+        if not len(rows):
+            return False
+        with self._locked(symbol, interval):
+            meta = self._load_meta(symbol, interval)
+            needed_from = time.time() - period_days(period) * 86400
+            if meta is None or meta['covers_from'] > needed_from or (not tail and rows[0, 0] > meta['last_ts']):
+                tz = meta['tz'] if meta else self._frame_tz(df)
+                self._write_full(symbol, interval, rows, tz, needed_from)
+            elif self._has_actions(df, meta['last_ts']) or not self._append_tail(symbol, interval, meta, rows):
+                self._redownload(symbol, interval, meta, period)
+        return True
+
+    def _download_many(self, symbols: List[str], interval: str, **kwargs) -> pd.DataFrame:
+        tickers = ' '.join(symbols)
+        return market_journal.call_sync(
+            'yfinance', 'download', {'tickers': tickers, 'interval': interval, **kwargs},
+            lambda: yf.download(
+                tickers=tickers,
+                interval=interval,
+                group_by='ticker',
+                threads=True,
+                progress=False,
+                auto_adjust=True,  # same adjustment as Ticker.history()
+                ignore_tz=False,  # keep real bar instants so they line up with Ticker.history()
+                **kwargs
+            ),
+            encode=encode_frame, decode=decode_frame
+        )
+
+    def prefetch(self, symbols: List[str], period: str = '1y', interval: str = '1d') -> Set[str]:
+        """Bring many symbols up to date with bulk multi-ticker downloads
+
+        Symbols that are already current cost nothing; missing ones share one
+        full download, stale ones share one tail download from the oldest
+        last bar among them. Returns the (upper-case) symbols that are now
+        stored, current or just downloaded; the bulk frames can drop symbols,
+        and those are left to the per-symbol refresh().
+        """
+        ready, missing, stale = set(), [], []
+        tail_from = None
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            meta = self._load_meta(symbol, interval)
+            if self._is_current(meta, period):
+                ready.add(symbol)
+                continue
+            if meta is None or meta['covers_from'] > time.time() - period_days(period) * 86400:
+                missing.append(symbol)
+            else:
+                stale.append(symbol)
+                start = self._tail_from(symbol, interval, meta)
+                tail_from = min(tail_from or start, start)
+
+        batches = []
+        if missing:
+            fetch_period = max(period, self.bootstrap_period, key=period_days)
+            batches.append((missing, fetch_period, False, {'period': fetch_period}))
+        if stale:
+            start = datetime.fromtimestamp(tail_from, timezone.utc).date()
+            batches.append((stale, period, True, {'start': start.isoformat()}))
+
+        for batch, covers, tail, kwargs in batches:
+            data = self._download_many(batch, interval, **kwargs)
+            if data is None or data.empty:
+                continue
+            for symbol in batch:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if symbol not in data.columns.get_level_values(0):
+                        continue
+                    frame = data[symbol]
+                else:
+                    frame = data  # single ticker comes back flat
+                frame = frame.dropna(how='all')
+                if frame.empty:
+                    continue
+                if self.ingest(symbol, frame, covers, interval, tail=tail):
+                    ready.add(symbol)
+        self.bulk_downloads += len(batches)
+        return ready
+
+    # ---------- readers ----------
+
+    def bars(self, symbol: str, interval: str = '1d') -> np.ndarray:
+        """All stored bars as a read-only (n, 6) memmap (no network)"""
+        key = self._key(symbol, interval)
+        data_path, _ = self._paths(symbol, interval)
+        try:
+            stat = data_path.stat()
+        except FileNotFoundError:
+            return np.empty((0, FIELDS), dtype=DTYPE)
+
+        # Appends grow the file in place, full downloads replace it (new inode)
+        identity = (stat.st_ino, stat.st_size)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        if stat.st_size == 0:
+            return np.empty((0, FIELDS), dtype=DTYPE)
+
+        mapped = np.memmap(data_path, dtype=DTYPE, mode='r').reshape(-1, FIELDS)
+        self._maps[key] = (identity, mapped)
+        return mapped
+
+    def generation(self, symbol: str, interval: str = '1d') -> int:
+        """Number of full downloads that replaced the key's bars (0 if none stored)"""
+        meta = self._load_meta(symbol, interval)
+        return int(meta.get('generation', 0)) if meta else 0
+
+    def get_bars(self, symbol: str, period: str = '1y', interval: str = '1d', refresh: bool = True) -> np.ndarray:
+        """Zero-copy view of the bars covering `period` back from the latest bar"""
+        if refresh:
+            self.refresh(symbol, period, interval)
+        bars = self.bars(symbol, interval)
+        self.reads += 1
+        if not len(bars):
+            return bars
+        cutoff = bars[-1, 0] - period_days(period) * 86400
+        start = int(np.searchsorted(bars[:, 0], cutoff, side='right'))
+        return bars[start:]
+
+    def get_history(self, symbol: str, period: str = '1y', interval: str = '1d', refresh: bool = True) -> pd.DataFrame:
+        """Drop-in for yf.Ticker(symbol).history(period=...) backed by the store"""
+        bars = self.get_bars(symbol, period, interval, refresh)
+        meta = self._load_meta(symbol, interval) or {}
+        index = pd.to_datetime(np.asarray(bars[:, 0]), unit='s', utc=True).tz_convert(meta.get('tz', 'UTC'))
+        index.name = 'Date'
+        return pd.DataFrame(bars[:, 1:], index=index, columns=COLUMNS, copy=False)
+
+    def stats(self) -> Dict:
+        return {
+            'root': str(self.root),
+            'open_maps': len(self._maps),
+            'full_downloads': self.full_downloads,
+            'tail_downloads': self.tail_downloads,
+            'bulk_downloads': self.bulk_downloads,
+            'appended_bars': self.appended_bars,
+            'readjustments': self.readjustments,
+            'reads': self.reads
+        }
+
+ohlcv_store = OHLCVStore()
@@ -0,0 +1,454 @@
+"""Parameter Sweep - walk-forward search over AutoTradingConfig values
+
+min_confidence, stop_loss_percent, take_profit_percent, max_trade_amount and
+the other auto-trading limits were picked by hand. A sweep replays the
+auto-trader (auto_trading_decision + check_auto_trading_limits +
+execute_paper_trade) over stored history for every candidate config of a grid,
+or a seeded random sample of it, and scores each one on walk-forward splits.
+
+The signals do not depend on the config, so they are computed once
+(backtest.SIGNAL_RULES over the feature store) and written with the closes
+to one (3, symbols, bars) float64 matrix on the date calendar:
+
+    sweeps/<id>/matrix.f64     close, confidence, signal (NaN = no bar)
+    sweeps/<id>/sweep.json     spec, symbols, bar dates, fold ranges
+    sweeps/<id>/results.jsonl  one line per evaluated config (appended, fsynced)
+
+Worker processes map the matrix read-only, so every worker shares the same
+pages. Each job replays one config across the whole history (a loop over
+bars, vectorized across symbols) and scores the equity curve on every fold:
+fold i tests the i-th of `folds` equal windows at the end of the history and
+trains on the `train_bars` before it. The walk-forward result picks the best
+config per fold by its train score and reports how it did on the test window.
+
+A sweep's id is a hash of its spec, and the matrix is frozen when the sweep
+starts. Rerunning the same command skips configs already in results.jsonl,
+so an interrupted sweep resumes where it stopped; --fresh starts over.
+
+Replay rules (as the live trader): a config only acts on a symbol whose
+confidence reaches min_confidence; BUY opens int(max_trade_amount / price)
+shares if not held, within max_daily_trades, max_total_investment (cost
+basis) and cash; SELL closes the position; otherwise stop-loss and
+take-profit are checked against the entry price. Symbols are scanned in
+order once per bar, exits before entries. Fills are at the close, paying
+BACKTEST_FEE_BPS + BACKTEST_SLIPPAGE_BPS.
+
+Usage:
+    python param_sweep.py AAPL MSFT NVDA --period 10y --folds 5
+    python param_sweep.py $(cat universe.txt) --random 200 --workers 8 \\
+        --grid min_confidence=50,60,70,80 stop_loss_percent=2,3,5,8
+"""
+from trading_config import trading_config
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backtest import SIGNAL_RULES, STRATEGIES, WARMUP_BARS, chunked, performance
+from feature_store import feature_store, stack_features
+
+INITIAL_CASH = 100000.0  # a new paper portfolio (execute_paper_trade)
+
+# AutoTradingConfig defaults (server.py); every sweep config starts from these
+BASE_CONFIG = {
+    'max_trade_amount': 1000.0,
+    'max_daily_trades': 5,
+    'max_total_investment': 10000.0,
+    'stop_loss_percent': 5.0,
+    'take_profit_percent': 10.0,
+    'min_confidence': 70,
+}
+
+DEFAULT_GRID = {
+    'min_confidence': [50, 60, 70, 80],
+    'stop_loss_percent': [3.0, 5.0, 8.0],
+    'take_profit_percent': [5.0, 10.0, 20.0],
+    'max_trade_amount': [500.0, 1000.0, 2500.0],
+}
+
+OBJECTIVES = ('sharpe', 'total_return', 'cagr', 'max_drawdown')
+CLOSE, CONFIDENCE, SIGNAL = range(3)
+
+# ---------- configs ----------
+
+def config_id(params: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+def grid_configs(grid: Dict[str, Sequence], samples: Optional[int] = None, seed: int = 0) -> List[Dict[str, Any]]:
+    """Every combination of the grid on top of BASE_CONFIG, or `samples` distinct
+    combinations drawn at random (the same ones for the same seed)"""
+    names = sorted(grid)
+    sizes = [len(grid[name]) for name in names]
+    total = int(np.prod(sizes)) if names else 1
+    if samples is not None and samples < total:
+        picks = np.sort(np.random.default_rng(seed).choice(total, size=samples, replace=False))
+        combos = [np.unravel_index(int(i), sizes) for i in picks] if names else [()]
+    else:
+        combos = list(itertools.product(*(range(n) for n in sizes)))
+    return [{**BASE_CONFIG, **{name: grid[name][int(i)] for name, i in zip(names, combo)}} for combo in combos]
+
+def parse_grid(items: Sequence[str]) -> Dict[str, List]:
+    """name=v1,v2,... overrides of DEFAULT_GRID (values cast like BASE_CONFIG)"""
+    grid = {name: list(values) for name, values in DEFAULT_GRID.items()}
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in BASE_CONFIG:
+            raise ValueError(f"Unknown AutoTradingConfig field '{name}', expected one of {sorted(BASE_CONFIG)}")
+        kind = type(BASE_CONFIG[name])
+        grid[name] = [kind(v) for v in values.split(',') if v]
+    return grid
+
+# ---------- price matrix ----------
+
+def build_matrix(symbols: Sequence[str], period: str, strategy: str,
+                 warmup: int = WARMUP_BARS) -> Tuple[np.ndarray, np.ndarray, List[str], List[str]]:
+    """(3, symbols, bars) close / confidence / signal on the union of the symbols' bar dates,
+    plus the dates (epoch seconds), kept and skipped symbols"""
+    kept, skipped, parts = [], [], []
+    for group in chunked(symbols):
+        tables = []
+        for symbol in group:
+            rows = feature_store.get_rows(symbol, period=period)
+            if len(rows) <= warmup:
+                skipped.append(symbol)
+                continue
+            kept.append(symbol)
+            tables.append(rows)
+        if not tables:
+            continue
+        days = max(len(t) for t in tables)
+        ind, _ = stack_features(tables, days)
+        bars = np.cumsum(~np.isnan(ind.close), axis=1)
+        confidence, signal = SIGNAL_RULES[strategy](ind, bars)
+        signal = np.where(bars >= warmup, signal, 0)
+        for row, rows in enumerate(tables):
+            n = min(len(rows), days)
+            parts.append((rows[-n:, 0], ind.close[row, -n:], confidence[row, -n:], signal[row, -n:]))
+
+    times = np.unique(np.concatenate([p[0] for p in parts])) if parts else np.empty(0)
+    matrix = np.full((3, len(kept), len(times)), np.nan)
+    for row, (bar_times, close, confidence, signal) in enumerate(parts):
+        index = np.searchsorted(times, bar_times)
+        matrix[CLOSE, row, index] = close
+        matrix[CONFIDENCE, row, index] = confidence
+        matrix[SIGNAL, row, index] = signal
+    return matrix, times, kept, skipped
+
+def folds(bars: int, n_folds: int, train_bars: int) -> List[Tuple[int, int, int, int]]:
+    """(train start, train end, test start, test end) bar ranges, test windows tiling
+    the history after the first `train_bars`"""
+    test = (bars - train_bars) // n_folds
+    if test < 2:
+        raise ValueError(f"{bars} bars cannot hold {n_folds} folds after {train_bars} training bars")
+    return [(start - train_bars, start, start, start + test)
+            for start in (train_bars + i * test for i in range(n_folds))]
+
+# ---------- replay ----------
+
+def replay(close: np.ndarray, confidence: np.ndarray, signal: np.ndarray, params: Dict[str, Any],
+           cost: float = 0.0, lag: int = 1) -> Tuple[np.ndarray, int]:
+    """Daily portfolio equity of the auto-trader running `params`, and its number of trades;
+    signals from bar t - lag act at bar t's close"""
+    n_symbols, n_bars = close.shape
+    max_trade = float(params['max_trade_amount'])
+    max_daily = int(params['max_daily_trades'])
+    max_total = float(params['max_total_investment'])
+    stop_loss = float(params['stop_loss_percent'])
+    take_profit = float(params['take_profit_percent'])
+    min_confidence = float(params['min_confidence'])
+
+    cash = INITIAL_CASH
+    quantity = np.zeros(n_symbols)
+    entry = np.zeros(n_symbols)
+    last = np.full(n_symbols, np.nan)
+    equity = np.empty(n_bars)
+    trades = 0
+    for t in range(n_bars):
+        price = close[:, t]
+        has_bar = ~np.isnan(price)
+        last = np.where(has_bar, price, last)
+        if t >= lag:
+            confident = has_bar & (confidence[:, t - lag] >= min_confidence)
+            sig = signal[:, t - lag]
+            held = quantity > 0
+
+            # Exits: SELL signal, else stop-loss / take-profit against the entry price
+            with np.errstate(divide='ignore', invalid='ignore'):
+                change = (price - entry) / entry * 100
+            exits = confident & held & ((sig < 0) | (change <= -stop_loss) | (change >= take_profit))
+            sold = int(np.count_nonzero(exits))
+            if sold:
+                proceeds = float(np.sum(quantity[exits] * price[exits]))
+                cash += proceeds * (1.0 - cost)
+                quantity[exits] = 0.0
+                entry[exits] = 0.0
+                trades += sold
+
+            # Entries in symbol order, each within the daily count, total investment and cash
+            with np.errstate(divide='ignore', invalid='ignore'):
+                shares = np.floor(max_trade / price)
+            candidates = np.flatnonzero(confident & ~held & (sig > 0) & (shares >= 1))
+            slots = max_daily - sold
+            if len(candidates) and slots > 0:
+                amounts = shares[candidates] * price[candidates]
+                room = max_total - float(np.sum(quantity * entry))
+                while slots > 0 and len(candidates):
+                    fits = (amounts <= room) & (amounts * (1.0 + cost) <= cash)
+                    if not fits.any():
+                        break
+                    k = int(np.argmax(fits))
+                    symbol = candidates[k]
+                    quantity[symbol] = shares[symbol]
+                    entry[symbol] = price[symbol]
+                    room -= amounts[k]
+                    cash -= amounts[k] * (1.0 + cost)
+                    slots -= 1
+                    trades += 1
+                    candidates, amounts = candidates[k + 1:], amounts[k + 1:]
+        equity[t] = cash + float(np.nansum(quantity * last))
+    return equity, trades
+
+def score(equity: np.ndarray, start: int, end: int) -> Dict[str, float]:
+    """performance() of the equity curve's daily returns over bars [start, end); idle paper
+    cash earns nothing, so the Sharpe ratio is not taken over a risk-free rate"""
+    returns = equity[max(start, 1):end] / equity[max(start, 1) - 1:end - 1] - 1.0
+    return {name: round(float(values[0]), 4) for name, values in performance(returns[None, :], 0.0).items()}
+
+# ---------- workers ----------
+
+_matrix: Optional[np.ndarray] = None
+_settings: Dict[str, Any] = {}
+
+def _init_worker(path: str, shape: Tuple[int, int, int], settings: Dict[str, Any]):
+    """Map the shared price matrix read-only, once per worker process"""
+    global _matrix, _settings
+    _matrix = np.memmap(path, dtype=np.float64, mode='r', shape=shape)
+    _settings = settings
+
+def evaluate_config(params: Dict[str, Any]) -> Dict[str, Any]:
+    """One config over the whole history, scored in full and on every fold"""
+    started = time.perf_counter()
+    equity, trades = replay(_matrix[CLOSE], _matrix[CONFIDENCE], _matrix[SIGNAL], params,
+                            _settings['cost'], _settings['lag'])
+    return {
+        'id': config_id(params),
+        'params': params,
+        'trades': trades,
+        'full': score(equity, 0, len(equity)),
+        'folds': [{'train': score(equity, a, b), 'test': score(equity, c, d)}
+                  for a, b, c, d in _settings['folds']],
+        'elapsed': round(time.perf_counter() - started, 3)
+    }
+
+# ---------- sweeps ----------
+
+class Sweep:
+    """One sweep directory: frozen price matrix, config list and appended results"""
+
+    def __init__(self, symbols: Sequence[str], period: str = '10y', strategy: str = 'stock',
+                 grid: Optional[Dict[str, Sequence]] = None, samples: Optional[int] = None, seed: int = 0,
+                 n_folds: int = 5, train_bars: int = 504, fee_bps: Optional[float] = None,
+                 slippage_bps: Optional[float] = None, lag: int = 1, root: Optional[str] = None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {list(STRATEGIES)}")
+        self.spec = {
+            'symbols': list(dict.fromkeys(s.upper() for s in symbols)),
+            'period': period,
+            'strategy': strategy,
+            'grid': {name: list(values) for name, values in sorted((grid or DEFAULT_GRID).items())},
+            'samples': samples,
+            'seed': seed,
+            'folds': n_folds,
+            'train_bars': train_bars,
+            'fee_bps': trading_config.BACKTEST_FEE_BPS if fee_bps is None else fee_bps,
+            'slippage_bps': trading_config.BACKTEST_SLIPPAGE_BPS if slippage_bps is None else slippage_bps,
+            'lag': lag
+        }
+        self.id = hashlib.sha1(json.dumps(self.spec, sort_keys=True).encode()).hexdigest()[:12]
+        self.dir = Path(root or trading_config.SWEEP_DIR) / self.id
+        self.matrix_path = self.dir / 'matrix.f64'
+        self.meta_path = self.dir / 'sweep.json'
+        self.results_path = self.dir / 'results.jsonl'
+        self.configs = grid_configs(self.spec['grid'], samples, seed)
+
+    def prepare(self, fresh: bool = False) -> Dict[str, Any]:
+        """Write (or reuse) the frozen price matrix; returns the sweep metadata"""
+        if fresh:
+            for path in (self.matrix_path, self.meta_path, self.results_path):
+                path.unlink(missing_ok=True)
+        if self.meta_path.exists() and self.matrix_path.exists():
+            with open(self.meta_path) as f:
+                return json.load(f)
+
+        matrix, times, kept, skipped = build_matrix(self.spec['symbols'], self.spec['period'], self.spec['strategy'])
+        if not kept:
+            raise ValueError(f"No stored history for any of the symbols (skipped: {skipped})")
+        fold_ranges = folds(len(times), self.spec['folds'], self.spec['train_bars'])
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.matrix_path.with_suffix('.tmp')
+        matrix.tofile(tmp)
+        os.replace(tmp, self.matrix_path)
+        meta = {
+            'id': self.id,
+            'spec': self.spec,
+            'shape': list(matrix.shape),
+            'kept': kept,
+            'skipped': skipped,
+            'times': times.tolist(),
+            'fold_ranges': fold_ranges,
+            'created_at': time.time()
+        }
+        tmp = self.meta_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.meta_path)  # written last: a sweep with metadata has a complete matrix
+        return meta
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        """Evaluated configs by id (a line cut short by an interruption is ignored)"""
+        done = {}
+        try:
+            with open(self.results_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    done[record['id']] = record
+        except FileNotFoundError:
+            pass
+        return done
+
+    def _drop_partial_line(self):
+        """Cut a result line an interruption left unfinished, so appends start on a fresh line"""
+        try:
+            with open(self.results_path, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    f.truncate(data.rfind(b'\n') + 1)
+        except FileNotFoundError:
+            pass
+
+    def pending(self) -> List[Dict[str, Any]]:
+        done = self.results()
+        return [params for params in self.configs if config_id(params) not in done]
+
+    def run(self, workers: Optional[int] = None, fresh: bool = False, progress: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Evaluate every config not in results.jsonl yet over a process pool sharing the matrix"""
+        meta = self.prepare(fresh)
+        todo = self.pending()
+        settings = {
+            'cost': (self.spec['fee_bps'] + self.spec['slippage_bps']) / 1e4,
+            'lag': self.spec['lag'],
+            'folds': meta['fold_ranges']
+        }
+        initargs = (str(self.matrix_path), tuple(meta['shape']), settings)
+        workers = min(trading_config.BACKTEST_WORKERS if workers is None else workers, len(todo))
+        started = time.perf_counter()
+
+        self._drop_partial_line()
+        with open(self.results_path, 'a') as out:
+            def record(result: Dict[str, Any], done: int):
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+                os.fsync(out.fileno())
+                if progress:
+                    print(f"  [{done}/{len(todo)}] {result['id']} sharpe {result['full']['sharpe']:.3f} "
+                          f"({time.perf_counter() - started:.1f}s)")
+
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+                    futures = [executor.submit(evaluate_config, params) for params in todo]
+                    try:
+                        for done, future in enumerate(as_completed(futures), 1):
+                            record(future.result(), done)
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+            else:
+                _init_worker(*initargs)
+                for done, params in enumerate(todo, 1):
+                    record(evaluate_config(params), done)
+        return self.results()
+
+    def report(self, objective: str = 'sharpe', top_k: int = 10) -> Dict[str, Any]:
+        """Configs ranked by mean test score, and the walk-forward pick of each fold"""
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}', expected one of {list(OBJECTIVES)}")
+        wanted = {config_id(params) for params in self.configs}
+        records = [r for r in self.results().values() if r['id'] in wanted]
+        if not records:
+            return {'sweep': self.id, 'evaluated': 0, 'configs': len(self.configs)}
+
+        def fold_values(split: str) -> np.ndarray:
+            return np.array([[fold[split][objective] for fold in r['folds']] for r in records], dtype=np.float64)
+
+        train, test = fold_values('train'), fold_values('test')
+        mean_test = np.nanmean(test, axis=1)
+        ranking = [{**records[i], 'mean_test': round(float(mean_test[i]), 4)}
+                   for i in np.argsort(-np.nan_to_num(mean_test, nan=-np.inf), kind='stable')[:top_k]]
+
+        walk_forward = []
+        growth = 1.0
+        for fold in range(train.shape[1]):
+            best = int(np.argmax(np.nan_to_num(train[:, fold], nan=-np.inf)))
+            result = records[best]['folds'][fold]
+            growth *= 1.0 + result['test']['total_return'] / 100
+            walk_forward.append({'fold': fold, 'params': records[best]['params'], **result})
+        return {
+            'sweep': self.id,
+            'evaluated': len(records),
+            'configs': len(self.configs),
+            'objective': objective,
+            'ranking': ranking,
+            'walk_forward': walk_forward,
+            'walk_forward_return': round((growth - 1.0) * 100, 4),
+            'walk_forward_mean_test': round(float(np.mean([f['test'][objective] for f in walk_forward])), 4)
+        }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Walk-forward sweep of AutoTradingConfig values over stored history')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--period', default='10y')
+    parser.add_argument('--strategy', default='stock', choices=STRATEGIES,
+                        help="signals the trader acts on ('stock' = analyze_stock, what the auto-trader uses)")
+    parser.add_argument('--grid', nargs='*', default=[], metavar='FIELD=V1,V2',
+                        help=f"override grid values (default grid: {DEFAULT_GRID})")
+    parser.add_argument('--random', type=int, default=None, metavar='N', help='evaluate N random grid points')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--train-bars', type=int, default=504, help='bars before each test window used to pick a config')
+    parser.add_argument('--fee-bps', type=float, default=None)
+    parser.add_argument('--slippage-bps', type=float, default=None)
+    parser.add_argument('--lag', type=int, default=1)
+    parser.add_argument('--objective', default='sharpe', choices=OBJECTIVES)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--fresh', action='store_true', help='discard stored results and the frozen matrix')
+    parser.add_argument('--prefetch', action='store_true', help='download missing history first')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.prefetch:
+        from ohlcv_store import ohlcv_store
+        ohlcv_store.prefetch([s.upper() for s in args.symbols], args.period)
+    sweep = Sweep(args.symbols, args.period, args.strategy, parse_grid(args.grid), args.random, args.seed,
+                  args.folds, args.train_bars, args.fee_bps, args.slippage_bps, args.lag)
+    sweep.prepare(args.fresh)
+    print(f"sweep {sweep.id}: {len(sweep.configs)} configs, {len(sweep.pending())} to evaluate ({sweep.dir})")
+    sweep.run(args.workers, progress=True)
+    report = sweep.report(args.objective, args.top)
+    print(f"top {args.top} by mean test {args.objective}:")
+    for entry in report['ranking']:
+        print(f"  {entry['mean_test']:9.4f}  trades {entry['trades']:5d}  {entry['params']}")
+    print("walk-forward (best train config per fold):")
+    for fold in report['walk_forward']:
+        print(f"  fold {fold['fold']}: test {args.objective} {fold['test'][args.objective]:.4f}  {fold['params']}")
+    print(f"walk-forward test return {report['walk_forward_return']:.2f}%, "
+          f"mean test {args.objective} {report['walk_forward_mean_test']:.4f}")
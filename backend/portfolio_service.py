@@ -4,6 +4,7 @@ from trading_config import trading_config
 from coinbase_service import coinbase_service
 from binance_service import binance_service
 from market_data_service import market_data_service
+from ticker_stream import ticker_stream
 import logging
 from typing import Dict, List
 from datetime import datetime
@@ -33,35 +34,48 @@ class PortfolioService:
         }
         
         # Get Coinbase balances
-        if coinbase_service.enabled:
+        if coinbase_service.readable:
             cb_accounts = await coinbase_service.get_accounts()
             balances['coinbase'] = cb_accounts
         
         # Get Binance balances
-        if binance_service.enabled:
+        if binance_service.readable:
             bn_info = await binance_service.get_account_info()
             if 'balances' in bn_info:
                 balances['binance'] = bn_info['balances']
         
         # Calculate total USD value
         total_value = 0
+        stablecoins = {'USD', 'USDT', 'USDC', 'BUSD'}
+        
+        # Streamed prices first, then one batched round-trip for the rest
+        assets = [acc['currency'] for acc in balances['coinbase'] if acc['currency'] not in stablecoins]
+        assets += [bal['asset'] for bal in balances['binance'] if bal['asset'] not in stablecoins]
+        prices = {}
+        for asset in assets:
+            ticker_stream.subscribe_asset(asset)
+            streamed = ticker_stream.get_usd_price(asset)
+            if streamed:
+                prices[asset] = {'symbol': asset, 'primary_price': streamed, 'source': 'stream'}
+        unpriced = [asset for asset in assets if asset not in prices]
+        if unpriced:
+            prices.update(await market_data_service.get_aggregated_prices(unpriced, 'crypto'))
         
         # Coinbase balances (already in USD terms mostly)
         for acc in balances['coinbase']:
-            if acc['currency'] == 'USD' or acc['currency'] == 'USDT' or acc['currency'] == 'USDC':
+            if acc['currency'] in stablecoins:
                 total_value += acc['available_balance']
             else:
-                # Get crypto price
-                price_data = await market_data_service.get_aggregated_price(acc['currency'], 'crypto')
+                price_data = prices.get(acc['currency']) or {}
                 if price_data.get('primary_price'):
                     total_value += acc['available_balance'] * price_data['primary_price']
         
         # Binance balances
         for bal in balances['binance']:
-            if bal['asset'] in ['USDT', 'USDC', 'BUSD']:
+            if bal['asset'] in stablecoins:
                 total_value += bal['total']
             else:
-                price_data = await market_data_service.get_aggregated_price(bal['asset'], 'crypto')
+                price_data = prices.get(bal['asset']) or {}
                 if price_data.get('primary_price'):
                     total_value += bal['total'] * price_data['primary_price']
         
@@ -94,15 +108,18 @@ class PortfolioService:
     async def calculate_position_profit(self, symbol: str, exchange: str, entry_price: float) -> Dict:
         """Calculate current profit/loss for a position"""
         try:
-            # Get current price
-            if exchange == 'coinbase':
-                product_info = await coinbase_service.get_product_info(symbol)
-                current_price = product_info.get('price', 0)
-            elif exchange == 'binance':
-                price_info = await binance_service.get_symbol_price(symbol)
-                current_price = price_info.get('price', 0)
-            else:
-                return {'error': 'Unknown exchange'}
+            # Get current price (streamed ticker if fresh, REST otherwise)
+            ticker_stream.subscribe(exchange, [symbol])
+            current_price = ticker_stream.get_price(exchange, symbol)
+            if not current_price:
+                if exchange == 'coinbase':
+                    product_info = await coinbase_service.get_product_info(symbol)
+                    current_price = product_info.get('price', 0)
+                elif exchange == 'binance':
+                    price_info = await binance_service.get_symbol_price(symbol)
+                    current_price = price_info.get('price', 0)
+                else:
+                    return {'error': 'Unknown exchange'}
             
             if current_price > 0:
                 profit_percent = ((current_price - entry_price) / entry_price) * 100
@@ -176,6 +193,8 @@ class PortfolioService:
         """Enable automatic profit taking for specified positions"""
         self.auto_profit_enabled = True
         self.monitoring_positions = {pos['symbol']: pos for pos in positions}
+        for pos in positions:
+            ticker_stream.subscribe(pos.get('exchange', ''), [pos['symbol']])
         logger.info(f"Auto profit-taking enabled for {len(positions)} positions")
     
     async def disable_auto_profit_taking(self):
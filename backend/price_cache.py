@@ -0,0 +1,191 @@
+"""In-process Price Cache - per-asset-type TTL, LRU eviction, single-flight fetches"""
+from trading_config import trading_config
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class PriceCache:
+    """LRU cache of aggregated prices keyed by (asset_type, symbol)
+
+    Concurrent misses for the same key share a single upstream fetch
+    (single-flight); the followers are counted as ``coalesced``. If the
+    leader is cancelled (its client went away) the followers fetch again.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: Optional[int] = None):
+        self.ttls = ttls or {
+            'crypto': trading_config.PRICE_CACHE_TTL_CRYPTO,
+            'stock': trading_config.PRICE_CACHE_TTL_STOCK
+        }
+        self.default_ttl = trading_config.PRICE_CACHE_TTL_DEFAULT
+        self.max_entries = max_entries or trading_config.PRICE_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(symbol: str, asset_type: str) -> Tuple[str, str]:
+        return (asset_type, symbol.upper())
+
+    def ttl_for(self, asset_type: str) -> float:
+        return self.ttls.get(asset_type, self.default_ttl)
+
+    def get(self, symbol: str, asset_type: str) -> Optional[Any]:
+        """Return a fresh cached value or None (does not touch the counters)"""
+        key = self._key(symbol, asset_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, symbol: str, asset_type: str, value: Any, ttl: Optional[float] = None):
+        key = self._key(symbol, asset_type)
+        ttl = self.ttl_for(asset_type) if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, symbol: str, asset_type: str):
+        self._entries.pop(self._key(symbol, asset_type), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_fetch(self, symbol: str, asset_type: str,
+                           fetcher: Callable[[], Awaitable[Any]],
+                           cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        """Serve from cache, join an in-flight fetch, or fetch and cache"""
+        value = self.get(symbol, asset_type)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        key = self._key(symbol, asset_type)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # this caller was cancelled
+                # The leader was cancelled: take over the fetch
+                return await self.get_or_fetch(symbol, asset_type, fetcher, cacheable)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetcher()
+            if cacheable(value):
+                self.put(symbol, asset_type, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Followers get the exception; mark it retrieved so an
+            # unobserved future does not log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_fetch_many(self, symbols: List[str], asset_type: str,
+                                batch_fetcher: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+                                cacheable: Callable[[Any], bool] = lambda value: True) -> Dict[str, Any]:
+        """Batched variant of get_or_fetch - all misses go to one batch_fetcher call
+
+        Misses are registered as in-flight before the batch is sent, so single
+        lookups (and other batches) for the same symbols join it instead of
+        issuing their own upstream calls.
+        """
+        results: Dict[str, Any] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        missing: List[Tuple[str, Tuple[str, str], asyncio.Future]] = []
+        loop = asyncio.get_running_loop()
+
+        for symbol in dict.fromkeys(symbols):
+            value = self.get(symbol, asset_type)
+            if value is not None:
+                self.hits += 1
+                results[symbol] = value
+                continue
+
+            key = self._key(symbol, asset_type)
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.coalesced += 1
+                waiting[symbol] = inflight
+                continue
+
+            self.misses += 1
+            future = loop.create_future()
+            self._inflight[key] = future
+            missing.append((symbol, key, future))
+
+        if missing:
+            try:
+                fetched = await batch_fetcher([symbol for symbol, _, _ in missing])
+                for symbol, _, future in missing:
+                    value = fetched.get(symbol)
+                    if value is not None and cacheable(value):
+                        self.put(symbol, asset_type, value)
+                    future.set_result(value)
+                    results[symbol] = value
+            except asyncio.CancelledError:
+                for _, _, future in missing:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, _, future in missing:
+                    future.set_exception(e)
+                    future.exception()
+                raise
+            finally:
+                for _, key, _ in missing:
+                    self._inflight.pop(key, None)
+
+        retry = []
+        for symbol, future in waiting.items():
+            try:
+                results[symbol] = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this caller was cancelled
+                retry.append(symbol)
+        if retry:
+            # Their leader was cancelled: fetch them in a batch of our own
+            results.update(await self.get_or_fetch_many(retry, asset_type, batch_fetcher, cacheable))
+
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'inflight': len(self._inflight),
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            'ttl_seconds': dict(self.ttls)
+        }
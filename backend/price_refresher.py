@@ -0,0 +1,160 @@
+"""Background Price Refresher - keeps recently requested (hot) symbols warm in memory"""
+from trading_config import trading_config
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BatchFetcher = Callable[[List[str], str], Awaitable[Dict[str, Dict]]]
+
+class PriceRefresher:
+    """Supervised asyncio task that re-prices the hot set on a fixed cadence
+
+    Every symbol served through MarketDataService is touched here. Symbols
+    requested within HOT_SET_TTL seconds are refreshed in one batch per asset
+    type every PRICE_REFRESH_INTERVAL seconds, so a request for a hot symbol
+    is answered from memory. Cold symbols fall back to on-demand fetches.
+    """
+
+    def __init__(self, fetch_batch: BatchFetcher):
+        self.fetch_batch = fetch_batch
+        self.interval = trading_config.PRICE_REFRESH_INTERVAL
+        self.hot_ttl = trading_config.PRICE_HOT_SET_TTL
+        self.max_symbols = trading_config.PRICE_HOT_SET_MAX
+        self.max_age = trading_config.PRICE_SNAPSHOT_MAX_AGE
+        self.max_tracked = 4 * self.max_symbols  # room for every asset type's refreshed top max_symbols
+        self._hot: Dict[Tuple[str, str], float] = {}  # in touch order, oldest first
+        self._snapshots: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.failures = 0
+        self.restarts = 0
+        self.served = 0
+        self.last_cycle_at: Optional[str] = None
+        self.last_cycle_seconds = 0.0
+
+    @staticmethod
+    def _key(symbol: str, asset_type: str) -> Tuple[str, str]:
+        return (asset_type, symbol.upper())
+
+    def touch(self, symbol: str, asset_type: str):
+        """Record a request for a symbol (keeps it in the hot set)"""
+        key = self._key(symbol, asset_type)
+        self._hot.pop(key, None)
+        self._hot[key] = time.monotonic()
+        self._prune()
+
+    def _prune(self):
+        """Drop symbols not requested within HOT_SET_TTL, and the oldest beyond
+        max_tracked, so arbitrary requested symbols cannot grow the table"""
+        cutoff = time.monotonic() - self.hot_ttl
+        while self._hot:
+            key, seen = next(iter(self._hot.items()))
+            if seen >= cutoff and len(self._hot) <= self.max_tracked:
+                break
+            del self._hot[key]
+            self._snapshots.pop(key, None)
+
+    def hot_set(self) -> Dict[str, List[str]]:
+        """Hot symbols grouped by asset type, most recently requested first"""
+        self._prune()
+
+        grouped: Dict[str, List[str]] = {}
+        for (asset_type, symbol), _ in sorted(self._hot.items(), key=lambda item: item[1], reverse=True):
+            symbols = grouped.setdefault(asset_type, [])
+            if len(symbols) < self.max_symbols:
+                symbols.append(symbol)
+        return grouped
+
+    def store(self, symbol: str, asset_type: str, value: Dict):
+        self._snapshots[self._key(symbol, asset_type)] = (time.time(), value)
+
+    def get(self, symbol: str, asset_type: str) -> Optional[Dict]:
+        """Serve the in-memory snapshot with its freshness, or None if missing/too old"""
+        snapshot = self._snapshots.get(self._key(symbol, asset_type))
+        if snapshot is None:
+            return None
+        refreshed_at, value = snapshot
+        age = time.time() - refreshed_at
+        if age > self.max_age:
+            return None
+        self.served += 1
+        return {
+            **value,
+            'as_of': datetime.fromtimestamp(refreshed_at, timezone.utc).isoformat(),
+            'age_seconds': round(age, 3)
+        }
+
+    async def refresh_once(self):
+        """Re-price the whole hot set (one batch per asset type)"""
+        started = time.monotonic()
+        for asset_type, symbols in self.hot_set().items():
+            if not symbols:
+                continue
+            try:
+                results = await self.fetch_batch(symbols, asset_type)
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Price refresh failed for {len(symbols)} {asset_type} symbols: {e}")
+                continue
+            for symbol, value in results.items():
+                if value is not None:
+                    self.store(symbol, asset_type, value)
+        self.cycles += 1
+        self.last_cycle_seconds = round(time.monotonic() - started, 3)
+        self.last_cycle_at = datetime.now(timezone.utc).isoformat()
+
+    async def _run(self):
+        while True:
+            await self.refresh_once()
+            await asyncio.sleep(self.interval)
+
+    async def _supervise(self):
+        """Restart the refresh loop with backoff if it ever dies"""
+        backoff = 1.0
+        while True:
+            try:
+                await self._run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.restarts += 1
+                logger.error(f"Price refresher crashed ({e}) - restarting in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def start(self):
+        """Start the background task (FastAPI startup)"""
+        if not trading_config.PRICE_REFRESHER_ENABLED:
+            logger.info("Price refresher disabled")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._supervise())
+            logger.info(f"Price refresher started (every {self.interval}s, hot TTL {self.hot_ttl}s)")
+
+    async def stop(self):
+        """Stop the background task (FastAPI shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'interval_seconds': self.interval,
+            'hot_symbols': {asset_type: len(symbols) for asset_type, symbols in self.hot_set().items()},
+            'snapshots': len(self._snapshots),
+            'served_from_memory': self.served,
+            'cycles': self.cycles,
+            'failures': self.failures,
+            'restarts': self.restarts,
+            'last_cycle_at': self.last_cycle_at,
+            'last_cycle_seconds': self.last_cycle_seconds
+        }
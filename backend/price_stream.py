@@ -0,0 +1,255 @@
+"""Price Stream Hub - one upstream refresh per symbol, delta fan-out to every client
+
+Browsers subscribe over the /api/trading/stream WebSocket instead of polling:
+
+    -> {"action": "subscribe", "symbols": ["BTC", "ETH"], "asset_type": "crypto", "portfolio": true}
+    -> {"action": "unsubscribe", "symbols": ["ETH"], "portfolio": false}
+    <- {"type": "snapshot", "prices": {"BTC": {...}}, "portfolio": {...}}
+    <- {"type": "delta", "prices": {"BTC": {"primary_price": 67012.5, "as_of": ...}}}
+
+The hub refreshes the union of all subscriptions once per interval and sends
+each client only the fields that changed for the topics it follows.
+"""
+from trading_config import trading_config
+from rate_limiter import Priority
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fields that move on every refresh without the value itself changing
+VOLATILE_FIELDS = {'timestamp', 'as_of', 'age_seconds'}
+
+Topic = Tuple[str, str]  # (asset_type, SYMBOL)
+
+def _stable(value: Any) -> Any:
+    """Value with volatile fields stripped, for change detection"""
+    if isinstance(value, dict):
+        return {key: _stable(item) for key, item in value.items() if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_stable(item) for item in value]
+    return value
+
+def diff(old: Optional[Dict], new: Dict) -> Dict:
+    """Changed fields of `new` relative to `old` ({} if nothing meaningful changed)
+
+    Nested dicts are diffed recursively, lists are sent whole when they change.
+    """
+    if old is None:
+        return new
+    changed = {}
+    for key, value in new.items():
+        if key in VOLATILE_FIELDS:
+            continue
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = diff(previous, value)
+            if nested:
+                changed[key] = nested
+        elif _stable(previous) != _stable(value):
+            changed[key] = value
+    if changed:
+        changed.update({key: new[key] for key in VOLATILE_FIELDS if key in new})
+    return changed
+
+class StreamClient:
+    """One connected browser: its topics and a bounded outbound queue"""
+
+    def __init__(self, client_id: int, queue_size: int):
+        self.id = client_id
+        self.topics: Set[Topic] = set()
+        self.portfolio = False
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resync = False  # a message was dropped - next send is a full snapshot
+        self.sent = 0
+        self.dropped = 0
+
+class PriceStreamHub:
+    """Owns the subscriptions, the single upstream loop and the last published values"""
+
+    def __init__(self, fetch_prices: Callable[[list, str, Priority], Awaitable[Dict[str, Dict]]],
+                 fetch_portfolio: Callable[[], Awaitable[Dict]]):
+        self.fetch_prices = fetch_prices
+        self.fetch_portfolio = fetch_portfolio
+        self.interval = trading_config.PRICE_STREAM_INTERVAL
+        self.portfolio_interval = trading_config.PORTFOLIO_STREAM_INTERVAL
+        self.queue_size = trading_config.PRICE_STREAM_QUEUE_SIZE
+        self.max_symbols = trading_config.PRICE_STREAM_MAX_SYMBOLS
+        self.clients: Dict[int, StreamClient] = {}
+        self.prices: Dict[Topic, Dict] = {}
+        self.portfolio: Optional[Dict] = None
+        self._portfolio_at = 0.0
+        self._next_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.upstream_refreshes = 0
+        self.deltas_published = 0
+
+    # ---------- clients ----------
+
+    def connect(self) -> StreamClient:
+        self._next_id += 1
+        client = StreamClient(self._next_id, self.queue_size)
+        self.clients[client.id] = client
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return client
+
+    def disconnect(self, client: StreamClient):
+        self.clients.pop(client.id, None)
+
+    def send(self, client: StreamClient, message: Dict):
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: drop, and resend everything it follows once it catches up
+            client.dropped += 1
+            client.resync = True
+
+    async def pump(self, client: StreamClient, send: Callable[[Dict], Awaitable[None]]):
+        """Drain a client's queue into its socket until cancelled"""
+        while True:
+            message = await client.queue.get()
+            await send(message)
+            client.sent += 1
+
+    def snapshot_for(self, client: StreamClient, topics: Optional[Set[Topic]] = None,
+                     portfolio: bool = False) -> Dict:
+        topics = client.topics if topics is None else topics
+        message: Dict[str, Any] = {
+            'type': 'snapshot',
+            'prices': {symbol: self.prices[(asset_type, symbol)]
+                       for asset_type, symbol in topics if (asset_type, symbol) in self.prices}
+        }
+        if portfolio and self.portfolio is not None:
+            message['portfolio'] = self.portfolio
+        return message
+
+    def handle(self, client: StreamClient, request: Dict) -> Optional[Dict]:
+        """Apply a subscribe/unsubscribe message; returns a reply for the client"""
+        action = request.get('action')
+        asset_type = request.get('asset_type', 'crypto')
+        requested = request.get('symbols', [])
+        if not isinstance(asset_type, str):
+            return {'type': 'error', 'error': "asset_type must be a string"}
+        if not isinstance(requested, list) or not all(isinstance(s, str) for s in requested):
+            # A bare "BTC" would otherwise subscribe B, T and C
+            return {'type': 'error', 'error': "symbols must be a list of strings"}
+        symbols = {s.strip().upper() for s in requested if s.strip()}
+        topics = {(asset_type, symbol) for symbol in symbols}
+
+        if action == 'subscribe':
+            new_topics = topics - client.topics
+            if len(client.topics | new_topics) > self.max_symbols:
+                return {'type': 'error', 'error': f"At most {self.max_symbols} symbols per connection"}
+            client.topics |= new_topics
+            new_portfolio = bool(request.get('portfolio')) and not client.portfolio
+            client.portfolio = client.portfolio or new_portfolio
+            if new_topics or new_portfolio:
+                self._wake.set()  # fetch anything nobody was following yet right away
+            return self.snapshot_for(client, new_topics, new_portfolio)
+
+        if action == 'unsubscribe':
+            client.topics -= topics
+            if request.get('portfolio') is False:
+                client.portfolio = False
+            return None
+
+        return {'type': 'error', 'error': f"Unknown action '{action}'"}
+
+    # ---------- upstream ----------
+
+    def _wanted(self) -> Dict[str, Set[str]]:
+        by_type: Dict[str, Set[str]] = {}
+        for client in self.clients.values():
+            for asset_type, symbol in client.topics:
+                by_type.setdefault(asset_type, set()).add(symbol)
+        return by_type
+
+    async def refresh_once(self):
+        """One upstream round for the union of subscriptions, then fan out deltas"""
+        changed_prices: Dict[Topic, Dict] = {}
+        for asset_type, symbols in self._wanted().items():
+            try:
+                quotes = await self.fetch_prices(sorted(symbols), asset_type, Priority.INTERACTIVE)
+            except Exception as e:
+                logger.warning(f"Price stream refresh failed for {asset_type}: {e}")
+                continue
+            self.upstream_refreshes += 1
+            for symbol, quote in quotes.items():
+                topic = (asset_type, symbol.upper())
+                delta = diff(self.prices.get(topic), quote)
+                self.prices[topic] = quote
+                if delta:
+                    changed_prices[topic] = delta
+
+        portfolio_delta: Dict = {}
+        if (any(client.portfolio for client in self.clients.values())
+                and (self.portfolio is None or time.monotonic() - self._portfolio_at >= self.portfolio_interval)):
+            self._portfolio_at = time.monotonic()
+            try:
+                portfolio = await self.fetch_portfolio()
+                portfolio_delta = diff(self.portfolio, portfolio)
+                self.portfolio = portfolio
+            except Exception as e:
+                logger.warning(f"Portfolio stream refresh failed: {e}")
+
+        if changed_prices or portfolio_delta:
+            self.deltas_published += 1
+        self._fan_out(changed_prices, portfolio_delta)
+
+    def _fan_out(self, changed_prices: Dict[Topic, Dict], portfolio_delta: Dict):
+        for client in list(self.clients.values()):
+            if client.resync and client.queue.empty():
+                client.resync = False
+                self.send(client, self.snapshot_for(client, portfolio=client.portfolio))
+                continue
+            message: Dict[str, Any] = {}
+            prices = {symbol: delta for (asset_type, symbol), delta in changed_prices.items()
+                      if (asset_type, symbol) in client.topics}
+            if prices:
+                message['prices'] = prices
+            if client.portfolio and portfolio_delta:
+                message['portfolio'] = portfolio_delta
+            if message:
+                message['type'] = 'delta'
+                self.send(client, message)
+
+    async def _run(self):
+        """Refresh loop; lives while at least one client is connected"""
+        while self.clients:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Price stream loop error: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+        # Nobody is listening - forget values so a later client starts fresh
+        self.prices.clear()
+        self.portfolio = None
+        self._portfolio_at = 0.0
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'clients': len(self.clients),
+            'topics': sum(len(symbols) for symbols in self._wanted().values()),
+            'portfolio_subscribers': sum(1 for client in self.clients.values() if client.portfolio),
+            'upstream_refreshes': self.upstream_refreshes,
+            'deltas_published': self.deltas_published,
+            'messages_sent': sum(client.sent for client in self.clients.values()),
+            'messages_dropped': sum(client.dropped for client in self.clients.values())
+        }
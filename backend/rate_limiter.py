@@ -0,0 +1,276 @@
+"""Provider Rate-Limit Scheduler - token buckets with daily budgets and priority queues
+
+A rate or daily limit of 0 means no limit. Calls counted against a daily cap
+are written to RATE_LIMIT_USAGE_PATH (debounced, off the event loop), so a
+restart resumes the UTC day's count instead of granting the whole quota again.
+"""
+from trading_config import trading_config
+from market_journal import market_journal
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """Lower value is served first when a provider budget is contended"""
+    TRADING = 0
+    INTERACTIVE = 1
+    BACKGROUND = 2
+
+# How long a caller is willing to queue for a token before giving up
+DEFAULT_MAX_WAIT = {
+    Priority.TRADING: 30.0,
+    Priority.INTERACTIVE: 10.0,
+    Priority.BACKGROUND: 3.0
+}
+
+class ProviderBudget:
+    """Per-minute token bucket plus an optional UTC-day call budget for one provider"""
+
+    def __init__(self, name: str, per_minute: float, per_day: int = 0):
+        if per_minute < 0 or per_day < 0:
+            raise ValueError(f"{name}: rate limits must be >= 0 (0 = no limit), got {per_minute}/min, {per_day}/day")
+        self.name = name
+        self.per_minute = per_minute  # 0 = no per-minute limit
+        self.per_day = per_day  # 0 = no daily cap
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.day = datetime.now(timezone.utc).date()
+        self.used_today = 0
+        self.blocked_until = 0.0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    def refill(self):
+        now = time.monotonic()
+        if self.per_minute:
+            self.tokens = min(float(self.per_minute), self.tokens + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+        today = datetime.now(timezone.utc).date()
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+
+    def daily_remaining(self) -> Optional[int]:
+        if not self.per_day:
+            return None
+        return max(0, self.per_day - self.used_today)
+
+    def seconds_until_day_reset(self) -> float:
+        now = datetime.now(timezone.utc)
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+        return (tomorrow - now).total_seconds()
+
+    def delay(self) -> float:
+        """Seconds until the next call is allowed (0 = now)"""
+        self.refill()
+        if self.daily_remaining() == 0:
+            return self.seconds_until_day_reset()
+        waits = [self.blocked_until - time.monotonic()]
+        if self.per_minute and self.tokens < 1:
+            waits.append((1 - self.tokens) * 60.0 / self.per_minute)
+        return max(0.0, *waits)
+
+    def take(self):
+        if self.per_minute:
+            self.tokens -= 1
+        self.used_today += 1
+        self.granted += 1
+
+class RateLimitScheduler:
+    """Queues calls per provider instead of burning quota on requests that will 429"""
+
+    def __init__(self, usage_path: Optional[str] = None):
+        self.usage_path = Path(usage_path or trading_config.RATE_LIMIT_USAGE_PATH)
+        self.providers: Dict[str, ProviderBudget] = {
+            'coingecko': ProviderBudget(
+                'coingecko',
+                trading_config.COINGECKO_RATE_PER_MINUTE,
+                trading_config.COINGECKO_DAILY_LIMIT
+            ),
+            'alphavantage': ProviderBudget(
+                'alphavantage',
+                trading_config.ALPHA_VANTAGE_RATE_PER_MINUTE,
+                trading_config.ALPHA_VANTAGE_DAILY_LIMIT
+            ),
+            'yahoo': ProviderBudget(
+                'yahoo',
+                trading_config.YAHOO_RATE_PER_MINUTE,
+                trading_config.YAHOO_DAILY_LIMIT
+            )
+        }
+        self._seq = itertools.count()
+        self.save_delay = trading_config.RATE_LIMIT_USAGE_SAVE_DELAY
+        self._usage_dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        self.load_usage()
+
+    # ---------- daily usage persistence ----------
+
+    def load_usage(self):
+        """Resume today's daily-cap counts from the last run"""
+        try:
+            with open(self.usage_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt rate-limit usage {self.usage_path}: {e}")
+            return
+        for name, budget in self.providers.items():
+            if budget.per_day and data.get('day') == budget.day.isoformat():
+                budget.used_today = max(budget.used_today, int(data.get('used', {}).get(name, 0)))
+
+    def _usage(self) -> Optional[Dict[str, Any]]:
+        """Today's counts of the providers with a daily cap (None if none has one)"""
+        capped = {name: budget for name, budget in self.providers.items() if budget.per_day}
+        if not capped:
+            return None
+        for budget in capped.values():
+            budget.refill()  # rolls every count over to the same UTC day
+        return {
+            'day': max(budget.day for budget in capped.values()).isoformat(),
+            'used': {name: budget.used_today for name, budget in capped.items()}
+        }
+
+    def _write_usage(self, usage: Dict[str, Any]):
+        try:
+            self.usage_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.usage_path.parent, prefix=self.usage_path.name, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(usage, f)
+            os.replace(tmp, self.usage_path)
+        except OSError as e:
+            logger.warning(f"Could not save rate-limit usage to {self.usage_path}: {e}")
+
+    def save_usage(self):
+        """Atomically write today's counts of the providers with a daily cap"""
+        usage = self._usage()
+        if usage is not None:
+            self._write_usage(usage)
+
+    async def _save_later(self):
+        """Write the counts once the calls of a save_delay window are in,
+        again if more arrived during the write"""
+        while self._usage_dirty:
+            await asyncio.sleep(self.save_delay)
+            self._usage_dirty = False
+            usage = self._usage()  # snapshot on the loop, write in a thread
+            if usage is not None:
+                await asyncio.to_thread(self._write_usage, usage)
+
+    def _take(self, budget: ProviderBudget):
+        budget.take()
+        if budget.per_day:
+            self._usage_dirty = True
+            if self._save_task is None or self._save_task.done():
+                self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+
+    async def stop(self):
+        """Write counts still waiting for their debounced save"""
+        if self._save_task is not None:
+            self._save_task.cancel()
+            try:
+                await self._save_task
+            except asyncio.CancelledError:
+                pass
+            self._save_task = None
+        if self._usage_dirty:
+            self._usage_dirty = False
+            await asyncio.to_thread(self.save_usage)
+
+    async def acquire(self, provider: str, priority: Priority = Priority.INTERACTIVE,
+                      max_wait: Optional[float] = None) -> bool:
+        """Wait for a call slot; False if none frees up within max_wait"""
+        budget = self.providers.get(provider)
+        if budget is None or market_journal.replaying:
+            # Replayed calls never reach the provider, so they cost no budget
+            return True
+
+        if max_wait is None:
+            max_wait = DEFAULT_MAX_WAIT[priority]
+
+        delay = budget.delay()
+        if not budget.waiters and delay == 0:
+            self._take(budget)
+            return True
+
+        if delay > max_wait and budget.daily_remaining() == 0:
+            # Daily quota is gone - queueing until midnight helps nobody
+            budget.rejected += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(budget.waiters, (int(priority), next(self._seq), future))
+        budget.queued += 1
+        if budget.dispatcher is None or budget.dispatcher.done():
+            budget.dispatcher = asyncio.create_task(self._dispatch(budget))
+
+        try:
+            return await asyncio.wait_for(future, timeout=max_wait)
+        except asyncio.TimeoutError:
+            budget.rejected += 1
+            logger.warning(f"{provider} budget exhausted - gave up after {max_wait:.0f}s ({priority.name})")
+            return False
+
+    async def _dispatch(self, budget: ProviderBudget):
+        """Hand out tokens to queued callers, highest priority first"""
+        while budget.waiters:
+            _, _, future = budget.waiters[0]
+            if future.done():
+                heapq.heappop(budget.waiters)
+                continue
+            delay = budget.delay()
+            if delay > 0:
+                # Re-check at least every second so a newly queued
+                # higher-priority caller is the one that gets the token
+                await asyncio.sleep(min(delay, 1.0))
+                continue
+            heapq.heappop(budget.waiters)
+            self._take(budget)
+            future.set_result(True)
+
+    def penalize(self, provider: str, retry_after: Optional[float] = None):
+        """Provider answered 429 - stop calling it for retry_after seconds"""
+        budget = self.providers.get(provider)
+        if budget is None:
+            return
+        budget.throttled += 1
+        budget.tokens = 0.0
+        budget.blocked_until = max(budget.blocked_until, time.monotonic() + (retry_after or 60.0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Remaining budget per provider (introspection endpoint)"""
+        result = {}
+        for name, budget in self.providers.items():
+            budget.refill()
+            result[name] = {
+                'per_minute': budget.per_minute,
+                'tokens_available': round(budget.tokens, 2) if budget.per_minute else None,
+                'daily_limit': budget.per_day or None,
+                'daily_used': budget.used_today,
+                'daily_remaining': budget.daily_remaining(),
+                'blocked_for_seconds': round(max(0.0, budget.blocked_until - time.monotonic()), 1),
+                'queued_now': sum(1 for _, _, future in budget.waiters if not future.done()),
+                'granted': budget.granted,
+                'queued_total': budget.queued,
+                'rejected': budget.rejected,
+                'throttled_429': budget.throttled
+            }
+        return result
+
+rate_limiter = RateLimitScheduler()
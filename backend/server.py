@@ -1,11 +1,12 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Request, Response, WebSocket, WebSocketDisconnect
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone
@@ -20,10 +21,18 @@ from PyPDF2 import PdfReader
 import io
 from bs4 import BeautifulSoup
 import re
-import yfinance as yf
-import numpy as np
-from sklearn.linear_model import LinearRegression
 from datetime import timedelta
+from ohlcv_store import ohlcv_store, period_days
+from rate_limiter import rate_limiter, Priority
+from market_journal import market_journal
+from analysis_pool import analysis_pool, AnalysisPoolBusy, AnalysisCancelled
+from analysis_cache import analysis_cache, newest_bar
+from fundamentals_cache import fundamentals_cache
+from stock_analysis import analyze_history
+from advanced_trading_engine import analyze_comprehensive_history, retrain_due_models
+from model_registry import model_registry
+from feature_store import feature_store
+from backtest import MAX_REQUEST_SYMBOLS, STRATEGIES, backtest_chunk, backtest_params, chunked, merge
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -124,7 +133,7 @@ class APITestRequest(BaseModel):
 
 class StockAnalysisRequest(BaseModel):
     symbol: str
-    analysis_type: str = "full"  # full, technical, fundamental, prediction
+    analysis_type: str = "full"  # full, technical, fundamental, prediction, comprehensive
 
 class StockTradeRequest(BaseModel):
     action: str  # buy, sell, analyze
@@ -147,6 +156,29 @@ class AutoTradingConfig(BaseModel):
 class AutoTradeStatusRequest(BaseModel):
     portfolio_id: str = "default"
 
+class BacktestRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=MAX_REQUEST_SYMBOLS)
+    period: str = "10y"
+    strategy: str = "combined"  # 'combined' (AdvancedTradingEngine) or 'stock' (analyze_stock)
+    fee_bps: Optional[float] = Field(None, ge=0)  # None = BACKTEST_FEE_BPS
+    slippage_bps: Optional[float] = Field(None, ge=0)  # None = BACKTEST_SLIPPAGE_BPS
+    lag: int = Field(1, ge=0)  # bars between a signal and its fill
+    short: bool = False  # SELL signals go short instead of flat
+    top_k: int = Field(20, ge=1)
+
+    @field_validator('period')
+    @classmethod
+    def known_period(cls, period: str) -> str:
+        period_days(period)  # ValueError -> 422
+        return period
+
+    @field_validator('strategy')
+    @classmethod
+    def known_strategy(cls, strategy: str) -> str:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {list(STRATEGIES)}")
+        return strategy
+
 # =============== TOOL FUNCTIONS ===============
 
 async def execute_python_code(code: str) -> Dict[str, Any]:
@@ -550,159 +582,55 @@ async def test_api(url: str, method: str = "GET", headers: Dict = None, body: Di
             "error": str(e)
         }
 
-async def analyze_stock(symbol: str, analysis_type: str = "full") -> Dict[str, Any]:
+async def analyze_stock(symbol: str, analysis_type: str = "full",
+                        refresh: bool = True, disconnected=None,
+                        priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
     """
     Advanced stock analysis with AI-powered predictions
+    
+    refresh=False reads history already prefetched into the local store;
+    otherwise a stale history is downloaded on the Yahoo budget at
+    `priority` (trading ahead of dashboard reads). Fundamentals come from
+    fundamentals_cache.py, which refreshes them in the background.
+    Fetching runs in a thread and the number crunching in the analysis
+    process pool, so the event loop stays free; `disconnected` (e.g.
+    Request.is_disconnected) cancels a job whose client went away.
+    Results are memoized per last bar (analysis_cache.py).
+    analysis_type="comprehensive" runs the multi-strategy AdvancedTradingEngine.
     """
     try:
-        stock = yf.Ticker(symbol)
-        
-        # Get stock info
-        info = stock.info
-        
-        # Get historical data
-        hist = stock.history(period="1y")
+        # Get historical data (local store, only the missing tail is downloaded)
+        if refresh and not ohlcv_store.is_current(symbol, "1y") \
+                and not await rate_limiter.acquire('yahoo', priority):
+            return {"success": False, "error": "Yahoo rate budget exhausted"}
+        hist = await asyncio.to_thread(ohlcv_store.get_history, symbol, period="1y", refresh=refresh)
         
         if hist.empty:
             return {"success": False, "error": f"No data found for symbol {symbol}"}
         
-        # Calculate technical indicators
-        current_price = hist['Close'].iloc[-1]
-        price_change_1d = ((current_price - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2] * 100) if len(hist) > 1 else 0
-        price_change_1w = ((current_price - hist['Close'].iloc[-5]) / hist['Close'].iloc[-5] * 100) if len(hist) > 5 else 0
-        price_change_1m = ((current_price - hist['Close'].iloc[-21]) / hist['Close'].iloc[-21] * 100) if len(hist) > 21 else 0
-        
-        # Calculate moving averages
-        ma_20 = hist['Close'].rolling(window=20).mean().iloc[-1] if len(hist) >= 20 else current_price
-        ma_50 = hist['Close'].rolling(window=50).mean().iloc[-1] if len(hist) >= 50 else current_price
-        ma_200 = hist['Close'].rolling(window=200).mean().iloc[-1] if len(hist) >= 200 else current_price
-        
-        # Calculate volatility
-        volatility = hist['Close'].pct_change().std() * (252 ** 0.5) * 100  # Annualized
-        
-        # Volume analysis
-        avg_volume = hist['Volume'].mean()
-        current_volume = hist['Volume'].iloc[-1]
-        volume_ratio = current_volume / avg_volume if avg_volume > 0 else 0
-        
-        # AI-Powered Price Prediction using Linear Regression
-        if len(hist) >= 30:
-            # Prepare data for ML model
-            hist['Days'] = range(len(hist))
-            X = hist[['Days']].values[-30:]  # Last 30 days
-            y = hist['Close'].values[-30:]
-            
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            # Predict next 7 days
-            future_days = np.array([[len(hist) + i] for i in range(1, 8)])
-            predictions = model.predict(future_days)
-            
-            predicted_change = ((predictions[-1] - current_price) / current_price * 100)
-        else:
-            predictions = []
-            predicted_change = 0
-        
-        # Generate trading signal
-        signals = []
-        score = 0
-        
-        # Technical signals
-        if current_price > ma_20:
-            signals.append("✅ Price above 20-day MA (Bullish)")
-            score += 1
-        else:
-            signals.append("⚠️ Price below 20-day MA (Bearish)")
-            score -= 1
-        
-        if current_price > ma_50:
-            signals.append("✅ Price above 50-day MA (Bullish)")
-            score += 1
-        else:
-            signals.append("⚠️ Price below 50-day MA (Bearish)")
-            score -= 1
-        
-        if ma_20 > ma_50:
-            signals.append("✅ 20-MA above 50-MA (Bullish trend)")
-            score += 1
-        else:
-            signals.append("⚠️ 20-MA below 50-MA (Bearish trend)")
-            score -= 1
-        
-        if volume_ratio > 1.5:
-            signals.append("✅ High volume (Strong interest)")
-            score += 1
-        elif volume_ratio < 0.5:
-            signals.append("⚠️ Low volume (Weak interest)")
-            score -= 0.5
-        
-        if predicted_change > 5:
-            signals.append(f"✅ AI predicts {predicted_change:.1f}% gain in 7 days")
-            score += 2
-        elif predicted_change < -5:
-            signals.append(f"⚠️ AI predicts {predicted_change:.1f}% loss in 7 days")
-            score -= 2
-        
-        # Generate recommendation
-        if score >= 4:
-            recommendation = "🟢 STRONG BUY - High probability of profit"
-            action = "BUY"
-        elif score >= 2:
-            recommendation = "🟡 BUY - Moderate upside potential"
-            action = "BUY"
-        elif score >= -1:
-            recommendation = "⚪ HOLD - Wait for better signals"
-            action = "HOLD"
-        elif score >= -3:
-            recommendation = "🟠 SELL - Moderate downside risk"
-            action = "SELL"
-        else:
-            recommendation = "🔴 STRONG SELL - High probability of loss"
-            action = "SELL"
-        
-        result = {
-            "success": True,
-            "symbol": symbol,
-            "company_name": info.get('longName', symbol),
-            "current_price": float(current_price),
-            "currency": info.get('currency', 'USD'),
-            
-            # Price changes
-            "price_change_1d": float(price_change_1d),
-            "price_change_1w": float(price_change_1w),
-            "price_change_1m": float(price_change_1m),
-            
-            # Technical indicators
-            "ma_20": float(ma_20),
-            "ma_50": float(ma_50),
-            "ma_200": float(ma_200),
-            "volatility": float(volatility),
-            
-            # Volume
-            "current_volume": int(current_volume),
-            "avg_volume": int(avg_volume),
-            "volume_ratio": float(volume_ratio),
-            
-            # AI Prediction
-            "predicted_7d_change": float(predicted_change),
-            "predicted_7d_price": float(predictions[-1]) if len(predictions) > 0 else current_price,
-            
-            # Trading signals
-            "signals": signals,
-            "recommendation": recommendation,
-            "action": action,
-            "confidence_score": int((score + 5) * 10),  # 0-100 scale
-            
-            # Additional info
-            "market_cap": info.get('marketCap', 0),
-            "pe_ratio": info.get('trailingPE', 0),
-            "52w_high": info.get('fiftyTwoWeekHigh', 0),
-            "52w_low": info.get('fiftyTwoWeekLow', 0),
-        }
-        
-        return result
-        
+        async def compute() -> Dict[str, Any]:
+            # Company fundamentals from the cache (refreshed in the background, never fetched here)
+            info = fundamentals_cache.get(symbol)
+            job = analyze_comprehensive_history if analysis_type == "comprehensive" else analyze_history
+            return await analysis_pool.run(job, symbol, hist, info, disconnected=disconnected)
+        
+        # Until a new bar closes (or the last bar / the fundamentals / the ML model are revised) the answer is the same
+        engine = "comprehensive" if analysis_type == "comprehensive" else "stock"
+        bar = newest_bar(hist)
+        fundamentals = fundamentals_cache.version(symbol)
+        model = model_registry.version(symbol) if engine == "comprehensive" else 0
+        def key_for(version: int):
+            return analysis_cache.key(symbol, engine, ("1y", fundamentals, version), bar)
+        
+        def trained(result: Dict[str, Any]):
+            # A cold start trains the model in the worker: cache under the version that scored it
+            return key_for(result.get("ml_prediction", {}).get("model_version", model))
+        
+        return await analysis_cache.get_or_compute(key_for(model), bar, compute,
+                                                   trained if engine == "comprehensive" else None)
+        
+    except (AnalysisPoolBusy, AnalysisCancelled):
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -742,15 +670,21 @@ async def check_auto_trading_limits(config: Dict, portfolio: Dict, trade_amount:
     
     return {"allowed": True}
 
-async def auto_trading_decision(symbol: str, config: Dict, portfolio_id: str = "default") -> Dict[str, Any]:
+async def auto_trading_decision(symbol: str, config: Dict, portfolio_id: str = "default",
+                                prefetched: bool = False) -> Dict[str, Any]:
     """
     Make automated trading decision based on analysis and limits
     
+    prefetched=True means the caller already bulk-downloaded this symbol's
+    history (see run_auto_trading_scan), so no history is fetched per symbol;
+    fundamentals come from the cache either way.
+    
     ⚠️ WARNING: This executes trades automatically. Use at your own risk.
     """
     try:
-        # Get stock analysis
-        analysis = await analyze_stock(symbol)
+        # Get stock analysis (a stale history is downloaded ahead of dashboard reads)
+        analysis = await analyze_stock(symbol, refresh=not prefetched,
+                                       priority=Priority.TRADING)
         
         if not analysis['success']:
             return {
@@ -818,7 +752,7 @@ async def auto_trading_decision(symbol: str, config: Dict, portfolio_id: str = "
                 }
             
             # Execute buy
-            result = await execute_paper_trade("buy", symbol, max_quantity, portfolio_id)
+            result = await execute_paper_trade("buy", symbol, max_quantity, portfolio_id, price=price)
             result['auto_trade'] = True
             result['confidence'] = analysis['confidence_score']
             result['reason'] = analysis['recommendation']
@@ -827,7 +761,7 @@ async def auto_trading_decision(symbol: str, config: Dict, portfolio_id: str = "
         elif action == "SELL" and current_position:
             # Sell entire position
             quantity = current_position['quantity']
-            result = await execute_paper_trade("sell", symbol, quantity, portfolio_id)
+            result = await execute_paper_trade("sell", symbol, quantity, portfolio_id, price=analysis['current_price'])
             result['auto_trade'] = True
             result['confidence'] = analysis['confidence_score']
             result['reason'] = analysis['recommendation']
@@ -842,7 +776,7 @@ async def auto_trading_decision(symbol: str, config: Dict, portfolio_id: str = "
             if percent_change <= -config['stop_loss_percent']:
                 # Stop loss triggered
                 quantity = current_position['quantity']
-                result = await execute_paper_trade("sell", symbol, quantity, portfolio_id)
+                result = await execute_paper_trade("sell", symbol, quantity, portfolio_id, price=current_price)
                 result['auto_trade'] = True
                 result['trigger'] = 'STOP_LOSS'
                 result['loss_percent'] = percent_change
@@ -851,7 +785,7 @@ async def auto_trading_decision(symbol: str, config: Dict, portfolio_id: str = "
             elif percent_change >= config['take_profit_percent']:
                 # Take profit triggered
                 quantity = current_position['quantity']
-                result = await execute_paper_trade("sell", symbol, quantity, portfolio_id)
+                result = await execute_paper_trade("sell", symbol, quantity, portfolio_id, price=current_price)
                 result['auto_trade'] = True
                 result['trigger'] = 'TAKE_PROFIT'
                 result['profit_percent'] = percent_change
@@ -869,17 +803,26 @@ async def auto_trading_decision(symbol: str, config: Dict, portfolio_id: str = "
             "error": str(e)
         }
 
-async def execute_paper_trade(action: str, symbol: str, quantity: int = 1, portfolio_id: str = "default") -> Dict[str, Any]:
+async def execute_paper_trade(action: str, symbol: str, quantity: int = 1, portfolio_id: str = "default",
+                              price: Optional[float] = None) -> Dict[str, Any]:
     """
     Execute paper (simulated) trading with analysis
     
+    `price` lets callers that just analyzed the symbol trade at that last
+    close instead of fetching it again.
+    
     ⚠️ DISCLAIMER: This is PAPER TRADING (simulation only).
     No real money is involved. For educational purposes only.
     """
     try:
         # Get current stock price
-        stock = yf.Ticker(symbol)
-        current_price = stock.history(period="1d")['Close'].iloc[-1]
+        if price is not None:
+            current_price = price
+        else:
+            if not ohlcv_store.is_current(symbol, "1d") and not await rate_limiter.acquire('yahoo', Priority.TRADING):
+                return {"success": False, "error": "Yahoo rate budget exhausted, no price to trade at"}
+            hist = await asyncio.to_thread(ohlcv_store.get_history, symbol, period="1d")
+            current_price = hist['Close'].iloc[-1]
         
         # Get portfolio from database
         portfolio = await db.portfolios.find_one({"portfolio_id": portfolio_id})
@@ -1434,11 +1377,17 @@ async def test_api_endpoint(request: APITestRequest):
     return result
 
 @api_router.post("/tools/analyze-stock")
-async def analyze_stock_endpoint(request: StockAnalysisRequest):
+async def analyze_stock_endpoint(request: StockAnalysisRequest, http_request: Request):
     """
     Analyze stock with AI-powered predictions
     """
-    result = await analyze_stock(request.symbol, request.analysis_type)
+    try:
+        result = await analyze_stock(request.symbol, request.analysis_type,
+                                     disconnected=http_request.is_disconnected)
+    except AnalysisPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except AnalysisCancelled:
+        return Response(status_code=499)
     return result
 
 @api_router.post("/tools/trade-stock")
@@ -1457,7 +1406,10 @@ async def trade_stock_endpoint(request: StockTradeRequest):
             request.portfolio_id
         )
     elif request.action.lower() == "analyze":
-        result = await analyze_stock(request.symbol)
+        try:
+            result = await analyze_stock(request.symbol)
+        except AnalysisPoolBusy as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     else:
         result = {"success": False, "error": "Invalid action"}
     
@@ -1481,9 +1433,12 @@ async def get_portfolio(portfolio_id: str = "default"):
         total_value = portfolio['cash']
         positions_value = 0
         
+        # One batched quote download for every position
+        prices = await market_data_service.get_aggregated_prices(list(portfolio['positions']), 'stock')
+        
         for symbol, position in portfolio['positions'].items():
-            stock = yf.Ticker(symbol)
-            current_price = stock.history(period="1d")['Close'].iloc[-1]
+            # Keep the position at cost if no live quote is available
+            current_price = prices.get(symbol, {}).get('primary_price') or position['avg_price']
             position_value = current_price * position['quantity']
             positions_value += position_value
             
@@ -1627,10 +1582,22 @@ async def run_auto_trading_scan(symbols: List[str], portfolio_id: str = "default
                 "error": "Auto-trading not enabled"
             }
         
+        # One bulk history download for the whole universe instead of history
+        # round-trips per symbol (fundamentals come from their own cache)
+        # (symbols the bulk frame dropped fall back to the per-symbol path)
+        prefetched = set()
+        if await rate_limiter.acquire('yahoo', Priority.TRADING):
+            try:
+                prefetched = await asyncio.to_thread(ohlcv_store.prefetch, symbols, "1y")
+            except Exception as e:
+                logging.warning(f"Scan prefetch failed, symbols will be fetched one by one: {e}")
+        
         results = []
         
+        # Decisions stay sequential: each trade changes the limits for the next
         for symbol in symbols:
-            result = await auto_trading_decision(symbol, config, portfolio_id)
+            result = await auto_trading_decision(symbol, config, portfolio_id,
+                                                 prefetched=symbol.upper() in prefetched)
             results.append({
                 "symbol": symbol,
                 "result": result
@@ -1639,6 +1606,7 @@ async def run_auto_trading_scan(symbols: List[str], portfolio_id: str = "default
         return {
             "success": True,
             "scanned_symbols": len(symbols),
+            "prefetched": sorted(prefetched),
             "results": results
         }
         
@@ -1828,28 +1796,154 @@ async def get_available_tools():
 # =============== TRADING PLATFORM ROUTES ===============
 
 from market_data_service import market_data_service
+from http_client import http_client
+from ticker_stream import ticker_stream
+from last_known_prices import last_known_prices
 from coinbase_service import coinbase_service
 from binance_service import binance_service
 from portfolio_service import portfolio_service
+from price_stream import PriceStreamHub
+
+price_stream = PriceStreamHub(market_data_service.get_aggregated_prices, portfolio_service.get_portfolio_summary)
 
 # Market Data Endpoints
+@api_router.get("/trading/market-data")
+async def get_market_data_batch(symbols: str, asset_type: str = "crypto"):
+    """Get aggregated market data for comma-separated symbols in one batched fetch"""
+    symbol_list = [s.strip().upper() for s in symbols.split(',') if s.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    data = await market_data_service.get_aggregated_prices(symbol_list, asset_type)
+    return {"data": data}
+
 @api_router.get("/trading/market-data/{symbol}")
 async def get_market_data(symbol: str, asset_type: str = "crypto"):
     """Get aggregated market data from multiple sources"""
     data = await market_data_service.get_aggregated_price(symbol, asset_type)
     return data
 
+@api_router.get("/trading/cache/stats")
+async def get_cache_stats():
+    """Get market data cache counters"""
+    return {
+        "price_cache": market_data_service.price_cache.stats(),
+        "price_refresher": market_data_service.refresher.stats(),
+        "market_summary": market_data_service.summary_cache.stats(),
+        "trending": market_data_service.trending_cache.stats(),
+        "coin_index": market_data_service.coin_index.stats(),
+        "last_known_prices": last_known_prices.stats(),
+        "market_journal": market_journal.stats(),
+        "fundamentals": fundamentals_cache.stats()
+    }
+
+@api_router.get("/trading/analysis/stats")
+async def get_analysis_stats():
+    """Get analysis process pool load, per-job timings and result cache hit rate"""
+    return {**analysis_pool.stats(), "cache": analysis_cache.stats()}
+
+@api_router.get("/trading/models")
+async def get_model_registry():
+    """Get stored ML model versions and retraining counters"""
+    return model_registry.stats()
+
+@api_router.get("/trading/features")
+async def get_feature_store():
+    """Get feature store sync counters (this process; analysis workers keep their own)"""
+    return feature_store.stats()
+
+@api_router.post("/trading/backtest")
+async def run_strategy_backtest(request: BacktestRequest):
+    """Backtest the engines' scoring over stored history (vectorized, symbol chunks spread over the analysis pool)"""
+    started = datetime.now(timezone.utc)
+    symbols = list(dict.fromkeys(s.upper() for s in request.symbols))
+    # Missing history is downloaded on the Yahoo budget, behind trading and dashboard reads
+    if not all(ohlcv_store.is_current(symbol, request.period) for symbol in symbols):
+        if not await rate_limiter.acquire('yahoo', Priority.BACKGROUND):
+            raise HTTPException(status_code=503, detail="Yahoo rate budget exhausted", headers={"Retry-After": "60"})
+        try:
+            await asyncio.to_thread(ohlcv_store.prefetch, symbols, request.period)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"History download failed: {e}")
+    # All chunks or none: a run the pool cannot take whole is refused before any worker starts
+    groups = chunked(symbols)
+    if len(groups) > analysis_pool.free_slots():
+        raise HTTPException(status_code=503, detail=f"Analysis queue cannot take {len(groups)} backtest jobs, retry shortly",
+                            headers={"Retry-After": "5"})
+    jobs = [
+        asyncio.ensure_future(analysis_pool.run(backtest_chunk, group, request.period, request.strategy, request.fee_bps,
+                                                request.slippage_bps, request.lag, request.short, timeout=300))
+        for group in groups
+    ]
+    try:
+        chunks = await asyncio.gather(*jobs)
+    except BaseException as e:
+        # One chunk failed (or the request was cancelled): the others' results would be thrown away
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        if isinstance(e, AnalysisPoolBusy):
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        raise
+    params = backtest_params(request.period, request.fee_bps, request.slippage_bps, request.lag, request.short)
+    result = merge(chunks, request.strategy, params)
+    result.elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+    return result.to_dict(request.top_k)
+
+@api_router.get("/trading/rate-limits")
+async def get_rate_limits():
+    """Get remaining call budget per market data provider"""
+    return {"providers": rate_limiter.snapshot()}
+
+def set_freshness_headers(response: Response, cached):
+    """Expose how old a stale-while-revalidate payload is"""
+    response.headers["Age"] = str(int(cached.age)) if cached else "0"
+    response.headers["X-Data-Stale"] = "true" if cached and cached.stale else "false"
+
+@api_router.websocket("/trading/stream")
+async def trading_stream(websocket: WebSocket):
+    """Push price/portfolio deltas for the symbols a client subscribes to"""
+    await websocket.accept()
+    client = price_stream.connect()
+    sender = asyncio.create_task(price_stream.pump(client, websocket.send_json))
+    try:
+        while True:
+            try:
+                request = await websocket.receive_json()
+            except ValueError:
+                price_stream.send(client, {"type": "error", "error": "Messages must be JSON objects"})
+                continue
+            reply = price_stream.handle(client, request if isinstance(request, dict) else {})
+            if reply:
+                price_stream.send(client, reply)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        # Retrieves a send_json failure too, instead of "Task exception was never retrieved"
+        await asyncio.gather(sender, return_exceptions=True)
+        price_stream.disconnect(client)
+
+@api_router.get("/trading/stream/status")
+async def get_stream_status():
+    """Get exchange ticker feeds and browser push stream status"""
+    return {
+        "tickers": ticker_stream.stats(),
+        "push": price_stream.stats()
+    }
+
 @api_router.get("/trading/market-summary")
-async def get_market_summary():
+async def get_market_summary(response: Response):
     """Get overall market summary"""
-    summary = await market_data_service.get_market_summary()
-    return summary
+    cached = await market_data_service.get_market_summary_cached()
+    set_freshness_headers(response, cached)
+    return cached.value if cached else market_data_service.empty_market_summary()
 
 @api_router.get("/trading/trending")
-async def get_trending_cryptos():
+async def get_trending_cryptos(response: Response):
     """Get trending cryptocurrencies"""
-    trending = await market_data_service.get_trending_cryptos()
-    return {"trending": trending}
+    cached = await market_data_service.get_trending_cryptos_cached()
+    set_freshness_headers(response, cached)
+    return {"trending": cached.value if cached else []}
 
 # Portfolio Endpoints
 @api_router.get("/trading/portfolio")
@@ -2038,6 +2132,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_http_client():
+    await http_client.start()
+
+@app.on_event("startup")
+async def startup_price_refresher():
+    market_data_service.refresher.start()
+
+@app.on_event("startup")
+async def startup_coin_index():
+    market_data_service.coin_index.start()
+
+@app.on_event("startup")
+async def startup_last_known_prices():
+    last_known_prices.start()
+
+@app.on_event("startup")
+async def startup_fundamentals_cache():
+    fundamentals_cache.start()
+
+@app.on_event("startup")
+async def startup_ticker_stream():
+    ticker_stream.start()
+
+@app.on_event("startup")
+async def startup_analysis_pool():
+    analysis_pool.start()
+
+@app.on_event("startup")
+async def startup_analysis_cache():
+    analysis_cache.start()
+
+@app.on_event("startup")
+async def startup_model_registry():
+    # Retraining is CPU-bound too: each pass runs in an analysis worker
+    model_registry.start(lambda: analysis_pool.run(retrain_due_models, timeout=600))
+
+@app.on_event("shutdown")
+async def shutdown_price_refresher():
+    await market_data_service.refresher.stop()
+
+@app.on_event("shutdown")
+async def shutdown_coin_index():
+    await market_data_service.coin_index.stop()
+
+@app.on_event("shutdown")
+async def shutdown_last_known_prices():
+    await last_known_prices.stop()
+
+@app.on_event("shutdown")
+async def shutdown_fundamentals_cache():
+    await fundamentals_cache.stop()
+
+@app.on_event("shutdown")
+async def shutdown_ticker_stream():
+    await ticker_stream.stop()
+
+@app.on_event("shutdown")
+async def shutdown_price_stream():
+    await price_stream.stop()
+
+@app.on_event("shutdown")
+async def shutdown_model_registry():
+    await model_registry.stop()
+
+@app.on_event("shutdown")
+async def shutdown_analysis_pool():
+    await analysis_pool.stop()
+
+@app.on_event("shutdown")
+async def shutdown_analysis_cache():
+    await analysis_cache.stop()
+
+@app.on_event("shutdown")
+async def shutdown_rate_limiter():
+    await rate_limiter.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await http_client.close()
+
+@app.on_event("shutdown")
+async def shutdown_market_journal():
+    market_journal.close()
\ No newline at end of file
@@ -1,25 +1,34 @@
-"""Simple Market Data - Fallback when CoinGecko is rate limited"""
+"""Simple Market Data - Fallback when every live source failed (e.g. CoinGecko rate limited)"""
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
+from last_known_prices import last_known_prices
 
-# Simple fallback prices (will be replaced with actual data when APIs work)
-FALLBACK_PRICES = {
-    'BTC': 93000,
-    'ETH': 3100,
-    'BNB': 620,
-    'ADA': 0.95,
-    'SOL': 245,
-    'XRP': 1.10
-}
+def get_fallback_price(symbol: str, asset_type: str = 'crypto', max_age: Optional[float] = None) -> Dict:
+    """Get the last real price (and its age) when APIs are unavailable
+
+    max_age caps how old a price may be (seconds, default
+    LAST_KNOWN_PRICE_MAX_AGE); beyond that the price is reported as 0
+    rather than trading on a stale number.
+    """
+    last = last_known_prices.get(symbol, asset_type, max_age)
+
+    if last is None:
+        return {
+            'symbol': symbol.upper(),
+            'price': 0,
+            'source': 'Fallback Data (no recent price)',
+            'timestamp': datetime.utcnow().isoformat(),
+            'is_fallback': True,
+            'note': 'Real-time data temporarily unavailable and no recent price is known.'
+        }
 
-def get_fallback_price(symbol: str) -> Dict:
-    """Get fallback price when APIs are unavailable"""
-    price = FALLBACK_PRICES.get(symbol.upper(), 0)
-    
     return {
         'symbol': symbol.upper(),
-        'price': price,
-        'source': 'Fallback Data (API Rate Limited)',
+        'price': last['price'],
+        'source': f"Last Known Price ({last['source'] or 'unknown source'})",
         'timestamp': datetime.utcnow().isoformat(),
-        'note': 'Real-time data temporarily unavailable. Using fallback prices.'
+        'as_of': last['as_of'],
+        'age_seconds': last['age_seconds'],
+        'is_fallback': True,
+        'note': 'Real-time data temporarily unavailable. Using the last successfully fetched price.'
     }
@@ -0,0 +1,154 @@
+"""Stock Analysis - the CPU-bound part of analyze_stock
+
+Indicators, the 7-day regression forecast and the signal scoring, as a plain
+function of already-fetched data so it can run in an analysis pool worker
+(see analysis_pool.py) instead of on the API event loop.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from typing import Any, Dict
+
+from feature_store import feature_store
+
+def analyze_history(symbol: str, hist: pd.DataFrame, info: Dict) -> Dict[str, Any]:
+    """
+    Technical analysis and AI price prediction for one symbol's history
+    """
+    # Technical indicators (feature store rows for these bars)
+    ind = feature_store.indicators(symbol, hist)
+    current_price = ind.price
+    price_change_1d = ind.change_percent(1) if len(hist) > 1 else 0
+    price_change_1w = ind.change_percent(4) if len(hist) > 5 else 0
+    price_change_1m = ind.change_percent(20) if len(hist) > 21 else 0
+
+    # Moving averages
+    ma_20 = ind.sma_20[-1] if len(hist) >= 20 else current_price
+    ma_50 = ind.sma_50[-1] if len(hist) >= 50 else current_price
+    ma_200 = ind.sma_200[-1] if len(hist) >= 200 else current_price
+
+    # Calculate volatility
+    volatility = ind.volatility()  # Annualized
+
+    # Volume analysis
+    # Yahoo reports NaN volumes (often on the forming bar): skip them, as pandas .mean() did
+    avg_volume = np.nan_to_num(np.nanmean(ind.volume))
+    current_volume = np.nan_to_num(ind.volume[-1])
+    volume_ratio = current_volume / avg_volume if avg_volume > 0 else 0
+
+    # AI-Powered Price Prediction using Linear Regression
+    if len(hist) >= 30:
+        # Prepare data for ML model
+        X = np.arange(len(hist) - 30, len(hist)).reshape(-1, 1)  # Last 30 days
+        y = ind.close[-30:]
+
+        model = LinearRegression()
+        model.fit(X, y)
+
+        # Predict next 7 days
+        future_days = np.array([[len(hist) + i] for i in range(1, 8)])
+        predictions = model.predict(future_days)
+
+        predicted_change = ((predictions[-1] - current_price) / current_price * 100)
+    else:
+        predictions = []
+        predicted_change = 0
+
+    # Generate trading signal
+    signals = []
+    score = 0
+
+    # Technical signals
+    if current_price > ma_20:
+        signals.append("✅ Price above 20-day MA (Bullish)")
+        score += 1
+    else:
+        signals.append("⚠️ Price below 20-day MA (Bearish)")
+        score -= 1
+
+    if current_price > ma_50:
+        signals.append("✅ Price above 50-day MA (Bullish)")
+        score += 1
+    else:
+        signals.append("⚠️ Price below 50-day MA (Bearish)")
+        score -= 1
+
+    if ma_20 > ma_50:
+        signals.append("✅ 20-MA above 50-MA (Bullish trend)")
+        score += 1
+    else:
+        signals.append("⚠️ 20-MA below 50-MA (Bearish trend)")
+        score -= 1
+
+    if volume_ratio > 1.5:
+        signals.append("✅ High volume (Strong interest)")
+        score += 1
+    elif volume_ratio < 0.5:
+        signals.append("⚠️ Low volume (Weak interest)")
+        score -= 0.5
+
+    if predicted_change > 5:
+        signals.append(f"✅ AI predicts {predicted_change:.1f}% gain in 7 days")
+        score += 2
+    elif predicted_change < -5:
+        signals.append(f"⚠️ AI predicts {predicted_change:.1f}% loss in 7 days")
+        score -= 2
+
+    # Generate recommendation
+    if score >= 4:
+        recommendation = "🟢 STRONG BUY - High probability of profit"
+        action = "BUY"
+    elif score >= 2:
+        recommendation = "🟡 BUY - Moderate upside potential"
+        action = "BUY"
+    elif score >= -1:
+        recommendation = "⚪ HOLD - Wait for better signals"
+        action = "HOLD"
+    elif score >= -3:
+        recommendation = "🟠 SELL - Moderate downside risk"
+        action = "SELL"
+    else:
+        recommendation = "🔴 STRONG SELL - High probability of loss"
+        action = "SELL"
+
+    result = {
+        "success": True,
+        "symbol": symbol,
+        "company_name": info.get('longName', symbol),
+        "current_price": float(current_price),
+        "currency": info.get('currency', 'USD'),
+
+        # Price changes
+        "price_change_1d": float(price_change_1d),
+        "price_change_1w": float(price_change_1w),
+        "price_change_1m": float(price_change_1m),
+
+        # Technical indicators
+        "ma_20": float(ma_20),
+        "ma_50": float(ma_50),
+        "ma_200": float(ma_200),
+        "volatility": float(volatility),
+
+        # Volume
+        "current_volume": int(current_volume),
+        "avg_volume": int(avg_volume),
+        "volume_ratio": float(volume_ratio),
+
+        # AI Prediction
+        "predicted_7d_change": float(predicted_change),
+        "predicted_7d_price": float(predictions[-1]) if len(predictions) > 0 else current_price,
+
+        # Trading signals
+        "signals": signals,
+        "recommendation": recommendation,
+        "action": action,
+        "confidence_score": int((score + 5) * 10),  # 0-100 scale
+
+        # Additional info
+        "market_cap": info.get('marketCap', 0),
+        "pe_ratio": info.get('trailingPE', 0),
+        "52w_high": info.get('fiftyTwoWeekHigh', 0),
+        "52w_low": info.get('fiftyTwoWeekLow', 0),
+    }
+
+    return result
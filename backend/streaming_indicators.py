@@ -0,0 +1,310 @@
+"""Streaming Indicators - O(1) incremental updates for live bars and ticks
+
+Each indicator keeps just enough state (in __slots__) to fold in one new
+value, so a live price no longer means recomputing a year of history:
+
+    stream = IndicatorStream.from_history(hist)   # seed once from loaded bars
+    stream.update(high, low, close)               # a bar closed: commit it
+    stream.peek(price)                            # a tick: values if the bar closed here
+
+update() commits a value and returns the new reading, peek() returns the
+reading the next update() would produce without changing any state.
+IndicatorStream.extend() only commits closed bars: a last bar whose session
+is still open is held back as the forming bar (the store keeps rewriting it)
+and stands in for the bar a tick peeks at. Values
+match the batch functions in indicators.py (ema, wilder_rsi, sma/rolling_std,
+macd, atr_14) for the same input; readings are NaN until an indicator has
+seen enough values, like the batch NaN warm-up.
+"""
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+NAN = float('nan')
+DAY = pd.Timedelta(days=1)
+
+class EMA:
+    """Exponential mean with pandas ewm(span=span, adjust=True) weighting"""
+    __slots__ = ('decay', 'numerator', 'denominator')
+
+    def __init__(self, span: int):
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    @property
+    def value(self) -> float:
+        return self.numerator / self.denominator if self.denominator else NAN
+
+    def peek(self, x: float) -> float:
+        return (x + self.decay * self.numerator) / (1.0 + self.decay * self.denominator)
+
+    def update(self, x: float) -> float:
+        self.numerator = x + self.decay * self.numerator
+        self.denominator = 1.0 + self.decay * self.denominator
+        return self.numerator / self.denominator
+
+class WilderRSI:
+    """RSI with Wilder smoothing (simple-average seed over the first `period` moves)"""
+    __slots__ = ('period', 'previous', 'moves', 'avg_gain', 'avg_loss')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.previous: Optional[float] = None
+        self.moves = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    @staticmethod
+    def _rsi(avg_gain: float, avg_loss: float) -> float:
+        if avg_loss == 0.0:
+            return 100.0 if avg_gain > 0.0 else NAN
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def _next(self, x: float) -> Tuple[float, float, int]:
+        """(avg_gain, avg_loss, moves) after folding in x"""
+        delta = x - self.previous
+        gain, loss = (delta, 0.0) if delta > 0 else (0.0, -delta)
+        moves = self.moves + 1
+        if moves <= self.period:
+            # Warm-up: running simple mean of the first `period` moves
+            return (self.avg_gain + (gain - self.avg_gain) / moves,
+                    self.avg_loss + (loss - self.avg_loss) / moves, moves)
+        return (self.avg_gain + (gain - self.avg_gain) / self.period,
+                self.avg_loss + (loss - self.avg_loss) / self.period, moves)
+
+    @property
+    def value(self) -> float:
+        return self._rsi(self.avg_gain, self.avg_loss) if self.moves >= self.period else NAN
+
+    def peek(self, x: float) -> float:
+        if self.previous is None:
+            return NAN
+        avg_gain, avg_loss, moves = self._next(x)
+        return self._rsi(avg_gain, avg_loss) if moves >= self.period else NAN
+
+    def update(self, x: float) -> float:
+        if self.previous is not None:
+            self.avg_gain, self.avg_loss, self.moves = self._next(x)
+        self.previous = x
+        return self.value
+
+class RollingStats:
+    """Mean and sample variance over the last `window` values (windowed Welford)"""
+    __slots__ = ('window', 'values', 'mean', 'm2')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _next(self, x: float) -> Tuple[float, float, int]:
+        """(mean, m2, count) after folding in x"""
+        n = len(self.values)
+        if n < self.window:
+            delta = x - self.mean
+            mean = self.mean + delta / (n + 1)
+            return mean, self.m2 + delta * (x - mean), n + 1
+        # Full window: x replaces the oldest value
+        oldest = self.values[0]
+        mean = self.mean + (x - oldest) / n
+        return mean, max(self.m2 + (x - oldest) * (x - mean + oldest - self.mean), 0.0), n
+
+    def _reading(self, mean: float, m2: float, count: int) -> Tuple[float, float]:
+        if count < self.window:
+            return NAN, NAN
+        return mean, m2 / (count - 1) if count > 1 else NAN
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        """(mean, variance), NaN until the window is full"""
+        return self._reading(self.mean, self.m2, len(self.values))
+
+    def peek(self, x: float) -> Tuple[float, float]:
+        return self._reading(*self._next(x))
+
+    def update(self, x: float) -> Tuple[float, float]:
+        self.mean, self.m2, _ = self._next(x)
+        self.values.append(x)
+        return self.value
+
+class MACD:
+    """EMA(fast) - EMA(slow), its EMA(signal) and the histogram"""
+    __slots__ = ('fast', 'slow', 'signal')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    @staticmethod
+    def _reading(macd: float, signal: float) -> Tuple[float, float, float]:
+        return macd, signal, macd - signal
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        """(macd, signal, histogram)"""
+        return self._reading(self.fast.value - self.slow.value, self.signal.value)
+
+    def peek(self, x: float) -> Tuple[float, float, float]:
+        macd = self.fast.peek(x) - self.slow.peek(x)
+        return self._reading(macd, self.signal.peek(macd))
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        macd = self.fast.update(x) - self.slow.update(x)
+        return self._reading(macd, self.signal.update(macd))
+
+class ATR:
+    """Average true range: rolling mean of the true range (indicators.atr_14)"""
+    __slots__ = ('previous_close', 'ranges')
+
+    def __init__(self, period: int = 14):
+        self.previous_close: Optional[float] = None
+        self.ranges = RollingStats(period)
+
+    def _true_range(self, high: float, low: float) -> float:
+        if self.previous_close is None:
+            return high - low
+        return max(high - low, abs(high - self.previous_close), abs(low - self.previous_close))
+
+    @property
+    def value(self) -> float:
+        return self.ranges.value[0]
+
+    def peek(self, high: float, low: float) -> float:
+        return self.ranges.peek(self._true_range(high, low))[0]
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.ranges.update(self._true_range(high, low))
+        self.previous_close = close
+        return self.value
+
+class ZScore:
+    """Distance of the latest value from its rolling mean, in rolling standard deviations"""
+    __slots__ = ('stats', 'last')
+
+    def __init__(self, window: int = 20):
+        self.stats = RollingStats(window)
+        self.last = NAN
+
+    @staticmethod
+    def _reading(x: float, mean: float, variance: float) -> float:
+        if not variance > 0.0:
+            return NAN
+        return (x - mean) / math.sqrt(variance)
+
+    @property
+    def value(self) -> float:
+        return self._reading(self.last, *self.stats.value)
+
+    def peek(self, x: float) -> float:
+        return self._reading(x, *self.stats.peek(x))
+
+    def update(self, x: float) -> float:
+        self.last = x
+        return self._reading(x, *self.stats.update(x))
+
+class IndicatorStream:
+    """The live indicator set for one symbol (EMA 12/26, MACD, Wilder RSI,
+    Bollinger/z-score over 20 bars, ATR 14)"""
+    __slots__ = ('ema_12', 'ema_26', 'macd', 'rsi', 'zscore', 'atr',
+                 'close', 'bars', 'last_bar', 'forming', 'forming_bar')
+
+    def __init__(self):
+        self.ema_12 = EMA(12)
+        self.ema_26 = EMA(26)
+        self.macd = MACD(12, 26, 9)
+        self.rsi = WilderRSI(14)
+        self.zscore = ZScore(20)  # its window also gives the Bollinger bands
+        self.atr = ATR(14)
+        self.close = NAN
+        self.bars = 0
+        self.last_bar: Optional[pd.Timestamp] = None
+        self.forming: Optional[Tuple[float, float, float]] = None  # (high, low, close) of the open bar
+        self.forming_bar: Optional[pd.Timestamp] = None
+
+    @classmethod
+    def from_history(cls, hist: pd.DataFrame, span: pd.Timedelta = DAY,
+                     now: Optional[pd.Timestamp] = None) -> 'IndicatorStream':
+        """Seed from a yfinance-style OHLCV frame (one O(1) update per bar)"""
+        stream = cls()
+        stream.extend(hist, span, now)
+        return stream
+
+    def extend(self, hist: pd.DataFrame, span: pd.Timedelta = DAY, now: Optional[pd.Timestamp] = None) -> int:
+        """Fold in the closed bars of `hist` newer than the last one seen; returns how many
+
+        Bars last `span` from their index time; a last bar still inside it at
+        `now` is kept as the forming bar (replaced on every call) instead.
+        """
+        if self.last_bar is not None:
+            hist = hist[hist.index > self.last_bar]
+        self.forming = self.forming_bar = None
+        if len(hist):
+            start = hist.index[-1]
+            now = pd.Timestamp.now(tz=start.tz) if now is None else now
+            if now < start + span:
+                last = hist.iloc[-1]
+                self.forming = (float(last['High']), float(last['Low']), float(last['Close']))
+                self.forming_bar = start
+                hist = hist.iloc[:-1]
+        for high, low, close in zip(hist['High'].to_numpy(), hist['Low'].to_numpy(), hist['Close'].to_numpy()):
+            self.update(float(high), float(low), float(close))
+        if len(hist):
+            self.last_bar = hist.index[-1]
+        return len(hist)
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """Commit a closed bar"""
+        self.ema_12.update(close)
+        self.ema_26.update(close)
+        self.macd.update(close)
+        self.rsi.update(close)
+        self.zscore.update(close)
+        self.atr.update(high, low, close)
+        self.close = close
+        self.bars += 1
+        return self.values()
+
+    def _reading(self, close: float, ema_12: float, ema_26: float, macd: Tuple[float, float, float],
+                 rsi: float, bollinger: Tuple[float, float], zscore: float, atr: float) -> Dict[str, float]:
+        mean, variance = bollinger
+        std = math.sqrt(variance) if variance == variance else NAN
+        return {
+            'price': close,
+            'ema_12': ema_12,
+            'ema_26': ema_26,
+            'macd': macd[0],
+            'macd_signal': macd[1],
+            'macd_hist': macd[2],
+            'rsi_14': rsi,
+            'sma_20': mean,
+            'std_20': std,
+            'bb_upper': mean + 2 * std,
+            'bb_lower': mean - 2 * std,
+            'zscore_20': zscore,
+            'atr_14': atr
+        }
+
+    def values(self) -> Dict[str, float]:
+        """Readings as of the last committed bar"""
+        return self._reading(self.close, self.ema_12.value, self.ema_26.value, self.macd.value,
+                             self.rsi.value, self.zscore.stats.value, self.zscore.value, self.atr.value)
+
+    def peek(self, price: Optional[float] = None, high: Optional[float] = None,
+             low: Optional[float] = None) -> Dict[str, float]:
+        """Readings if the forming bar closed at `price` (a live tick, default its
+        stored close); its stored high/low widen the range. State is unchanged"""
+        if self.forming is not None:
+            bar_high, bar_low, bar_close = self.forming
+            price = bar_close if price is None else price
+            high = bar_high if high is None else max(high, bar_high)
+            low = bar_low if low is None else min(low, bar_low)
+        high = price if high is None else max(high, price)
+        low = price if low is None else min(low, price)
+        return self._reading(price, self.ema_12.peek(price), self.ema_26.peek(price), self.macd.peek(price),
+                             self.rsi.peek(price), self.zscore.stats.peek(price), self.zscore.peek(price),
+                             self.atr.peek(high, low))
@@ -0,0 +1,90 @@
+"""Stale-While-Revalidate Cache - serve the last good payload, refresh in the background"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedValue:
+    value: Any
+    age: float  # seconds since the payload was fetched
+    stale: bool
+
+class StaleWhileRevalidateCache:
+    """Keeps the last successful payload per key
+
+    Within ``fresh_ttl`` the payload is served as-is. Up to ``max_staleness``
+    it is still served immediately, and one background refresh is started.
+    Older payloads are never served. A fetcher returns None to signal failure,
+    and a failed fetch never replaces a good payload.
+    """
+
+    def __init__(self, name: str, fresh_ttl: float, max_staleness: float):
+        self.name = name
+        self.fresh_ttl = fresh_ttl
+        self.max_staleness = max_staleness
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.fresh_hits = 0
+        self.stale_served = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def _refresh(self, key: str, fetcher: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        self.refreshes += 1
+        try:
+            value = await fetcher()
+        except Exception as e:
+            logger.warning(f"{self.name} refresh failed: {e}")
+            value = None
+        if value is None:
+            self.refresh_failures += 1
+            return None
+        self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def _start_refresh(self, key: str, fetcher: Callable[[], Awaitable[Optional[Any]]]) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh(key, fetcher))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    async def get(self, key: str, fetcher: Callable[[], Awaitable[Optional[Any]]]) -> Optional[CachedValue]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if age <= self.fresh_ttl:
+                self.fresh_hits += 1
+                return CachedValue(value, age, stale=False)
+            if age <= self.max_staleness:
+                self.stale_served += 1
+                self._start_refresh(key, fetcher)
+                return CachedValue(value, age, stale=True)
+
+        # Nothing servable - wait for the (shared) refresh
+        self.misses += 1
+        value = await asyncio.shield(self._start_refresh(key, fetcher))
+        if value is None:
+            return None
+        return CachedValue(value, 0.0, stale=False)
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.fresh_hits + self.stale_served + self.misses
+        return {
+            'entries': len(self._entries),
+            'fresh_ttl_seconds': self.fresh_ttl,
+            'max_staleness_seconds': self.max_staleness,
+            'fresh_hits': self.fresh_hits,
+            'stale_served': self.stale_served,
+            'stale_ratio': round(self.stale_served / served, 4) if served else 0.0,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures
+        }
@@ -0,0 +1,120 @@
+"""Ticker Replay Server - local WebSocket stand-in for the Binance/Coinbase ticker feeds
+
+Replays a recording made with TICKER_STREAM_RECORD_PATH (one JSON object per
+line: {"t": seconds, "exchange": "binance"|"coinbase", "message": {...}}).
+Each exchange is served on its own path, so the stream service can be
+pointed at it with:
+
+    BINANCE_WS_URL=ws://127.0.0.1:8765/binance
+    COINBASE_WS_URL=ws://127.0.0.1:8765/coinbase
+
+Usage:
+    python ticker_replay_server.py --file fixtures/sample_ticks.jsonl --speed 10 --loop
+"""
+import websockets
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECORDING = Path(__file__).parent / 'fixtures' / 'sample_ticks.jsonl'
+
+def load_recording(path: Path) -> Dict[str, List[Dict]]:
+    """Recording file -> per-exchange list of {'t', 'message'} sorted by time"""
+    by_exchange: Dict[str, List[Dict]] = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            by_exchange.setdefault(record['exchange'], []).append(record)
+    for records in by_exchange.values():
+        records.sort(key=lambda record: record['t'])
+    return by_exchange
+
+class TickReplayServer:
+    """Serves recorded ticks to any client that subscribes
+
+    speed=1 replays at recorded pace, speed=10 ten times faster and
+    speed=0 as fast as possible. With loop=True the recording restarts.
+    """
+
+    def __init__(self, recording: Path = DEFAULT_RECORDING, host: str = '127.0.0.1', port: int = 8765,
+                 speed: float = 1.0, loop: bool = False):
+        self.records = load_recording(recording)
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loop = loop
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, websocket, path: Optional[str] = None):
+        # websockets' legacy server passes path, the new one exposes request.path
+        path = path or getattr(websocket, 'path', None) or websocket.request.path
+        exchange = path.strip('/').split('/')[0]
+        records = self.records.get(exchange)
+        if records is None:
+            await websocket.close(code=1008, reason=f"no recording for '{exchange}'")
+            return
+
+        # Wait for the client's subscribe message before streaming, like the real feeds
+        try:
+            await asyncio.wait_for(websocket.recv(), timeout=10)
+        except asyncio.TimeoutError:
+            pass
+
+        try:
+            while True:
+                previous = records[0]['t']
+                for record in records:
+                    gap = record['t'] - previous
+                    previous = record['t']
+                    # sleep(0) still yields so a looping speed=0 replay cannot starve the loop
+                    await asyncio.sleep(gap / self.speed if self.speed > 0 and gap > 0 else 0)
+                    await websocket.send(json.dumps(record['message']))
+                if not self.loop:
+                    break
+            await websocket.close()
+        except websockets.ConnectionClosed:
+            pass
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Replaying {sum(len(r) for r in self.records.values())} ticks on {self.url}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+async def _main(args):
+    server = TickReplayServer(Path(args.file), args.host, args.port, args.speed, args.loop)
+    await server.start()
+    print(f"BINANCE_WS_URL={server.url}/binance")
+    print(f"COINBASE_WS_URL={server.url}/coinbase")
+    await asyncio.Future()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay recorded exchange ticker messages over WebSocket')
+    parser.add_argument('--file', default=str(DEFAULT_RECORDING))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=1.0, help='1 = recorded pace, 0 = no delays')
+    parser.add_argument('--loop', action='store_true', help='restart the recording when it ends')
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,263 @@
+"""Streaming Ticker Ingestion - Binance/Coinbase public WebSocket ticker feeds
+
+Keeps the latest price per (exchange, product) in memory so balance and
+profit checks do not have to poll REST endpoints one symbol at a time.
+Point BINANCE_WS_URL / COINBASE_WS_URL at ticker_replay_server.py to run
+against recorded ticks offline.
+"""
+import websockets
+from trading_config import trading_config
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TickerEntry:
+    exchange: str
+    product: str
+    price: float
+    received_at: float  # time.time() when the tick arrived
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.received_at
+
+class ExchangeFeed:
+    """One exchange connection: subscription format and message parsing"""
+
+    name = ''
+
+    def __init__(self, url: str):
+        self.url = url
+        self.products: Set[str] = set()
+        self.ws = None
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.last_message_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._request_id = 0
+
+    def normalize(self, product: str) -> str:
+        return product.upper()
+
+    def subscribe_messages(self, products: Iterable[str]) -> List[Dict]:
+        raise NotImplementedError
+
+    def parse(self, message: Dict) -> List[Tuple[str, float]]:
+        """Raw message -> [(product, price)]"""
+        raise NotImplementedError
+
+class BinanceFeed(ExchangeFeed):
+    """wss://stream.binance.com individual symbol ticker streams (<symbol>@ticker)"""
+
+    name = 'binance'
+
+    def subscribe_messages(self, products: Iterable[str]) -> List[Dict]:
+        self._request_id += 1
+        return [{
+            'method': 'SUBSCRIBE',
+            'params': [f"{product.lower()}@ticker" for product in products],
+            'id': self._request_id
+        }]
+
+    def parse(self, message: Dict) -> List[Tuple[str, float]]:
+        data = message.get('data', message)  # combined-stream envelope
+        if data.get('e') == '24hrTicker' and data.get('s') and data.get('c'):
+            return [(data['s'].upper(), float(data['c']))]
+        return []
+
+class CoinbaseFeed(ExchangeFeed):
+    """wss://advanced-trade-ws.coinbase.com ticker channel"""
+
+    name = 'coinbase'
+
+    def subscribe_messages(self, products: Iterable[str]) -> List[Dict]:
+        return [{'type': 'subscribe', 'product_ids': sorted(products), 'channel': 'ticker'}]
+
+    def parse(self, message: Dict) -> List[Tuple[str, float]]:
+        if message.get('channel') != 'ticker':
+            return []
+        ticks = []
+        for event in message.get('events', []):
+            for ticker in event.get('tickers', []):
+                if ticker.get('product_id') and ticker.get('price'):
+                    ticks.append((ticker['product_id'].upper(), float(ticker['price'])))
+        return ticks
+
+class TickerStreamService:
+    """Owns the feeds, the reconnect loops and the latest-price table"""
+
+    def __init__(self):
+        self.feeds: Dict[str, ExchangeFeed] = {
+            'binance': BinanceFeed(trading_config.BINANCE_WS_URL),
+            'coinbase': CoinbaseFeed(trading_config.COINBASE_WS_URL)
+        }
+        self.table: Dict[Tuple[str, str], TickerEntry] = {}
+        self.max_age = trading_config.TICKER_STREAM_MAX_AGE
+        self.record_path = trading_config.TICKER_STREAM_RECORD_PATH
+        self._record_file = None
+        self._record_started = 0.0
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running = False
+
+        for symbol in trading_config.TICKER_STREAM_SYMBOLS:
+            self.subscribe_asset(symbol)
+
+    # ---------- reads ----------
+
+    def get(self, exchange: str, product: str, max_age: Optional[float] = None) -> Optional[TickerEntry]:
+        entry = self.table.get((exchange, product.upper()))
+        if entry is None:
+            return None
+        if entry.age > (self.max_age if max_age is None else max_age):
+            return None
+        return entry
+
+    def get_price(self, exchange: str, product: str, max_age: Optional[float] = None) -> Optional[float]:
+        """Latest streamed price, or None if not streamed / too old"""
+        entry = self.get(exchange, product, max_age)
+        return entry.price if entry else None
+
+    def get_usd_price(self, asset: str, max_age: Optional[float] = None) -> Optional[float]:
+        """USD price for a base asset from whichever exchange streams it"""
+        asset = asset.upper()
+        return (self.get_price('coinbase', f"{asset}-USD", max_age)
+                or self.get_price('binance', f"{asset}USDT", max_age))
+
+    # ---------- subscriptions ----------
+
+    def subscribe(self, exchange: str, products: Iterable[str]):
+        """Add products to a feed (sent immediately if it is connected)"""
+        feed = self.feeds.get(exchange)
+        if feed is None:
+            return
+        new = {feed.normalize(product) for product in products} - feed.products
+        if not new:
+            return
+        feed.products |= new
+        if self._running and exchange not in self._tasks:
+            self._tasks[exchange] = asyncio.create_task(self._run_feed(feed))
+        elif feed.connected and feed.ws is not None:
+            for message in feed.subscribe_messages(new):
+                asyncio.create_task(self._send(feed, message))
+
+    def subscribe_asset(self, asset: str):
+        """Stream a base asset's USD price from both exchanges"""
+        asset = asset.upper()
+        self.subscribe('binance', [f"{asset}USDT"])
+        self.subscribe('coinbase', [f"{asset}-USD"])
+
+    @staticmethod
+    async def _send(feed: ExchangeFeed, message: Dict):
+        try:
+            await feed.ws.send(json.dumps(message))
+        except Exception as e:
+            logger.warning(f"{feed.name} subscribe failed: {e}")
+
+    # ---------- ingestion ----------
+
+    def _record(self, feed: ExchangeFeed, message: Dict):
+        if self._record_file is None:
+            return
+        line = {'t': round(time.monotonic() - self._record_started, 3), 'exchange': feed.name, 'message': message}
+        self._record_file.write(json.dumps(line, separators=(',', ':')) + '\n')
+
+    def _ingest(self, feed: ExchangeFeed, raw: str):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        feed.messages += 1
+        feed.last_message_at = time.time()
+        self._record(feed, message)
+        for product, price in feed.parse(message):
+            self.table[(feed.name, product)] = TickerEntry(feed.name, product, price, feed.last_message_at)
+
+    async def _run_feed(self, feed: ExchangeFeed):
+        """Connect, subscribe, ingest; reconnect with capped exponential backoff"""
+        backoff = 1.0
+        while self._running:
+            try:
+                async with websockets.connect(feed.url, ping_interval=20, close_timeout=5) as ws:
+                    feed.ws = ws
+                    feed.connected = True
+                    feed.connects += 1
+                    logger.info(f"{feed.name} ticker stream connected ({len(feed.products)} products)")
+                    for message in feed.subscribe_messages(feed.products):
+                        await ws.send(json.dumps(message))
+                    async for raw in ws:
+                        self._ingest(feed, raw)
+                        backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                feed.last_error = str(e)
+                logger.warning(f"{feed.name} ticker stream dropped: {e}")
+            finally:
+                feed.connected = False
+                feed.ws = None
+
+            if not self._running:
+                break
+            # Full jitter so both feeds do not hammer the exchange in lockstep
+            await asyncio.sleep(random.uniform(0, backoff))
+            backoff = min(backoff * 2, 60.0)
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """Start every feed that has products (FastAPI startup)"""
+        if not trading_config.TICKER_STREAM_ENABLED:
+            logger.info("Ticker stream disabled")
+            return
+        if self._running:
+            return
+        self._running = True
+        if self.record_path:
+            self._record_file = open(self.record_path, 'a', buffering=1)
+            self._record_started = time.monotonic()
+        for name, feed in self.feeds.items():
+            if feed.products:
+                self._tasks[name] = asyncio.create_task(self._run_feed(feed))
+
+    async def stop(self):
+        self._running = False
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = {}
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'running': self._running,
+            'products_priced': len(self.table),
+            'feeds': {
+                name: {
+                    'url': feed.url,
+                    'connected': feed.connected,
+                    'products': len(feed.products),
+                    'connects': feed.connects,
+                    'messages': feed.messages,
+                    'last_message_age': round(now - feed.last_message_at, 3) if feed.last_message_at else None,
+                    'last_error': feed.last_error
+                }
+                for name, feed in self.feeds.items()
+            }
+        }
+
+ticker_stream = TickerStreamService()
@@ -20,6 +20,127 @@ class TradingConfig:
     AUTO_PROFIT_THRESHOLD = float(os.getenv('AUTO_PROFIT_THRESHOLD', '0.05'))  # 5% profit
     MAX_TRADE_AMOUNT = float(os.getenv('MAX_TRADE_AMOUNT', '10000'))  # $10,000 max per trade
     
+    # Shared async HTTP client (market data providers)
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '5'))  # seconds per read/write
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3'))
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+    HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', '20'))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '10'))
+    HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+    
+    # Price cache (MarketDataService.get_aggregated_price)
+    PRICE_CACHE_TTL_CRYPTO = float(os.getenv('PRICE_CACHE_TTL_CRYPTO', '15'))  # seconds
+    PRICE_CACHE_TTL_STOCK = float(os.getenv('PRICE_CACHE_TTL_STOCK', '60'))
+    PRICE_CACHE_TTL_DEFAULT = float(os.getenv('PRICE_CACHE_TTL_DEFAULT', '30'))
+    PRICE_CACHE_MAX_ENTRIES = int(os.getenv('PRICE_CACHE_MAX_ENTRIES', '2000'))
+    
+    # Batched price fetches
+    COINGECKO_BATCH_SIZE = int(os.getenv('COINGECKO_BATCH_SIZE', '100'))  # coin ids per /simple/price call
+    
+    # Background price refresher (hot-set tracking)
+    PRICE_REFRESHER_ENABLED = os.getenv('PRICE_REFRESHER_ENABLED', 'true').lower() == 'true'
+    PRICE_REFRESH_INTERVAL = float(os.getenv('PRICE_REFRESH_INTERVAL', '10'))  # seconds between cycles
+    PRICE_HOT_SET_TTL = float(os.getenv('PRICE_HOT_SET_TTL', '300'))  # drop symbols not requested for this long
+    PRICE_HOT_SET_MAX = int(os.getenv('PRICE_HOT_SET_MAX', '200'))  # symbols per asset type per cycle
+    PRICE_SNAPSHOT_MAX_AGE = float(os.getenv('PRICE_SNAPSHOT_MAX_AGE', '60'))  # older snapshots -> on-demand fetch
+    
+    # Provider rate budgets (token bucket per minute + optional UTC-day cap, 0 = no limit)
+    COINGECKO_RATE_PER_MINUTE = float(os.getenv('COINGECKO_RATE_PER_MINUTE', '30'))
+    COINGECKO_DAILY_LIMIT = int(os.getenv('COINGECKO_DAILY_LIMIT', '0'))
+    ALPHA_VANTAGE_RATE_PER_MINUTE = float(os.getenv('ALPHA_VANTAGE_RATE_PER_MINUTE', '5'))
+    ALPHA_VANTAGE_DAILY_LIMIT = int(os.getenv('ALPHA_VANTAGE_DAILY_LIMIT', '25'))
+    YAHOO_RATE_PER_MINUTE = float(os.getenv('YAHOO_RATE_PER_MINUTE', '60'))
+    YAHOO_DAILY_LIMIT = int(os.getenv('YAHOO_DAILY_LIMIT', '0'))
+    
+    # Local OHLCV store (memory-mapped bar history)
+    DATA_DIR = os.getenv('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+    OHLCV_STORE_DIR = os.getenv('OHLCV_STORE_DIR', os.path.join(DATA_DIR, 'ohlcv'))
+    OHLCV_REFRESH_SECONDS = float(os.getenv('OHLCV_REFRESH_SECONDS', '60'))  # min gap between tail refreshes
+    OHLCV_BOOTSTRAP_PERIOD = os.getenv('OHLCV_BOOTSTRAP_PERIOD', '2y')  # first download covers at least this
+    FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', os.path.join(DATA_DIR, 'features'))  # indicator rows derived from the bars
+    RATE_LIMIT_USAGE_PATH = os.getenv('RATE_LIMIT_USAGE_PATH', os.path.join(DATA_DIR, 'rate_limit_usage.json'))  # daily calls per provider, survives restarts
+    RATE_LIMIT_USAGE_SAVE_DELAY = float(os.getenv('RATE_LIMIT_USAGE_SAVE_DELAY', '2'))  # seconds; calls in this window share one write
+    
+    # Fundamentals cache (Ticker.info fields, refreshed in the background)
+    FUNDAMENTALS_CACHE_PATH = os.getenv('FUNDAMENTALS_CACHE_PATH', os.path.join(DATA_DIR, 'fundamentals.json'))
+    FUNDAMENTALS_TTL = float(os.getenv('FUNDAMENTALS_TTL', '86400'))  # seconds, ratios / market cap / 52w range
+    FUNDAMENTALS_STATIC_TTL = float(os.getenv('FUNDAMENTALS_STATIC_TTL', '604800'))  # seconds, name / currency / beta
+    FUNDAMENTALS_MAX_STALENESS = float(os.getenv('FUNDAMENTALS_MAX_STALENESS', '2592000'))  # older values are not served
+    FUNDAMENTALS_REFRESH_INTERVAL = float(os.getenv('FUNDAMENTALS_REFRESH_INTERVAL', '300'))  # seconds between refresh passes
+    FUNDAMENTALS_RETRY_SECONDS = float(os.getenv('FUNDAMENTALS_RETRY_SECONDS', '3600'))  # min gap between attempts per symbol
+    FUNDAMENTALS_BATCH_SIZE = int(os.getenv('FUNDAMENTALS_BATCH_SIZE', '50'))  # symbols fetched per pass
+    FUNDAMENTALS_SYMBOLS = os.getenv('FUNDAMENTALS_SYMBOLS', '')  # comma-separated, always tracked
+    
+    # Stale-while-revalidate aggregates (/market-summary, /trending)
+    MARKET_SUMMARY_FRESH_TTL = float(os.getenv('MARKET_SUMMARY_FRESH_TTL', '60'))  # seconds
+    MARKET_SUMMARY_MAX_STALENESS = float(os.getenv('MARKET_SUMMARY_MAX_STALENESS', '3600'))
+    TRENDING_FRESH_TTL = float(os.getenv('TRENDING_FRESH_TTL', '300'))
+    TRENDING_MAX_STALENESS = float(os.getenv('TRENDING_MAX_STALENESS', '21600'))
+    
+    # CoinGecko symbol -> id index
+    COIN_INDEX_PATH = os.getenv('COIN_INDEX_PATH', os.path.join(DATA_DIR, 'coingecko_index.json'))
+    COIN_INDEX_REFRESH_HOURS = float(os.getenv('COIN_INDEX_REFRESH_HOURS', '24'))
+    COIN_INDEX_NEGATIVE_TTL = float(os.getenv('COIN_INDEX_NEGATIVE_TTL', '86400'))  # seconds to remember unknown symbols
+    COIN_INDEX_NEGATIVE_MAX = int(os.getenv('COIN_INDEX_NEGATIVE_MAX', '5000'))  # unknown symbols remembered (oldest dropped)
+    COIN_INDEX_RANK_PAGES = int(os.getenv('COIN_INDEX_RANK_PAGES', '4'))  # 250 coins per /coins/markets page
+    
+    # Last-known-good prices (served when every live source fails)
+    LAST_KNOWN_PRICES_PATH = os.getenv('LAST_KNOWN_PRICES_PATH', os.path.join(DATA_DIR, 'last_known_prices.json'))
+    LAST_KNOWN_SNAPSHOT_INTERVAL = float(os.getenv('LAST_KNOWN_SNAPSHOT_INTERVAL', '60'))  # seconds between disk snapshots
+    LAST_KNOWN_PRICE_MAX_AGE = float(os.getenv('LAST_KNOWN_PRICE_MAX_AGE', '3600'))  # older -> price 0, not a stale trade
+    
+    # Multi-source fan-out pricing (median of a quorum)
+    PRICE_FANOUT_ENABLED = os.getenv('PRICE_FANOUT_ENABLED', 'true').lower() == 'true'
+    PRICE_QUORUM = int(os.getenv('PRICE_QUORUM', '2'))  # answer once this many sources responded
+    PRICE_SOURCE_DEADLINE = float(os.getenv('PRICE_SOURCE_DEADLINE', '2.5'))  # seconds per source
+    
+    # Server-push price stream (/api/trading/stream)
+    PRICE_STREAM_INTERVAL = float(os.getenv('PRICE_STREAM_INTERVAL', '2'))  # seconds between upstream refreshes
+    PORTFOLIO_STREAM_INTERVAL = float(os.getenv('PORTFOLIO_STREAM_INTERVAL', '15'))
+    PRICE_STREAM_QUEUE_SIZE = int(os.getenv('PRICE_STREAM_QUEUE_SIZE', '100'))  # per client, then resync
+    PRICE_STREAM_MAX_SYMBOLS = int(os.getenv('PRICE_STREAM_MAX_SYMBOLS', '50'))  # per connection
+    
+    # Market data journal: 'record' writes provider responses, 'replay' serves them offline
+    MARKET_JOURNAL_MODE = os.getenv('MARKET_JOURNAL_MODE', 'off')
+    MARKET_JOURNAL_PATH = os.getenv('MARKET_JOURNAL_PATH', os.path.join(DATA_DIR, 'market_journal.jsonl.gz'))
+    MARKET_JOURNAL_SPEED = float(os.getenv('MARKET_JOURNAL_SPEED', '1'))  # 1 = recorded latency, 0 = none
+    
+    # Streaming exchange tickers (public WebSocket feeds, no keys needed)
+    TICKER_STREAM_ENABLED = os.getenv('TICKER_STREAM_ENABLED', 'true').lower() == 'true'
+    TICKER_STREAM_SYMBOLS = [s.strip().upper() for s in os.getenv('TICKER_STREAM_SYMBOLS', 'BTC,ETH').split(',') if s.strip()]
+    TICKER_STREAM_MAX_AGE = float(os.getenv('TICKER_STREAM_MAX_AGE', '30'))  # older ticks -> REST fallback
+    TICKER_STREAM_RECORD_PATH = os.getenv('TICKER_STREAM_RECORD_PATH', '')  # append raw messages for replay
+    BINANCE_WS_URL = os.getenv('BINANCE_WS_URL', 'wss://stream.binance.com:9443/ws')
+    COINBASE_WS_URL = os.getenv('COINBASE_WS_URL', 'wss://advanced-trade-ws.coinbase.com')
+    
+    # CPU-bound analysis offload (analyze_stock / AdvancedTradingEngine in worker processes)
+    ANALYSIS_POOL_WORKERS = int(os.getenv('ANALYSIS_POOL_WORKERS', str(max(1, (os.cpu_count() or 2) - 1))))  # 0 = thread, no pool
+    ANALYSIS_POOL_MAX_PENDING = int(os.getenv('ANALYSIS_POOL_MAX_PENDING', '32'))  # queued + running jobs, then 503
+    ANALYSIS_JOB_TIMEOUT = float(os.getenv('ANALYSIS_JOB_TIMEOUT', '30'))  # seconds
+    
+    # Analysis result memoization (same symbol/engine/params and last bar -> cached result)
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '2000'))
+    ANALYSIS_CACHE_PERSIST = os.getenv('ANALYSIS_CACHE_PERSIST', 'true').lower() == 'true'  # survive restarts
+    ANALYSIS_CACHE_PATH = os.getenv('ANALYSIS_CACHE_PATH', os.path.join(DATA_DIR, 'analysis_cache.json'))
+    ANALYSIS_CACHE_SNAPSHOT_INTERVAL = float(os.getenv('ANALYSIS_CACHE_SNAPSHOT_INTERVAL', '300'))  # seconds between disk snapshots
+    
+    # ML model registry (AdvancedTradingEngine._ml_prediction): versioned models on disk
+    ML_MODEL_DIR = os.getenv('ML_MODEL_DIR', os.path.join(DATA_DIR, 'models'))
+    ML_MODEL_SCOPE = os.getenv('ML_MODEL_SCOPE', 'symbol')  # 'symbol' = one model per symbol, 'pooled' = one shared model
+    ML_MODEL_BACKEND = os.getenv('ML_MODEL_BACKEND', 'forest')  # 'forest' = RandomForest refits, 'sgd' = online logistic (partial_fit per bar)
+    ML_RETRAIN_INTERVAL = float(os.getenv('ML_RETRAIN_INTERVAL', '86400'))  # retrain models older than this (seconds)
+    ML_RETRAIN_BARS = int(os.getenv('ML_RETRAIN_BARS', '5'))  # ... or once this many bars closed since training
+    ML_DRIFT_THRESHOLD = float(os.getenv('ML_DRIFT_THRESHOLD', '1.5'))  # ... or recent features moved this many training stds
+    ML_RETRAIN_CHECK_INTERVAL = float(os.getenv('ML_RETRAIN_CHECK_INTERVAL', '900'))  # seconds between scheduler runs
+    ML_MODEL_KEEP_VERSIONS = int(os.getenv('ML_MODEL_KEEP_VERSIONS', '3'))
+    
+    # Vectorized backtests of the scoring rules (backtest.py)
+    BACKTEST_FEE_BPS = float(os.getenv('BACKTEST_FEE_BPS', '5'))  # commission per side, basis points of traded notional
+    BACKTEST_SLIPPAGE_BPS = float(os.getenv('BACKTEST_SLIPPAGE_BPS', '5'))  # fill price worse than the close by this much
+    BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', str(os.cpu_count() or 1)))  # processes for CLI runs (1 = inline)
+    SWEEP_DIR = os.getenv('SWEEP_DIR', os.path.join(DATA_DIR, 'sweeps'))  # AutoTradingConfig sweeps: price matrix + results per sweep
+    
     # Enable/Disable Exchanges
     COINBASE_ENABLED = COINBASE_API_KEY != ''
     BINANCE_ENABLED = BINANCE_API_KEY != ''
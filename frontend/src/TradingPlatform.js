@@ -1,9 +1,11 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
 import { TrendingUp, TrendingDown, RefreshCw, DollarSign, BarChart3, Activity, AlertCircle, CheckCircle, Wallet } from 'lucide-react';
+import { useTradingStream } from './hooks/use-trading-stream';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+const MARKET_SYMBOLS = ['BTC', 'ETH', 'BNB'];
 
 export default function TradingPlatform() {
   const [activeTab, setActiveTab] = useState('dashboard');
@@ -19,6 +21,22 @@ export default function TradingPlatform() {
   const [tradeHistory, setTradeHistory] = useState([]);
   const [autoProfitEnabled, setAutoProfitEnabled] = useState(false);
   const [error, setError] = useState(null);
+  
+  // Server-pushed deltas replace polling; REST loads below remain the fallback
+  const stream = useTradingStream(MARKET_SYMBOLS, { portfolio: true });
+  
+  useEffect(() => {
+    if (Object.keys(stream.prices).length > 0) {
+      setMarketData((current) => ({ ...current, ...stream.prices }));
+    }
+  }, [stream.prices]);
+  
+  useEffect(() => {
+    if (stream.portfolio) {
+      setPortfolio(stream.portfolio);
+      setAutoProfitEnabled(stream.portfolio.auto_profit_enabled);
+    }
+  }, [stream.portfolio]);
 
   useEffect(() => {
     console.log('TradingPlatform mounted, loading data...');
@@ -52,18 +70,11 @@ export default function TradingPlatform() {
 
   const loadMarketData = async () => {
     try {
-      const symbols = ['BTC', 'ETH', 'BNB'];
-      const dataPromises = symbols.map(symbol =>
-        axios.get(`${API}/trading/market-data/${symbol}?asset_type=crypto`)
-      );
-      const results = await Promise.all(dataPromises);
-      
-      const data = {};
-      results.forEach((result, index) => {
-        data[symbols[index]] = result.data;
+      const response = await axios.get(`${API}/trading/market-data`, {
+        params: { symbols: MARKET_SYMBOLS.join(','), asset_type: 'crypto' }
       });
       
-      setMarketData(data);
+      setMarketData(response.data.data || {});
     } catch (error) {
       console.error('Error loading market data:', error);
     }
@@ -212,6 +223,9 @@ export default function TradingPlatform() {
         <h3 className="text-xl font-bold mb-4 flex items-center gap-2">
           <BarChart3 className="w-5 h-5" />
           Live Market Data
+          <span className={`text-xs font-normal ${stream.connected ? 'text-green-500' : 'text-gray-500'}`}>
+            {stream.connected ? '● live' : '○ offline'}
+          </span>
           <button
             onClick={loadMarketData}
             className="ml-auto p-2 hover:bg-gray-700 rounded-lg"
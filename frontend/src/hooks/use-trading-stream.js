@@ -0,0 +1,88 @@
+import { useEffect, useRef, useState } from "react";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const STREAM_URL = `${(BACKEND_URL || window.location.origin).replace(/^http/, "ws")}/api/trading/stream`;
+
+// Apply a server delta: nested objects merge, everything else is replaced
+function mergeDelta(target, delta) {
+  const merged = { ...(target || {}) };
+  Object.entries(delta).forEach(([key, value]) => {
+    const isObject = value && typeof value === "object" && !Array.isArray(value);
+    merged[key] = isObject && merged[key] && typeof merged[key] === "object"
+      ? mergeDelta(merged[key], value)
+      : value;
+  });
+  return merged;
+}
+
+/**
+ * Subscribe to server-pushed price/portfolio updates over /api/trading/stream.
+ * Reconnects with backoff; `connected` is false while the socket is down so
+ * callers can fall back to REST.
+ */
+export function useTradingStream(symbols, { assetType = "crypto", portfolio = false } = {}) {
+  const [prices, setPrices] = useState({});
+  const [portfolioData, setPortfolioData] = useState(null);
+  const [connected, setConnected] = useState(false);
+  const symbolsKey = symbols.join(",");
+  const retryRef = useRef(0);
+
+  useEffect(() => {
+    let socket;
+    let timer;
+    let closed = false;
+
+    const connect = () => {
+      socket = new WebSocket(STREAM_URL);
+
+      socket.onopen = () => {
+        retryRef.current = 0;
+        setConnected(true);
+        socket.send(JSON.stringify({
+          action: "subscribe",
+          symbols: symbolsKey ? symbolsKey.split(",") : [],
+          asset_type: assetType,
+          portfolio
+        }));
+      };
+
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === "error") {
+          console.error("Trading stream error:", message.error);
+          return;
+        }
+        const replace = message.type === "snapshot";
+        if (message.prices) {
+          setPrices((current) => {
+            const next = { ...current };
+            Object.entries(message.prices).forEach(([symbol, value]) => {
+              next[symbol] = replace ? value : mergeDelta(current[symbol], value);
+            });
+            return next;
+          });
+        }
+        if (message.portfolio) {
+          setPortfolioData((current) => (replace ? message.portfolio : mergeDelta(current, message.portfolio)));
+        }
+      };
+
+      socket.onclose = () => {
+        setConnected(false);
+        if (closed) return;
+        const delay = Math.min(30000, 1000 * 2 ** retryRef.current);
+        retryRef.current += 1;
+        timer = setTimeout(connect, delay);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(timer);
+      if (socket) socket.close();
+    };
+  }, [symbolsKey, assetType, portfolio]);
+
+  return { prices, portfolio: portfolioData, connected };
+}
@@ -0,0 +1,123 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import AnalysisCache, newest_bar
+from analysis_pool import AnalysisCancelled
+from model_registry import FEATURES, ModelRegistry
+
+def frame(closes):
+    index = pd.date_range('2024-01-02', periods=len(closes), freq='B', tz='America/New_York')
+    return pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+                         'Volume': [1e6] * len(closes)}, index=index)
+
+def cache(tmp_path):
+    return AnalysisCache(max_entries=8, path=str(tmp_path / 'cache.json'), persist=False)
+
+def run(cache, key, bar, calls):
+    async def compute():
+        calls.append(key)
+        return {'success': True, 'run': len(calls)}
+    return asyncio.run(cache.get_or_compute(key, bar, compute))
+
+def test_revised_last_bar_invalidates_the_entry(tmp_path):
+    analyses, calls = cache(tmp_path), []
+    hist = frame([100.0, 101.0, 102.0])
+    bar = newest_bar(hist)
+    key = analyses.key('aapl', 'stock', ('1y',), bar)
+    assert run(analyses, key, bar, calls)['run'] == 1
+    assert run(analyses, key, bar, calls)['run'] == 1  # same bar: served from the cache
+
+    hist.iloc[-1, hist.columns.get_loc('Close')] = 102.5  # the forming bar was rewritten
+    revised = newest_bar(hist)
+    assert analyses.key('AAPL', 'stock', ('1y',), revised) == key
+    assert run(analyses, key, revised, calls)['run'] == 2
+    assert analyses.invalidations == 1
+
+def test_new_bar_changes_the_key(tmp_path):
+    hist = frame([100.0, 101.0, 102.0])
+    grown = frame([100.0, 101.0, 102.0, 103.0])
+    key = AnalysisCache.key('AAPL', 'stock', ('1y',), newest_bar(hist))
+    assert AnalysisCache.key('AAPL', 'stock', ('1y',), newest_bar(grown)) != key
+
+def test_concurrent_misses_share_one_analysis(tmp_path):
+    analyses, calls = cache(tmp_path), []
+    bar = newest_bar(frame([100.0, 101.0]))
+    key = analyses.key('AAPL', 'stock', ('1y',), bar)
+
+    async def compute():
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return {'success': True}
+
+    async def both():
+        return await asyncio.gather(*(analyses.get_or_compute(key, bar, compute) for _ in range(3)))
+
+    assert asyncio.run(both()) == [{'success': True}] * 3
+    assert len(calls) == 1 and analyses.coalesced == 2
+
+def test_a_failed_analysis_reaches_every_waiter(tmp_path):
+    analyses, calls = cache(tmp_path), []
+    bar = newest_bar(frame([100.0, 101.0]))
+    key = analyses.key('AAPL', 'stock', ('1y',), bar)
+
+    async def compute():
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        raise RuntimeError('worker crashed')
+
+    async def waiters():
+        return await asyncio.gather(*(analyses.get_or_compute(key, bar, compute) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(waiters()))
+    assert len(calls) == 1
+
+def test_waiters_take_over_when_the_leaders_client_leaves(tmp_path):
+    analyses, calls = cache(tmp_path), []
+    bar = newest_bar(frame([100.0, 101.0]))
+    key = analyses.key('AAPL', 'stock', ('1y',), bar)
+
+    async def compute():
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise AnalysisCancelled()  # the first caller's client disconnected
+        return {'success': True}
+
+    async def waiters():
+        return await asyncio.gather(*(analyses.get_or_compute(key, bar, compute) for _ in range(3)),
+                                    return_exceptions=True)
+
+    leader, *followers = asyncio.run(waiters())
+    assert isinstance(leader, AnalysisCancelled)
+    assert followers == [{'success': True}] * 2 and len(calls) == 2
+
+def test_result_is_cached_under_the_key_computing_it_revised(tmp_path):
+    analyses, calls = cache(tmp_path), []
+    bar = newest_bar(frame([100.0, 101.0]))
+    key_for = lambda version: analyses.key('AAPL', 'comprehensive', ('1y', version), bar)
+
+    async def compute():
+        calls.append(1)
+        return {'success': True, 'ml_prediction': {'model_version': 1}}  # trained on a cold start
+
+    trained = lambda result: key_for(result['ml_prediction']['model_version'])
+    asyncio.run(analyses.get_or_compute(key_for(0), bar, compute, trained))
+    asyncio.run(analyses.get_or_compute(key_for(1), bar, compute, trained))
+    assert len(calls) == 1 and analyses.get(key_for(0), bar) is None
+
+def test_retrained_model_changes_the_key(tmp_path):
+    registry = ModelRegistry(root=str(tmp_path / 'models'), scope='symbol', backend='forest')
+    assert registry.version('AAPL') == 0
+
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(60, len(FEATURES))), rng.integers(0, 2, 60)
+    bar = newest_bar(frame([100.0, 101.0]))
+    params = lambda: ('1y', True, 0.0, registry.version('AAPL'))
+    before = AnalysisCache.key('AAPL', 'comprehensive', params(), bar)
+
+    registry.train('AAPL', X, y, X[-5:], y[-5:], X)
+    assert registry.version('AAPL') == 1
+    assert AnalysisCache.key('AAPL', 'comprehensive', params(), bar) != before
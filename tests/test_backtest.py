@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_analysis
+from advanced_trading_engine import AdvancedTradingEngine
+from backtest import SIGNALS, combined_signals, positions, simulate, stock_signals
+from cross_section import CONFIDENCE_BANDS, SCORED_WEIGHT
+from feature_store import FeatureStore, as_indicators, stack_features
+from indicators import TRADING_DAYS
+
+BARS = 700
+CHECKED = range(TRADING_DAYS + 10, BARS, 7)  # bars with a full year of history behind them
+
+class Bars:
+    def __init__(self, bars):
+        self.data = bars
+
+    def bars(self, symbol, interval='1d'):
+        return self.data
+
+    def generation(self, symbol, interval='1d'):
+        return 1
+
+@pytest.fixture(scope='module', params=[11, 12, 13])
+def history(request, tmp_path_factory):
+    """Stored bars, their feature table and the backtest's one-row stacked indicators"""
+    rng = np.random.default_rng(request.param)
+    drift = np.repeat(rng.normal(0, 0.004, BARS // 50 + 1), 50)[:BARS]  # trending stretches reach every band
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.015, BARS)))
+    bars = np.empty((BARS, 6))
+    bars[:, 0] = pd.date_range('2020-01-02', periods=BARS, freq='B', tz='UTC').asi8 / 1e9
+    bars[:, 1] = close
+    bars[:, 2] = close * (1 + np.abs(rng.normal(0, 0.01, BARS)))
+    bars[:, 3] = close * (1 - np.abs(rng.normal(0, 0.01, BARS)))
+    bars[:, 4] = close
+    bars[:, 5] = rng.integers(100_000, 3_000_000, BARS)
+
+    store = FeatureStore(str(tmp_path_factory.mktemp('features')), bars=Bars(bars))
+    table = store.get_rows('TEST', period='max')
+    stacked, _ = stack_features([table], BARS)
+    return bars, store, table, stacked, np.cumsum(~np.isnan(stacked.close), axis=1)
+
+def live_window(bars, t):
+    """The 1y history the live engines see when bar t is the newest"""
+    window = bars[t + 1 - TRADING_DAYS:t + 1]
+    index = pd.to_datetime(window[:, 0], unit='s', utc=True)
+    return pd.DataFrame(window[:, 1:], index=index, columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+
+def test_combined_signals_match_combine_strategies(history):
+    bars, _, table, stacked, counts = history
+    confidence, signal = combined_signals(stacked, counts)
+    engine = AdvancedTradingEngine()
+    no_value = {'score': 0, 'max_score': 10}
+    no_ml = {'prediction': 'NEUTRAL', 'confidence': 0}
+
+    for t in CHECKED:
+        ind = as_indicators(table[t + 1 - TRADING_DAYS:t + 1])
+        live = engine._combine_strategies(no_value, engine._momentum_analysis(ind),
+                                          engine._mean_reversion_analysis(ind), engine._technical_indicators(ind),
+                                          no_ml, engine._risk_assessment(ind, {}))
+        # Same scores; the backtest rescales them to the 65% weight they carry
+        assert confidence[0, t] == pytest.approx(live['confidence'] / SCORED_WEIGHT, abs=0.05 / SCORED_WEIGHT)
+        band = np.searchsorted(CONFIDENCE_BANDS, confidence[0, t], side='right')
+        assert signal[0, t] == SIGNALS[band]
+    assert (confidence[0, list(CHECKED)] > 0).any()
+
+def test_stock_signals_match_analyze_stock(history, monkeypatch):
+    bars, store, _, stacked, counts = history
+    monkeypatch.setattr(stock_analysis, 'feature_store', store)
+    confidence, signal = stock_signals(stacked, counts)
+
+    for t in CHECKED:
+        live = stock_analysis.analyze_history('TEST', live_window(bars, t), {})
+        assert int(confidence[0, t]) == live['confidence_score']
+        assert signal[0, t] == {'BUY': 1, 'HOLD': 0, 'SELL': -1}[live['action']]
+
+def test_signals_fill_a_bar_later_and_pay_costs():
+    close = np.array([[100.0, 100.0, 110.0, 121.0, 121.0]])
+    ind = SimpleNamespace(close=close, returns=np.array([[np.nan, 0.0, 0.10, 0.10, 0.0]]))
+    target = positions(np.array([[1, 0, 0, -1, 0]]))
+    np.testing.assert_array_equal(target, [[1, 1, 1, 0, 0]])
+
+    returns, held = simulate(ind, target, lag=1, cost=0.001)
+    np.testing.assert_array_equal(held, [[0, 1, 1, 1, 0]])
+    # Bought at bar 1's close (paying 0.1%), sold at bar 4's close (paying 0.1% again)
+    np.testing.assert_allclose(returns, [[0.0, -0.001, 0.10, 0.10, -0.001]])
+
+def test_negative_lag_is_rejected():
+    ind = SimpleNamespace(close=np.ones((1, 3)), returns=np.zeros((1, 3)))
+    with pytest.raises(ValueError, match='future bars'):
+        simulate(ind, np.ones((1, 3)), lag=-1)
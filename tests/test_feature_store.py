@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import CLOSE, FeatureStore, compute_rows
+from ohlcv_store import COLUMNS, OHLCVStore
+
+RTOL = 1e-9
+
+class Bars:
+    """Stands in for ohlcv_store: (n, 6) bars per symbol"""
+
+    def __init__(self, bars):
+        self.data = bars
+
+    def bars(self, symbol, interval='1d'):
+        return self.data
+
+    def generation(self, symbol, interval='1d'):
+        return 1
+
+def make_bars(n, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    bars = np.empty((n, 6))
+    bars[:, 0] = 1.7e9 + 86400 * np.arange(n)
+    bars[:, 1] = close
+    bars[:, 2] = close * 1.01
+    bars[:, 3] = close * 0.99
+    bars[:, 4] = close
+    bars[:, 5] = rng.integers(100_000, 1_000_000, n)
+    return bars
+
+def assert_table(store, bars):
+    expected, _, _ = compute_rows(bars)
+    np.testing.assert_allclose(store.table('TEST'), expected, rtol=RTOL, equal_nan=True)
+
+@pytest.fixture
+def full():
+    return make_bars(400)
+
+def test_sync_appends_only_new_rows(tmp_path, full):
+    source = Bars(full[:300])
+    store = FeatureStore(str(tmp_path), bars=source)
+    assert store.sync('TEST') == 300
+    assert store.sync('TEST') == 0
+
+    source.data = full
+    assert store.sync('TEST') == 100
+    assert store.stats()['rebuilds'] == 1
+    assert_table(store, full)
+
+def test_overwritten_last_bar_is_recomputed(tmp_path, full):
+    source = Bars(full[:300].copy())
+    store = FeatureStore(str(tmp_path), bars=source)
+    store.sync('TEST')
+
+    source.data[-1, 2:5] *= 1.03  # the partial bar was refreshed
+    assert store.sync('TEST') == 1
+    assert_table(store, source.data)
+
+    grown = np.vstack([source.data, full[300:302]])
+    grown[299, 2:5] *= 0.98  # refreshed once more, then closed and followed by new bars
+    source.data = grown
+    assert store.sync('TEST') == 3
+    assert_table(store, grown)
+
+def test_restarted_store_resumes_from_the_saved_state(tmp_path, full):
+    FeatureStore(str(tmp_path), bars=Bars(full[:350])).sync('TEST')
+
+    restarted = FeatureStore(str(tmp_path), bars=Bars(full))
+    assert restarted.sync('TEST') == 50
+    assert restarted.stats()['rebuilds'] == 0
+    assert_table(restarted, full)
+
+def test_rewritten_history_rebuilds_the_table(tmp_path, full):
+    source = Bars(full[100:])
+    store = FeatureStore(str(tmp_path), bars=source)
+    store.sync('TEST')
+
+    source.data = full  # a longer history was downloaded
+    assert store.sync('TEST') == len(full)
+    assert store.stats()['rebuilds'] == 2
+    assert_table(store, full)
+
+def test_readjusted_history_rebuilds_the_table(tmp_path, full):
+    history = pd.DataFrame(full[:, 1:], columns=COLUMNS,
+                           index=pd.to_datetime(full[:, 0], unit='s', utc=True))
+    served = {'frame': history.iloc[:300]}
+    ohlcv = OHLCVStore(str(tmp_path / 'ohlcv'))
+    ohlcv.refresh_seconds = 0
+    ohlcv._download = lambda symbol, interval, **kwargs: served['frame'].copy()
+    ohlcv.refresh('TEST', '1mo')
+    store = FeatureStore(str(tmp_path / 'features'), bars=ohlcv)
+    store.sync('TEST')
+
+    adjusted = history.iloc[:301].copy()
+    adjusted.iloc[:, :4] /= 2  # a 2:1 split re-adjusted every earlier bar, plus one new bar
+    served['frame'] = adjusted
+    ohlcv.refresh('TEST', '1mo', force=True)
+
+    assert store.sync('TEST') == 301
+    assert store.stats()['rebuilds'] == 2
+    np.testing.assert_allclose(store.table('TEST')[:5, CLOSE], full[:5, 4] / 2)
+    assert_table(store, np.array(ohlcv.bars('TEST')))
+
+def test_rows_serve_exactly_the_requested_bars(tmp_path, full):
+    store = FeatureStore(str(tmp_path), bars=Bars(full))
+    times = full[-252:, 0]
+    rows = store.rows('TEST', times, float(full[-1, 4]))
+    np.testing.assert_array_equal(rows[:, 0], times)
+    assert store.rows('TEST', times, float(full[-1, 4]) + 1) is None  # different last close
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from model_backends import BACKENDS, backend_for
+from model_registry import FEATURES, ModelRegistry
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(8)
+    X = rng.normal(size=(80, len(FEATURES))) * [0.01, 100, 100, 1, 20] + [0, 150, 150, 1, 50]
+    y = (X[:, 0] + rng.normal(0, 0.01, 80) > 0).astype(int)
+    return X, y
+
+def sklearn_proba(name, model, X):
+    if name == 'sgd':
+        scaler, classifier = model
+        return classifier.predict_proba(scaler.transform(X))
+    return model.predict_proba(X)
+
+@pytest.mark.parametrize('name', sorted(BACKENDS))
+def test_compiled_scorer_matches_the_fitted_model(name, data):
+    backend = backend_for(name)
+    X, y = data
+    model = backend.fit(X[:60], y[:60])
+    scorer = backend.compile(model)
+
+    expected = sklearn_proba(name, model, X[60:])
+    for row, proba in zip(X[60:], expected):
+        np.testing.assert_allclose(scorer.predict_proba(row), proba, rtol=1e-9, atol=1e-12)
+        prediction, confidence = scorer.predict(row)
+        assert prediction == np.argmax(proba) and confidence == pytest.approx(proba.max())
+
+@pytest.mark.parametrize('name', sorted(BACKENDS))
+def test_scorer_round_trips_through_its_arrays(name, data):
+    backend = backend_for(name)
+    X, y = data
+    scorer = backend.compile(backend.fit(X, y))
+    restored = backend.scorer(**scorer.arrays())
+    np.testing.assert_array_equal(restored.predict_proba(X[-1]), scorer.predict_proba(X[-1]))
+
+def test_online_update_folds_rows_into_the_model(data):
+    backend = backend_for('sgd')
+    X, y = data
+    model = backend.fit(X[:60], y[:60])
+    before = backend.compile(model).coef.copy()
+
+    updated = backend.update(model, X[60:], y[60:])
+    after = backend.compile(updated)
+    assert not np.allclose(after.coef, before)
+    np.testing.assert_allclose(after.predict_proba(X[-1]), sklearn_proba('sgd', updated, X[-1:])[0])
+
+def test_update_is_gated_by_the_online_flag(tmp_path, data):
+    assert [backend.online for backend in (backend_for('forest'), backend_for('sgd'))] == [False, True]
+    assert not hasattr(backend_for('forest'), 'update')
+    X, y = data
+
+    forest = ModelRegistry(root=str(tmp_path / 'forest'), scope='symbol', backend='forest')
+    forest.train('AAPL', X[:55], y[:55], X[55:60], y[55:60], X[:55])
+    with pytest.raises(ValueError, match='not online'):
+        forest.update('AAPL', X[60:], y[60:])
+    assert forest.version('AAPL') == 1
+
+    sgd = ModelRegistry(root=str(tmp_path / 'sgd'), scope='symbol', backend='sgd')
+    sgd.train('AAPL', X[:55], y[:55], X[55:60], y[55:60], X[:55])
+    meta = sgd.update('AAPL', X[60:], y[60:])
+    assert meta['version'] == 2 and meta['updated_rows'] == 20 and sgd.updates == 1
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match='Unknown model backend'):
+        backend_for('xgboost')
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+from model_registry import FEATURES, MIN_ROWS, ModelRegistry
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(4)
+    X = rng.normal(size=(60, len(FEATURES)))
+    y = (X[:, 0] + rng.normal(0, 0.5, 60) > 0).astype(int)
+    return X, y
+
+def registry(tmp_path, backend='forest'):
+    return ModelRegistry(root=str(tmp_path / 'models'), scope='symbol', backend=backend)
+
+def train(models, data, key='AAPL'):
+    X, y = data
+    return models.train(key, X[:-5], y[:-5], X[-5:], y[-5:], X[:-5], last_bar=1.7e9)
+
+def versions(models, key='AAPL'):
+    return sorted(int(path.stem[1:]) for path in (models.root / key).glob('v*.json'))
+
+@pytest.mark.parametrize('backend', ['forest', 'sgd'])
+def test_published_version_loads_back_in_a_new_process(tmp_path, data, backend):
+    meta = train(registry(tmp_path, backend), data)
+
+    restarted = registry(tmp_path, backend)
+    scorer, loaded = restarted.load('AAPL')
+    assert loaded == meta
+    assert json.loads((restarted.root / 'AAPL' / 'v1.json').read_text()) == meta
+    assert restarted.loads == 1
+
+    X, _ = data
+    prediction, confidence = scorer.predict(X[-1])
+    assert prediction in (0, 1) and 0.5 <= confidence <= 1.0
+
+def test_each_training_publishes_the_next_version(tmp_path, data):
+    models = registry(tmp_path)
+    assert [train(models, data)['version'] for _ in range(2)] == [1, 2]
+    assert models.version('AAPL') == 2
+    assert registry(tmp_path).load('AAPL')[1]['version'] == 2
+
+def test_old_versions_are_pruned(tmp_path, data):
+    models = registry(tmp_path)
+    models.keep_versions = 2
+    for _ in range(4):
+        train(models, data)
+    assert versions(models) == [3, 4]
+    assert sorted(path.name for path in (models.root / 'AAPL').glob('v*.joblib')) == [
+        'v3.forest.joblib', 'v3.joblib', 'v4.forest.joblib', 'v4.joblib']
+
+def test_a_version_claimed_by_another_worker_is_skipped(tmp_path, data):
+    models = registry(tmp_path)
+    train(models, data)
+    other = registry(tmp_path)
+    (other.root / 'AAPL' / 'v2.json').touch()  # another worker is publishing v2
+
+    assert train(models, data)['version'] == 3
+    assert models.load('AAPL')[1]['version'] == 3
+
+def test_cold_start_trains_then_serves_the_stored_model(tmp_path, data):
+    models = registry(tmp_path)
+    X, y = data
+    dataset = (X, y, X[-1], np.arange(len(X)))
+    bar_times = 1.7e9 + 86400 * np.arange(len(X) + 1)
+    assert len(X) >= MIN_ROWS
+
+    first = models.predict('AAPL', dataset, bar_times)
+    second = models.predict('AAPL', dataset, bar_times)
+    assert first == second and first['model_version'] == 1
+    assert models.cold_starts == 1 and models.trainings == 1
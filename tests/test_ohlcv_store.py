@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ohlcv_store import COLUMNS, OHLCVStore
+
+class FakeYahoo:
+    """Adjusted daily history ending at `upto` bars, as Ticker.history returns it"""
+
+    def __init__(self, bars: int = 40):
+        rng = np.random.default_rng(7)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+        self.raw = pd.DataFrame({c: close for c in COLUMNS[:-1]}, index=pd.date_range(
+            end=pd.Timestamp.now(tz='America/New_York').normalize(), periods=bars, freq='D', name='Date'))
+        self.raw['Volume'] = 1e6
+        self.raw['Dividends'] = 0.0
+        self.raw['Stock Splits'] = 0.0
+        self.upto = bars - 5
+        self.calls = []
+
+    def split(self, at: int, ratio: float):
+        """A split on bar `at`: traded prices drop by the ratio from then on and the
+        adjusted history divides every earlier bar by it too"""
+        self.raw.iloc[:, :4] /= ratio
+        self.raw.iloc[:, 4] *= ratio
+        self.raw.iloc[at, 6] = ratio
+
+    def __call__(self, symbol, interval, period=None, start=None):
+        self.calls.append('full' if period else 'tail')
+        frame = self.raw.iloc[:self.upto]
+        if start is not None:
+            frame = frame[frame.index.date >= pd.Timestamp(start).date()]
+        return frame.copy()
+
+@pytest.fixture
+def store(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.refresh_seconds = 0
+    store.yahoo = FakeYahoo()
+    store._download = store.yahoo
+    return store
+
+def stored_close(store):
+    return store.get_history('TEST', '1mo', refresh=False)['Close']
+
+def test_tail_refresh_appends_new_bars_and_rewrites_the_last(store):
+    store.refresh('TEST', '1mo')
+    store.yahoo.raw.iloc[store.yahoo.upto - 1, 3] *= 1.01  # the forming bar moved
+    store.yahoo.upto += 2
+    store.refresh('TEST', '1mo', force=True)
+
+    assert store.yahoo.calls == ['full', 'tail']
+    expected = store.yahoo.raw['Close'].iloc[:store.yahoo.upto]
+    np.testing.assert_allclose(stored_close(store).to_numpy(), expected.to_numpy()[-len(stored_close(store)):])
+    assert store.stats()['appended_bars'] == 2
+
+def test_split_in_the_tail_downloads_the_history_again(store):
+    store.refresh('TEST', '1mo')
+    store.yahoo.upto += 1
+    store.yahoo.split(store.yahoo.upto - 1, 4.0)
+    store.refresh('TEST', '1mo', force=True)
+
+    assert store.yahoo.calls == ['full', 'tail', 'full']
+    closes = stored_close(store).to_numpy()
+    assert np.max(np.abs(np.diff(np.log(closes)))) < 0.1  # no fake gap at the split
+    assert store.stats()['readjustments'] == 1
+
+def test_readjusted_overlap_without_action_column_downloads_again(store):
+    store.refresh('TEST', '1mo')
+    store.yahoo.raw.iloc[:, :4] *= 0.98  # a dividend's adjustment, as bulk downloads report it
+    store.refresh('TEST', '1mo', force=True)
+
+    assert store.yahoo.calls == ['full', 'tail', 'full']
+    np.testing.assert_allclose(stored_close(store).iloc[0], store.yahoo.raw['Close'].loc[stored_close(store).index[0]])
+
+def test_reader_remaps_a_replaced_file_of_the_same_size(store):
+    store.refresh('TEST', '1mo')
+    before = np.array(store.bars('TEST'))
+    store.yahoo.raw.iloc[:, :4] *= 2
+    store.refresh('TEST', '1mo', force=True)  # same bars re-adjusted -> new file of the same size
+
+    after = store.bars('TEST')
+    assert len(after) == len(before)
+    np.testing.assert_allclose(after[:, 4], before[:, 4] * 2)
+
+def test_prefetch_reports_only_the_symbols_it_stored(store):
+    store.refresh('HELD', '1mo')
+    store.refresh_seconds = 3600
+    frame = store.yahoo.raw.iloc[:store.yahoo.upto, :5]
+    store._download_many = lambda symbols, interval, **kwargs: pd.concat({'NEW': frame}, axis=1)
+
+    ready = store.prefetch(['held', 'new', 'gone'], '1mo')  # the bulk frame dropped GONE
+
+    assert ready == {'HELD', 'NEW'}
+    assert len(store.bars('NEW')) == store.yahoo.upto
+    assert not len(store.bars('GONE'))
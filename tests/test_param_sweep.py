@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+import pytest
+
+import param_sweep
+from param_sweep import BASE_CONFIG, INITIAL_CASH, Sweep, grid_configs, replay
+
+def live_decision(symbol, analysis, config, portfolio, day):
+    """auto_trading_decision + check_auto_trading_limits + execute_paper_trade (server.py)
+    on an in-memory portfolio, without fees"""
+    if analysis['confidence_score'] < config['min_confidence']:
+        return 'SKIP'
+    position = portfolio['positions'].get(symbol)
+    action, price = analysis['action'], analysis['current_price']
+
+    def trade(kind, quantity):
+        if kind == 'BUY':
+            portfolio['cash'] -= price * quantity
+            portfolio['positions'][symbol] = {'quantity': quantity, 'avg_price': price}
+        else:
+            portfolio['cash'] += price * quantity
+            del portfolio['positions'][symbol]
+        portfolio['trades'].append({'action': kind, 'symbol': symbol, 'timestamp': day})
+        return kind
+
+    if action == 'BUY' and not position:
+        quantity = int(config['max_trade_amount'] / price)
+        if quantity < 1:
+            return 'SKIP'
+        amount = price * quantity
+        if len([t for t in portfolio['trades'] if t['timestamp'] == day]) >= config['max_daily_trades']:
+            return 'SKIP'
+        invested = sum(p['quantity'] * p['avg_price'] for p in portfolio['positions'].values())
+        if invested + amount > config['max_total_investment'] or amount > portfolio['cash']:
+            return 'SKIP'
+        return trade('BUY', quantity)
+    if action == 'SELL' and position:
+        return trade('SELL', position['quantity'])
+    if position:
+        change = (price - position['avg_price']) / position['avg_price'] * 100
+        if change <= -config['stop_loss_percent'] or change >= config['take_profit_percent']:
+            return trade('SELL', position['quantity'])
+    return 'HOLD'
+
+def live_replay(close, confidence, signal, config):
+    """The scan once per bar: held symbols first (exits), then the rest (entries), each in order"""
+    portfolio = {'cash': INITIAL_CASH, 'positions': {}, 'trades': []}
+    actions = {1: 'BUY', 0: 'HOLD', -1: 'SELL'}
+    last = np.full(close.shape[0], np.nan)
+    equity = []
+    for t in range(close.shape[1]):
+        last = np.where(np.isnan(close[:, t]), last, close[:, t])
+        held = [s for s in range(close.shape[0]) if s in portfolio['positions']]
+        for symbol in held + [s for s in range(close.shape[0]) if s not in held]:
+            if np.isnan(close[symbol, t]):
+                continue  # no bar, no analysis
+            analysis = {'confidence_score': confidence[symbol, t], 'action': actions[int(signal[symbol, t])],
+                        'current_price': close[symbol, t]}
+            live_decision(symbol, analysis, config, portfolio, day=t)
+        equity.append(portfolio['cash'] + sum(p['quantity'] * last[s] for s, p in portfolio['positions'].items()))
+    return np.array(equity), len(portfolio['trades'])
+
+def market(symbols=12, bars=300, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.03, (symbols, bars)), axis=1)) * rng.uniform(1, 40, (symbols, 1))
+    close[rng.random(close.shape) < 0.03] = np.nan  # halted / not yet listed
+    confidence = rng.choice([30.0, 50.0, 60.0, 70.0, 80.0, 90.0], size=close.shape)
+    signal = rng.choice([-1, 0, 1], size=close.shape, p=[0.2, 0.5, 0.3]).astype(np.float64)
+    return close, confidence, signal
+
+CONFIGS = grid_configs({
+    'min_confidence': [50, 80],
+    'stop_loss_percent': [3.0, 8.0],
+    'take_profit_percent': [5.0, 20.0],
+    'max_trade_amount': [500.0, 2500.0],
+    'max_daily_trades': [1, 5],
+})
+
+@pytest.mark.parametrize('config', CONFIGS[::3])
+def test_replay_follows_the_auto_trader(config):
+    close, confidence, signal = market()
+    equity, trades = replay(close, confidence, signal, config, cost=0.0, lag=0)
+    expected, expected_trades = live_replay(close, confidence, signal, config)
+    assert trades == expected_trades
+    np.testing.assert_allclose(equity, expected, rtol=1e-12)
+
+def test_replay_acts_on_the_previous_bar_and_pays_costs():
+    close = np.array([[10.0, 10.0, 12.0, 12.0]])
+    confidence = np.full(close.shape, 90.0)
+    signal = np.array([[1.0, 0.0, -1.0, 0.0]])
+    params = {**BASE_CONFIG, 'take_profit_percent': 100.0}
+    equity, trades = replay(close, confidence, signal, params, cost=0.01, lag=1)
+    # Bought 100 shares at bar 1's close, sold at bar 3's, 1% paid on both legs
+    assert trades == 2
+    assert equity[-1] == pytest.approx(INITIAL_CASH - 1000 * 1.01 + 1200 * 0.99)
+
+@pytest.fixture
+def sweep_factory(tmp_path, monkeypatch):
+    close, confidence, signal = market(symbols=6, bars=260, seed=9)
+    matrix = np.stack([close, confidence, signal])
+    times = 1.6e9 + 86400 * np.arange(close.shape[1])
+    monkeypatch.setattr(param_sweep, 'build_matrix',
+                        lambda symbols, period, strategy: (matrix, times, list(symbols), []))
+
+    def make(root):
+        return Sweep([f"S{i}" for i in range(6)], grid={'min_confidence': [50, 60, 70, 80],
+                                                        'stop_loss_percent': [3.0, 5.0]},
+                     n_folds=2, train_bars=100, root=str(tmp_path / root))
+    return make
+
+def test_sweep_resumes_after_a_cut_off_result_line(sweep_factory):
+    complete = sweep_factory('complete').run(workers=1)
+
+    sweep = sweep_factory('resumed')
+    assert len(sweep.configs) == 8
+    sweep.run(workers=1)
+    lines = sweep.results_path.read_text().splitlines(keepends=True)
+    # Interrupted while writing the 4th record: 3 whole lines and part of the next
+    sweep.results_path.write_text(''.join(lines[:3]) + lines[3][:len(lines[3]) // 2])
+    assert len(sweep.results()) == 3
+    assert len(sweep.pending()) == 5
+
+    resumed = sweep.run(workers=1)
+    records = [json.loads(line) for line in sweep.results_path.read_text().splitlines()]
+    assert len(records) == 8  # the partial line was dropped, not merged into the next record
+    strip = lambda r: {k: v for k, v in r.items() if k != 'elapsed'}
+    assert {k: strip(v) for k, v in resumed.items()} == {k: strip(v) for k, v in complete.items()}
+    assert sweep.pending() == []
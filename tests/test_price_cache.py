@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+import price_cache as price_cache_module
+from price_cache import PriceCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(price_cache_module.time, 'monotonic', clock.monotonic)
+    return clock
+
+def fetcher(calls, price=100.0, delay=0.0):
+    async def fetch():
+        calls.append(price)
+        await asyncio.sleep(delay)
+        return {'price': price}
+    return fetch
+
+def test_entries_expire_after_their_asset_type_ttl(clock):
+    cache = PriceCache(ttls={'crypto': 10, 'stock': 60}, max_entries=10)
+    cache.put('btc', 'crypto', {'price': 1})
+    cache.put('AAPL', 'stock', {'price': 2})
+
+    clock.now += 11
+    assert cache.get('BTC', 'crypto') is None
+    assert cache.get('aapl', 'stock') == {'price': 2}
+    clock.now += 50
+    assert cache.get('AAPL', 'stock') is None
+
+def test_fresh_value_is_served_without_fetching(clock):
+    cache, calls = PriceCache(ttls={'crypto': 10}, max_entries=10), []
+    assert asyncio.run(cache.get_or_fetch('BTC', 'crypto', fetcher(calls))) == {'price': 100.0}
+    assert asyncio.run(cache.get_or_fetch('BTC', 'crypto', fetcher(calls, 200.0))) == {'price': 100.0}
+    clock.now += 11
+    assert asyncio.run(cache.get_or_fetch('BTC', 'crypto', fetcher(calls, 200.0))) == {'price': 200.0}
+    assert calls == [100.0, 200.0] and cache.hits == 1
+
+def test_uncacheable_values_are_fetched_again():
+    cache, calls = PriceCache(ttls={'crypto': 10}, max_entries=10), []
+    for _ in range(2):
+        asyncio.run(cache.get_or_fetch('BTC', 'crypto', fetcher(calls), cacheable=lambda value: False))
+    assert len(calls) == 2
+
+def test_concurrent_misses_share_one_fetch():
+    cache, calls = PriceCache(ttls={'crypto': 10}, max_entries=10), []
+
+    async def lookups():
+        return await asyncio.gather(*(cache.get_or_fetch('BTC', 'crypto', fetcher(calls, delay=0.01))
+                                      for _ in range(5)))
+
+    assert asyncio.run(lookups()) == [{'price': 100.0}] * 5
+    assert calls == [100.0]
+    assert cache.misses == 1 and cache.coalesced == 4
+
+def test_single_lookup_joins_an_inflight_batch():
+    cache, batches = PriceCache(ttls={'stock': 60}, max_entries=10), []
+
+    async def batch(symbols):
+        batches.append(list(symbols))
+        await asyncio.sleep(0.01)
+        return {symbol: {'price': float(len(symbol))} for symbol in symbols}
+
+    async def single():
+        raise AssertionError('a lookup of a symbol in flight must not fetch')
+
+    async def both():
+        many = asyncio.ensure_future(cache.get_or_fetch_many(['AAPL', 'MSFT'], 'stock', batch))
+        await asyncio.sleep(0)
+        one = await cache.get_or_fetch('MSFT', 'stock', single)
+        return await many, one
+
+    many, one = asyncio.run(both())
+    assert batches == [['AAPL', 'MSFT']]
+    assert one == many['MSFT'] == {'price': 4.0}
+
+def test_followers_fetch_again_when_the_leader_is_cancelled():
+    cache, calls = PriceCache(ttls={'crypto': 10}, max_entries=10), []
+
+    async def lookups():
+        leader = asyncio.ensure_future(cache.get_or_fetch('BTC', 'crypto', fetcher(calls, delay=0.05)))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(cache.get_or_fetch('BTC', 'crypto', fetcher(calls, 200.0, delay=0.01)))
+                     for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()  # its client disconnected
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(lookups()) == [{'price': 200.0}] * 3
+    assert calls == [100.0, 200.0]
+    assert cache.stats()['inflight'] == 0
+
+def test_batch_followers_fetch_again_when_the_leader_is_cancelled():
+    cache, batches = PriceCache(ttls={'stock': 60}, max_entries=10), []
+
+    async def batch(symbols):
+        batches.append(list(symbols))
+        await asyncio.sleep(0.02)
+        return {symbol: {'price': float(len(symbol))} for symbol in symbols}
+
+    async def lookups():
+        leader = asyncio.ensure_future(cache.get_or_fetch_many(['AAPL', 'MSFT'], 'stock', batch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.get_or_fetch_many(['MSFT', 'IBM'], 'stock', batch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(lookups()) == {'MSFT': {'price': 4.0}, 'IBM': {'price': 3.0}}
+    assert batches == [['AAPL', 'MSFT'], ['IBM'], ['MSFT']]
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    cache = PriceCache(ttls={'crypto': 10}, max_entries=10)
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('provider down')
+
+    async def lookups():
+        return await asyncio.gather(*(cache.get_or_fetch('BTC', 'crypto', failing) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(lookups()))
+    assert cache.get('BTC', 'crypto') is None and cache.stats()['inflight'] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PriceCache(ttls={'stock': 60}, max_entries=2)
+    cache.put('A', 'stock', 1)
+    cache.put('B', 'stock', 2)
+    cache.get('A', 'stock')
+    cache.put('C', 'stock', 3)
+    assert cache.get('B', 'stock') is None
+    assert cache.get('A', 'stock') == 1 and cache.evictions == 1
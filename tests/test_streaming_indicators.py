@@ -0,0 +1,159 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import compute_indicators, ema, rolling_std, sma, wilder_rsi
+from streaming_indicators import ATR, EMA, MACD, IndicatorStream, RollingStats, WilderRSI, ZScore
+
+RTOL = 1e-9
+ATOL = 1e-9
+
+@pytest.fixture
+def hist():
+    rng = np.random.default_rng(42)
+    bars = 600
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, bars).astype(float)
+    }, index=pd.date_range('2022-01-03', periods=bars, freq='B'))
+
+def _stream(indicator, values):
+    return np.array([indicator.update(float(x)) for x in values])
+
+def assert_matches(streamed, batch):
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(batch))
+    np.testing.assert_allclose(streamed, batch, rtol=RTOL, atol=ATOL, equal_nan=True)
+
+def test_ema_matches_batch(hist):
+    close = hist['Close'].to_numpy()
+    for span in (9, 12, 26):
+        assert_matches(_stream(EMA(span), close), ema(close, span))
+
+def test_wilder_rsi_matches_batch(hist):
+    close = hist['Close'].to_numpy()
+    assert_matches(_stream(WilderRSI(14), close), wilder_rsi(close, 14))
+
+def test_rolling_stats_match_batch(hist):
+    close = hist['Close'].to_numpy()
+    for window in (5, 20, 50):
+        stats = RollingStats(window)
+        means, variances = zip(*(stats.update(float(x)) for x in close))
+        assert_matches(np.array(means), sma(close, window))
+        assert_matches(np.sqrt(variances), rolling_std(close, window))
+
+def test_rolling_stats_stay_accurate_over_long_streams():
+    rng = np.random.default_rng(0)
+    values = 1e4 + np.cumsum(rng.normal(0, 1, 50_000))
+    stats = RollingStats(20)
+    for x in values:
+        stats.update(float(x))
+    mean, variance = stats.value
+    assert mean == pytest.approx(values[-20:].mean(), rel=1e-12)
+    assert variance == pytest.approx(values[-20:].var(ddof=1), rel=1e-6)
+
+def test_macd_matches_batch(hist):
+    ind = compute_indicators(hist['High'], hist['Low'], hist['Close'], hist['Volume'])
+    stream = MACD(12, 26, 9)
+    readings = np.array([stream.update(float(x)) for x in ind.close])
+    assert_matches(readings[:, 0], ind.macd)
+    assert_matches(readings[:, 1], ind.macd_signal)
+    assert_matches(readings[:, 2], ind.macd_hist)
+
+def test_atr_matches_batch(hist):
+    ind = compute_indicators(hist['High'], hist['Low'], hist['Close'], hist['Volume'])
+    atr = ATR(14)
+    readings = [atr.update(float(h), float(l), float(c))
+                for h, l, c in zip(hist['High'], hist['Low'], hist['Close'])]
+    assert_matches(np.array(readings), ind.atr_14)
+
+def test_zscore_matches_batch(hist):
+    ind = compute_indicators(hist['High'], hist['Low'], hist['Close'], hist['Volume'])
+    expected = (ind.close - ind.sma_20) / ind.std_20
+    assert_matches(_stream(ZScore(20), ind.close), expected)
+
+def test_peek_equals_update_and_leaves_state_alone(hist):
+    close = hist['Close'].to_numpy()
+    for make in (lambda: EMA(12), lambda: WilderRSI(14), lambda: RollingStats(20),
+                 lambda: MACD(), lambda: ZScore(20)):
+        indicator = make()
+        for x in close[:40]:
+            indicator.update(float(x))
+        before = indicator.value
+        peeked = indicator.peek(101.5)
+        np.testing.assert_array_equal(indicator.value, before)
+        np.testing.assert_array_equal(peeked, indicator.update(101.5))
+
+def test_warm_up_is_nan_like_batch():
+    rsi = WilderRSI(14)
+    readings = [rsi.update(100.0 + i % 3) for i in range(15)]
+    assert all(math.isnan(r) for r in readings[:14])
+    assert not math.isnan(readings[14])
+    assert math.isnan(RollingStats(20).value[0])
+    assert math.isnan(EMA(12).value)
+
+def test_uses_slots():
+    for indicator in (EMA(12), WilderRSI(14), RollingStats(20), MACD(), ATR(14), ZScore(20), IndicatorStream()):
+        assert not hasattr(indicator, '__dict__')
+
+def test_indicator_stream_seeded_from_history(hist):
+    seeded = IndicatorStream.from_history(hist.iloc[:-1])
+    ind = compute_indicators(hist['High'], hist['Low'], hist['Close'], hist['Volume'])
+
+    # One new bar: extend() only folds in what it has not seen
+    assert seeded.extend(hist) == 1
+    assert seeded.extend(hist) == 0
+    assert seeded.bars == len(hist)
+
+    values = seeded.values()
+    for name in ('ema_12', 'ema_26', 'macd', 'macd_signal', 'macd_hist', 'sma_20', 'std_20',
+                 'bb_upper', 'bb_lower', 'atr_14'):
+        assert values[name] == pytest.approx(getattr(ind, name)[-1], rel=RTOL)
+    assert values['rsi_14'] == pytest.approx(wilder_rsi(ind.close)[-1], rel=RTOL)
+
+def test_indicator_stream_tick_peek(hist):
+    stream = IndicatorStream.from_history(hist.iloc[:-1])
+    last = hist.iloc[-1]
+    committed_before = stream.values()
+
+    live = stream.peek(float(last['Close']), high=float(last['High']), low=float(last['Low']))
+    assert stream.values() == committed_before
+    assert stream.bars == len(hist) - 1
+
+    closed = stream.update(float(last['High']), float(last['Low']), float(last['Close']))
+    assert live == pytest.approx(closed, rel=1e-12)
+
+def test_indicator_stream_holds_back_the_forming_bar(hist):
+    last = hist.index[-1]
+    during = last + pd.Timedelta(hours=12)  # the last bar's session is still open
+    stream = IndicatorStream.from_history(hist, now=during)
+    assert stream.bars == len(hist) - 1
+    assert stream.forming_bar == last
+
+    # The store rewrites the forming bar; the peek follows it and never commits it
+    revised = hist.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] *= 1.05
+    revised.iloc[-1, revised.columns.get_loc('High')] = revised['Close'].iloc[-1]
+    assert stream.extend(revised, now=during) == 0
+    assert stream.bars == len(hist) - 1
+
+    closed = IndicatorStream.from_history(revised.iloc[:-1])
+    bar = revised.iloc[-1]
+    expected = closed.update(float(bar['High']), float(bar['Low']), float(bar['Close']))
+    assert stream.peek() == pytest.approx(expected, rel=1e-12)
+
+    # A tick counts as the forming bar's close, not as one more bar
+    tick = float(bar['Close']) * 1.01
+    before = IndicatorStream.from_history(revised.iloc[:-1])
+    assert stream.peek(tick)['ema_12'] == pytest.approx(before.ema_12.peek(tick), rel=1e-12)
+
+    # Once the session is over the corrected close is committed
+    assert stream.extend(revised, now=last + pd.Timedelta(days=1)) == 1
+    assert stream.forming is None
+    assert stream.values() == pytest.approx(expected, rel=1e-12)